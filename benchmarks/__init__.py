@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"""
+    benchmarks
+    ~~~~~~~~~~
+
+    Rendering benchmarks run against the headless screen.
+
+    Each scene builds a widget tree on a utk.headless_display.Screen and
+    times one change followed by the idle resize and redraw it queues, so
+    the whole frame pipeline is measured the way an application runs it.
+    From the repository root::
+
+        python -m benchmarks                    # run and compare
+        python -m benchmarks --save-baseline    # store the results
+        python -m benchmarks label_update cjk_text
+
+    ops/s is machine dependent, so the baseline is stored next to this file
+    by each developer instead of being shipped. bytes/frame and escapes per
+    frame are deterministic and any increase is reported.
+
+    benchmarks.import_time times "import utk" in new interpreters::
+
+        python -m benchmarks.import_time
+
+    and benchmarks.memory the bytes taken by each widget and canvas::
+
+        python -m benchmarks.memory --count 100000
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
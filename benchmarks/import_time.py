@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+    benchmarks.import_time
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Times importing utk and the first use of its public names, each run in
+    a new interpreter so nothing is imported already::
+
+        python -m benchmarks.import_time
+        python -m benchmarks.import_time --repeat 20
+
+    python -X importtime -c "import utk" tells where the time goes.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+# statements timed, the first is what programs importing utk always pay
+STATEMENTS = [
+    "import utk",
+    "import utk; utk.Label",
+    "import utk; utk.Window",
+    "import utk; utk.get_default_screen()",
+]
+
+# runs in the new interpreter and prints the seconds taken by the statement
+_TIMER = """\
+import time
+start = time.time()
+exec(%r)
+print(time.time() - start)
+"""
+
+
+def time_statement(statement, env=None):
+    """Returns the seconds statement took in a new interpreter."""
+    output = subprocess.check_output([sys.executable, "-c",
+                                      _TIMER % statement], env=env)
+    return float(output.decode("ascii").strip())
+
+
+def _environment():
+    # run against this tree even when utk isn't installed
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    path = env.get("PYTHONPATH")
+    env["PYTHONPATH"] = root if not path else os.pathsep.join([root, path])
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.import_time",
+                                     description="utk import time")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="interpreters started for each statement "
+                             "(default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    env = _environment()
+    print("%-40s %10s %10s" % ("statement", "median ms", "min ms"))
+    for statement in STATEMENTS:
+        times = sorted(time_statement(statement, env)
+                       for i in range(args.repeat))
+        print("%-40s %10.1f %10.1f" % (statement,
+                                       times[len(times) // 2] * 1000,
+                                       times[0] * 1000))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
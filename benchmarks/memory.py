@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+    benchmarks.memory
+    ~~~~~~~~~~~~~~~~~
+
+    Memory taken by each widget and canvas, measured with tracemalloc::
+
+        python -m benchmarks.memory
+        python -m benchmarks.memory --count 100000
+
+    "label" is a Label not packed, "packed label" one shown in a VBox of a
+    window, so it has a canvas and its BoxChild entry, and "canvas" a
+    TextCanvas added to a parent canvas.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import gc
+import sys
+import argparse
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None # python < 3.4
+
+from gulib.compat import b
+
+from utk.box import VBox
+from utk.label import Label
+from utk.window import Window
+from utk.canvas import BlankCanvas, TextCanvas
+from utk.headless_display import Screen
+from utk.mainloop import run_pending
+from utk.screen import get_default_screen, set_default_screen
+from utk.updates import freeze_updates, thaw_updates
+
+
+def measure(build, count):
+    """Returns the bytes allocated and kept by build(count) per object."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        objects = build(count)
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+    del objects
+    return used / float(count)
+
+
+def build_labels(count):
+    return [Label("label") for i in range(count)]
+
+
+def build_packed_labels(count):
+    old_screen = get_default_screen()
+    screen = Screen(80, 24)
+    set_default_screen(screen)
+    try:
+        freeze_updates()
+        try:
+            win = Window()
+            vbox = VBox()
+            win.add(vbox)
+            for i in range(count):
+                vbox.pack_start(Label("label"))
+            win.show_all()
+        finally:
+            thaw_updates()
+        run_pending()
+        return win
+    finally:
+        screen.stop()
+        set_default_screen(old_screen)
+
+
+def build_canvases(count):
+    root = BlankCanvas(0, 0, 80, 24)
+    for i in range(count):
+        root.add_child(TextCanvas([b("canvas")], left=0, top=i % 24,
+                                  cols=6, rows=1))
+    return root
+
+
+MEASURES = [
+    ("label", build_labels),
+    ("packed label", build_packed_labels),
+    ("canvas", build_canvases),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.memory",
+                                     description="utk memory per object")
+    parser.add_argument("--count", type=int, default=10000,
+                        help="objects built for each measure "
+                             "(default: %(default)s)")
+    args = parser.parse_args(argv)
+    if tracemalloc is None:
+        parser.error("tracemalloc is needed, python 3.4 or later")
+
+    print("%-16s %12s" % ("object", "bytes"))
+    for name, build in MEASURES:
+        print("%-16s %12.0f" % (name, measure(build, args.count)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""
+    benchmarks.run
+    ~~~~~~~~~~~~~~
+
+    Runs the scenes, reports their results and compares them with the
+    stored baseline.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import os
+import json
+import time
+import argparse
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None # python < 3.4
+
+from utk.headless_display import Screen
+from utk.mainloop import run_pending
+from utk.screen import get_default_screen, set_default_screen
+
+from benchmarks.scenes import SCENES
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# fields of a result, and whether a higher value is better
+FIELDS = [
+    ("ops", True),
+    ("bytes_per_frame", False),
+    ("escapes_per_frame", False),
+    ("alloc_kb", False),
+]
+
+# fields that don't depend on the machine, any change is reported
+EXACT_FIELDS = ("bytes_per_frame", "escapes_per_frame")
+
+
+def run_scene(scene_class, min_time=1.0, alloc_steps=20):
+    """Returns a dict with the results of scene_class."""
+    old_screen = get_default_screen()
+    screen = Screen(scene_class.cols, scene_class.rows)
+    set_default_screen(screen)
+    screen.start()
+    scene = scene_class()
+    try:
+        scene.setup(screen)
+        scene.step(0)
+        screen.reset_counters()
+
+        steps = 0
+        start = time.time()
+        elapsed = 0
+        while elapsed < min_time:
+            steps += 1
+            scene.step(steps)
+            elapsed = time.time() - start
+
+        result = {"ops": steps / elapsed,
+                  "bytes_per_frame": None,
+                  "escapes_per_frame": None,
+                  "alloc_kb": None}
+        if screen.frames_written:
+            result["bytes_per_frame"] = \
+                screen.bytes_written // screen.frames_written
+            result["escapes_per_frame"] = \
+                screen.escapes_written // screen.frames_written
+
+        if tracemalloc is not None:
+            # peak memory allocated while running a step
+            total = 0
+            for i in range(alloc_steps):
+                tracemalloc.start()
+                base = tracemalloc.get_traced_memory()[0]
+                scene.step(steps + i + 1)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                total += peak - base
+            result["alloc_kb"] = round(total / 1024.0 / alloc_steps, 1)
+        return result
+    finally:
+        scene.teardown()
+        # draws still queued need the screen started
+        run_pending()
+        screen.stop()
+        set_default_screen(old_screen)
+
+
+def compare(name, result, baseline, tolerance):
+    """Returns the regressions of result against baseline as messages."""
+    regressions = []
+    for field, higher_is_better in FIELDS:
+        value, base = result.get(field), baseline.get(field)
+        if value is None or base is None:
+            continue
+        if field in EXACT_FIELDS:
+            limit = base
+        elif higher_is_better:
+            limit = base * (1 - tolerance)
+        else:
+            limit = base * (1 + tolerance)
+        if (value < limit) if higher_is_better else (value > limit):
+            regressions.append("%s: %s %s, baseline %s" %
+                               (name, field, _format(value), _format(base)))
+    return regressions
+
+
+def _format(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return "%.1f" % value
+    return str(value)
+
+
+def load_baseline(filename):
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks",
+                                     description="utk rendering benchmarks")
+    parser.add_argument("scenes", nargs="*", metavar="SCENE",
+                        help="scenes to run, all by default: %s" %
+                        ", ".join(s.name for s in SCENES))
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+                        help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed ops/s and alloc_kb change against "
+                             "the baseline (default: %(default)s)")
+    parser.add_argument("--min-time", type=float, default=1.0,
+                        help="seconds each scene runs (default: "
+                             "%(default)s)")
+    args = parser.parse_args(argv)
+
+    scenes = SCENES
+    if args.scenes:
+        names = dict((s.name, s) for s in SCENES)
+        unknown = [n for n in args.scenes if n not in names]
+        if unknown:
+            parser.error("unknown scenes: %s" % ", ".join(unknown))
+        scenes = [names[n] for n in args.scenes]
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = []
+    print("%-16s %12s %16s %18s %10s" % (("scene",) +
+                                         tuple(f for f, h in FIELDS)))
+    for scene in scenes:
+        result = results[scene.name] = run_scene(scene, args.min_time)
+        print("%-16s %12s %16s %18s %10s" % ((scene.name,) +
+              tuple(_format(result[f]) for f, h in FIELDS)))
+        if scene.name in baseline:
+            regressions.extend(compare(scene.name, result,
+                                       baseline[scene.name], args.tolerance))
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print("baseline saved to %s" % args.baseline)
+    elif regressions:
+        print("\nregressions against %s:" % args.baseline)
+        for regression in regressions:
+            print("  " + regression)
+        return 1
+    return 0
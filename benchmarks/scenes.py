@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""
+    benchmarks.scenes
+    ~~~~~~~~~~~~~~~~~
+
+    Reference scenes for the rendering benchmarks.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import os
+import tempfile
+
+from gulib.compat import b
+
+from utk import escape
+from utk.box import HBox, VBox
+from utk.canvas import TextCanvas
+from utk.constants import WRAP_CHAR
+from utk.label import Label
+from utk.logview import LogView
+from utk.mainloop import run_pending
+from utk.window import Window
+
+_LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+          "eiusmod tempor incididunt ut labore et dolore magna aliqua.")
+
+_CJK = u"漢字かな交じり文、中文字符和한국어 텍스트가 섞인 줄입니다。"
+
+
+class Scene(object):
+    """
+    A benchmark scene, setup() builds it on screen and each step() makes
+    one change and draws it.
+    """
+    name = None
+    cols = 200
+    rows = 60
+
+    def setup(self, screen):
+        self.screen = screen
+
+    def step(self, i):
+        raise NotImplementedError()
+
+    def teardown(self):
+        pass
+
+    def show_window(self, child):
+        self.window = Window()
+        self.window.add(child)
+        self.window.show_all()
+        run_pending()
+
+
+class FullRedraw(Scene):
+    """Every row of the screen invalidated and composed again."""
+    name = "full_redraw"
+
+    def setup(self, screen):
+        super(FullRedraw, self).setup(screen)
+        vbox = VBox()
+        for row in range(self.rows):
+            vbox.pack_start(Label("%3d %s" % (row, _LOREM)), expand=False)
+        self.show_window(vbox)
+
+    def step(self, i):
+        self.window.queue_draw()
+        run_pending()
+
+
+class LabelUpdate(Scene):
+    """A single label changing its text in a full screen of labels."""
+    name = "label_update"
+
+    def setup(self, screen):
+        super(LabelUpdate, self).setup(screen)
+        vbox = VBox()
+        self.labels = [Label("%3d %s" % (row, _LOREM))
+                       for row in range(self.rows)]
+        for label in self.labels:
+            vbox.pack_start(label, expand=False)
+        self.show_window(vbox)
+
+    def step(self, i):
+        self.labels[self.rows // 2].set_text("updated %d" % i)
+        run_pending()
+
+
+class ScrollingLog(Scene):
+    """A log file viewer scrolled one line at a time."""
+    name = "scrolling_log"
+    lines = 100000
+
+    def setup(self, screen):
+        super(ScrollingLog, self).setup(screen)
+        fd, self.filename = tempfile.mkstemp(suffix=".log")
+        with os.fdopen(fd, "wb") as f:
+            for line in range(self.lines):
+                f.write(b("%08d INFO request %d served: %s\n" %
+                          (line, line * 7, _LOREM)))
+        self.logview = LogView(self.filename)
+        self.logview.index_all()
+        self.show_window(self.logview)
+
+    def step(self, i):
+        self.logview.set_top(i % (self.lines - self.rows))
+        run_pending()
+
+    def teardown(self):
+        self.logview.close()
+        os.remove(self.filename)
+
+
+class NestedLayout(Scene):
+    """
+    A leaf label growing inside alternating HBox and VBox containers,
+    size negotiation goes up and down the whole tree.
+    """
+    name = "nested_layout"
+    depth = 8
+
+    def _build(self, depth):
+        if not depth:
+            label = Label("leaf")
+            self.leaves.append(label)
+            return label
+        box = HBox() if depth % 2 else VBox()
+        box.pack_start(self._build(depth - 1))
+        box.pack_start(self._build(depth - 1))
+        return box
+
+    def setup(self, screen):
+        super(NestedLayout, self).setup(screen)
+        self.leaves = []
+        self.show_window(self._build(self.depth))
+
+    def step(self, i):
+        self.leaves[0].set_text("leaf" + "!" * (i % 3))
+        run_pending()
+
+
+class CJKText(Scene):
+    """Wide chars wrapped in a label that changes its text."""
+    name = "cjk_text"
+
+    def setup(self, screen):
+        super(CJKText, self).setup(screen)
+        self.text = (_CJK * 6 + u"\n") * (self.rows // 2)
+        self.label = Label()
+        self.label.set_wrap_mode(WRAP_CHAR)
+        self.show_window(self.label)
+
+    def step(self, i):
+        self.label.set_text(("%d " % i).encode("utf-8") +
+                            self.text.encode("utf-8"))
+        run_pending()
+
+
+class _CanvasToplevel(object):
+    # the screen only needs the mapped state and the canvas of toplevels
+    is_mapped = True
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+
+
+class PaletteChurn(Scene):
+    """256 color palette entries changed on every frame."""
+    name = "palette_churn"
+    entries = 16
+
+    def setup(self, screen):
+        super(PaletteChurn, self).setup(screen)
+        screen.set_terminal_properties(colors=256)
+        run = self.cols // self.entries
+        text = []
+        attr = []
+        for row in range(self.rows):
+            text.append(b("x") * (run * self.entries))
+            attr.append([("attr%d" % ((row + n) % self.entries), run)
+                         for n in range(self.entries)])
+        canvas = TextCanvas(text, attr, None, 0, 0, self.cols, self.rows)
+        canvas.show()
+        screen.add_toplevel(_CanvasToplevel(canvas))
+        self.register(0)
+
+    def register(self, i):
+        for n in range(self.entries):
+            # colors valid both in the 88 and 256 color entries
+            color = (i * self.entries + n) * 37 % 4096
+            self.screen.register_palette_entry(
+                "attr%d" % n, "default", "default", None,
+                "#%03x" % color, "#%03x" % (4095 - color))
+
+    def step(self, i):
+        self.register(i)
+        self.screen.draw_screen()
+
+
+class InputBurst(Scene):
+    """A burst of typed, cursor and utf-8 input decoded into keys."""
+    name = "input_burst"
+
+    def setup(self, screen):
+        super(InputBurst, self).setup(screen)
+        data = (b("hello world ") + b("\x1b[A\x1b[B\x1b[1;5C\x1bOP\r\t") +
+                u"ñandú 中文".encode("utf-8")) * 50
+        self.codes = list(bytearray(data))
+
+    def step(self, i):
+        codes = self.codes
+        keys = []
+        while codes:
+            run, codes = escape.process_keyqueue(codes, False)
+            keys.extend(run)
+
+
+SCENES = [FullRedraw, LabelUpdate, ScrollingLog, NestedLayout, CJKText,
+          PaletteChurn, InputBurst]
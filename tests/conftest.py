@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 
 import utk
+from utk.screen import set_default_screen
+from utk.headless_display import Screen
 
 def pytest_configure(config):
     utk._running_from_pytest = True
+    set_default_screen(Screen())
 
 def pytest_unconfigure(config):
     utk._running_from_pytest = False
+    set_default_screen(None)
@@ -7,6 +7,24 @@ from tests.test_container import TestContainer
 from utk.widget import Widget
 from utk.box import Box, ORIENTATION_HORIZONTAL, ORIENTATION_VERTICAL
 from utk.box import HBox, VBox
+from utk.label import Label
+from utk.utils import Requisition, Rectangle
+
+
+class CountingLabel(Label):
+
+    def __init__(self, text=""):
+        super(CountingLabel, self).__init__(text)
+        self.requests = 0
+        self.allocations = 0
+
+    def do_size_allocate(self, allocation):
+        self.allocations += 1
+        super(CountingLabel, self).do_size_allocate(allocation)
+
+    def do_size_request(self):
+        self.requests += 1
+        return super(CountingLabel, self).do_size_request()
 
 
 class TestBox(TestContainer):
@@ -118,3 +136,76 @@ class TestBox(TestContainer):
     def test_vbox(self):
         vb = VBox()
         assert vb.get_orientation() == ORIENTATION_VERTICAL
+
+    def test_size_request_cached(self):
+        vb = VBox()
+        l1 = CountingLabel("a")
+        l2 = CountingLabel("bbb")
+        vb.pack_start(l1)
+        vb.pack_start(l2)
+        vb.show_all()
+        assert vb.size_request() == Requisition(3, 2)
+        assert vb.size_request() == Requisition(3, 2)
+        assert (l1.requests, l2.requests) == (1, 1)
+
+        l2.set_text("bbbb")
+        assert vb.size_request() == Requisition(4, 2)
+        assert (l1.requests, l2.requests) == (1, 2)
+
+        gen = vb._requisition_gen
+        l2.set_text("dddd")
+        assert vb.size_request() == Requisition(4, 2)
+        assert (l1.requests, l2.requests) == (1, 3)
+        assert vb._requisition_gen == gen
+
+    def test_size_request_child_visibility(self):
+        vb = VBox()
+        l1 = Label("a")
+        l2 = Label("bbb")
+        vb.pack_start(l1)
+        vb.pack_start(l2)
+        vb.show_all()
+        assert vb.size_request() == Requisition(3, 2)
+        l2.hide()
+        assert vb.size_request() == Requisition(1, 1)
+        vb.remove(l1)
+        assert vb.size_request() == Requisition(0, 0)
+
+    def test_size_allocate(self):
+        vb = VBox()
+        l1 = Label("a")
+        l2 = Label("bbb")
+        l3 = Label("cc")
+        vb.pack_start(l1, expand=False)
+        vb.pack_start(l2)
+        vb.pack_end(l3, expand=False)
+        vb.show_all()
+        vb.size_request()
+        vb.size_allocate(Rectangle(0, 0, 10, 7))
+        assert l1._allocation == Rectangle(0, 0, 10, 1)
+        assert l2._allocation == Rectangle(0, 1, 10, 5)
+        assert l3._allocation == Rectangle(0, 6, 10, 1)
+
+    def test_size_allocate_skip_unchanged(self):
+        vb = VBox()
+        labels = [CountingLabel("row %d" % i) for i in range(10)]
+        for label in labels:
+            vb.pack_start(label, expand=False)
+        vb.show_all()
+        vb.size_request()
+        vb.size_allocate(Rectangle(0, 0, 10, 20))
+        assert [l.allocations for l in labels] == [1] * 10
+
+        last = CountingLabel("new row")
+        vb.pack_start(last, expand=False)
+        last.show()
+        vb.size_request()
+        vb.size_allocate(Rectangle(0, 0, 10, 20))
+        assert [l.allocations for l in labels] == [1] * 10
+        assert last.allocations == 1
+        assert last._allocation == Rectangle(0, 10, 10, 1)
+
+        labels[3].set_text("row three")
+        vb.size_request()
+        vb.size_allocate(Rectangle(0, 0, 10, 20))
+        assert [l.allocations for l in labels] == [1, 1, 1, 2] + [1] * 6
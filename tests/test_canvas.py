@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from utk.canvas import Canvas
+import random
+
+from gulib.compat import b
+
+from utk.canvas import Canvas, SolidCanvas, TextCanvas, BlankCanvas
 from utk.canvas import CanvasView
 from utk.canvas import Shard
 from utk.canvas import ShardBody
@@ -9,6 +13,7 @@ from utk.canvas import ShardTail
 from utk.canvas import shard_body, shard_body_row, shard_body_tail
 from utk.canvas import shards_trim_top, shards_trim_rows
 from utk.canvas import shards_trim_sides, shards_join
+from utk.utils import Rectangle
 
 
 class TestCanvasView(object):
@@ -173,11 +178,33 @@ class TestCanvas(object):
         p._dirty = False
         p._update.clear()
         c1._dirty = False
-        c1._update.clear()
+        # the areas are kept by the root only
+        assert c1._update is None
         c1.invalidate_area((0, 0, 5, 5))
         assert c1.is_dirty
         assert p.is_dirty
         assert p._update == set([(0, 0, 5, 5)])
+        assert c1._update is None
+
+    def test_lazy_allocation(self):
+        p, c1 = self.sample_canvas()[0:2]
+        assert not hasattr(c1, "__dict__")
+        assert c1._childs == ()
+        assert c1._shards is None
+        p.add_child(c1)
+        assert c1._update is None
+        assert p._childs == [c1]
+        # removing the last child keeps the list for the next one
+        p.remove_child(c1)
+        assert p._childs == []
+        assert len(c1.shards) == 1
+
+
+def test_canvas_slots():
+    for canvas in (SolidCanvas(".", None, 0, 0, 2, 2),
+                   TextCanvas([b("ab")], cols=2, rows=1),
+                   BlankCanvas(0, 0, 2, 2)):
+        assert not hasattr(canvas, "__dict__")
 
 
 def test_shard_body_row():
@@ -381,3 +408,97 @@ def test_shards_join():
                       (3, [(0, 0, 10, 3, None, "bar"),
                            (0, 0, 10, 3, None, "333")])]
 
+
+
+class CountingCanvas(TextCanvas):
+
+    def __init__(self, *args, **kwargs):
+        super(CountingCanvas, self).__init__(*args, **kwargs)
+        self.asked_rows = []
+
+    def body_content(self, trim_left=0, trim_top=0, cols=None, rows=None,
+                     attr_map=None):
+        self.asked_rows.append((trim_top, rows))
+        return super(CountingCanvas, self).body_content(trim_left, trim_top,
+                                                        cols, rows, attr_map)
+
+
+def text_rows(canvas):
+    return [b("").join(t for a, cs, t in row) for row in canvas.content()]
+
+
+def test_occlusion():
+    root = SolidCanvas(".", None, 0, 0, 6, 4)
+    below = CountingCanvas([b("aaaa")] * 3, left=1, top=0, cols=4, rows=3)
+    covered = CountingCanvas([b("bb")], left=2, top=1, cols=2, rows=1)
+    above = CountingCanvas([b("cccc")] * 2, left=1, top=1, cols=4, rows=2)
+    for canvas in (below, covered, above):
+        root.add_child(canvas)
+        canvas.show()
+    assert root._get_exposed_childs() == [below, above]
+    assert text_rows(root) == [b(".aaaa."), b(".cccc."), b(".cccc."),
+                               b("......")]
+    # the covered canvas is never asked, the partially covered one only
+    # for its first row
+    assert covered.asked_rows == []
+    assert below.asked_rows == [(0, 1)]
+    assert above.asked_rows == [(0, 2)]
+
+
+def brute_force_exposed(canvases):
+    visible = [c for c in canvases if c._visible]
+    return [c for i, c in enumerate(visible)
+            if not any(a._area.contains(c._area) for a in visible[i+1:])]
+
+
+def test_exposed_childs_layouts():
+    rnd = random.Random(7)
+    for n in range(50):
+        root = BlankCanvas(0, 0, 20, 10)
+        for i in range(rnd.randint(1, 12)):
+            left, top = rnd.randint(0, 15), rnd.randint(0, 8)
+            canvas = Canvas(left, top, rnd.randint(1, 20 - left),
+                            rnd.randint(1, 10 - top))
+            root.add_child(canvas)
+            if rnd.random() < 0.9:
+                canvas.show()
+        assert root._get_exposed_childs() == brute_force_exposed(root._childs)
+
+
+def test_exposed_childs_rows(monkeypatch):
+    calls = []
+    contains = Rectangle.contains
+
+    def counting_contains(self, other):
+        calls.append(other)
+        return contains(self, other)
+
+    monkeypatch.setattr(Rectangle, "contains", counting_contains)
+    root = BlankCanvas(0, 0, 80, 200)
+    rows = [Canvas(0, y, 80, 1) for y in range(200)]
+    for canvas in rows:
+        root.add_child(canvas)
+        canvas.show()
+    assert root._get_exposed_childs() == rows
+    # the rows don't overlap, they aren't compared with each other
+    assert len(calls) == 0
+    dialog = Canvas(0, 50, 80, 10)
+    root.add_child(dialog)
+    dialog.show()
+    del calls[:]
+    assert root._get_exposed_childs() == rows[:50] + rows[60:] + [dialog]
+    assert len(calls) <= 20
+
+
+def test_text_canvas_set_text():
+    root = BlankCanvas(0, 0, 6, 2)
+    canvas = TextCanvas([b("old")], left=1, top=1, cols=4, rows=1)
+    root.add_child(canvas)
+    canvas.show()
+    assert text_rows(root) == [b("      "), b(" old  ")]
+    root._update.clear()
+    canvas.set_text([b("new")])
+    assert canvas.is_dirty
+    assert root._update == set([(1, 1, 4, 1)])
+    assert canvas._attr == [[]] and canvas._cs == [[]]
+    assert text_rows(root) == [b("      "), b(" new  ")]
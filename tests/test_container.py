@@ -4,7 +4,8 @@ from tests.test_widget import TestWidget
 from tests.callback import SignalEmitCallback
 
 from utk.widget import Widget
-from utk.container import Container
+from utk.container import Container, ResizeQueue
+from utk.box import VBox
 
 
 class TestContainer(TestWidget):
@@ -42,3 +43,72 @@ class TestContainer(TestWidget):
         assert on_foreach.called
         assert on_foreach.data == cb
         assert on_foreach.args == ("data", False)
+
+
+class RecordingBox(VBox):
+
+    def __init__(self, name, log):
+        super(RecordingBox, self).__init__()
+        self._name = name
+        self._log = log
+        self._request_needed = self._child_request_needed = False
+        self._alloc_needed = False
+
+    def check_resize(self):
+        self._log.append(self._name)
+        # a pass over the subtree clears the descendants flags
+        widgets = [self]
+        while widgets:
+            widget = widgets.pop()
+            widget._alloc_needed = False
+            widgets.extend(widget.get_children())
+
+
+class TestResizeQueue(object):
+
+    def make_tree(self):
+        log = []
+        outer = RecordingBox("outer", log)
+        middle = RecordingBox("middle", log)
+        inner = RecordingBox("inner", log)
+        outer.pack_start(middle)
+        middle.pack_start(inner)
+        for w in (outer, middle, inner):
+            w._alloc_needed = False
+        return log, outer, middle, inner
+
+    def test_depth_order(self):
+        log, outer, middle, inner = self.make_tree()
+        queue = ResizeQueue()
+        inner._alloc_needed = True
+        middle._alloc_needed = True
+        queue.push(inner)
+        queue.push(middle)
+        assert len(queue) == 2
+        queue.run()
+        assert log == ["middle"]
+        assert queue.get_stats() == {"queued": 2, "processed": 1,
+                                     "avoided": 1}
+        assert not inner._resize_pending and not middle._resize_pending
+
+    def test_deduplicate(self):
+        log, outer, middle, inner = self.make_tree()
+        queue = ResizeQueue()
+        assert queue.push(outer)
+        assert not queue.push(outer)
+        assert len(queue) == 1
+        outer._child_request_needed = True
+        queue.run()
+        assert log == ["outer"]
+        assert queue.avoided == 1
+        assert queue.push(outer)
+
+    def test_not_covered(self):
+        log, outer, middle, inner = self.make_tree()
+        queue = ResizeQueue()
+        inner._request_needed = True
+        outer._alloc_needed = True
+        queue.push(inner)
+        queue.push(outer)
+        queue.run()
+        assert log == ["outer", "inner"]
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from gulib.compat import b
+
+from utk import escape
+
+
+def codes(s):
+    return list(bytearray(b(s)))
+
+
+def test_paste_markers():
+    run, remaining = escape.process_keyqueue(codes("\x1b[200~abc"), False)
+    assert run == ['begin paste']
+    assert remaining == codes("abc")
+    run, remaining = escape.process_keyqueue(codes("\x1b[201~"), False)
+    assert run == ['end paste']
+    assert remaining == []
+    # f9 shares the prefix with paste markers
+    run, remaining = escape.process_keyqueue(codes("\x1b[20~"), False)
+    assert run == ['f9']
+
+
+class TestProcessPaste(object):
+
+    def test_complete(self):
+        run, remaining, done = escape.process_paste(
+            codes("hello\x1b[Aworld\x1b[201~x"))
+        assert run == [('paste', b("hello\x1b[Aworld"))]
+        assert remaining == codes("x")
+        assert done
+
+    def test_no_end_marker(self):
+        run, remaining, done = escape.process_paste(codes("hello"))
+        assert run == [('paste', b("hello"))]
+        assert remaining == []
+        assert not done
+
+    def test_partial_end_marker(self):
+        run, remaining, done = escape.process_paste(codes("hello\x1b[20"))
+        assert run == [('paste', b("hello"))]
+        assert remaining == codes("\x1b[20")
+        assert not done
+        run, remaining, done = escape.process_paste(remaining + codes("1~"))
+        assert run == []
+        assert remaining == []
+        assert done
+
+    def test_chunks(self):
+        run, remaining, done = escape.process_paste(
+            codes("a" * 10 + "\x1b[201~"), chunk_size=4)
+        assert run == [('paste', b("aaaa")), ('paste', b("aaaa")),
+                       ('paste', b("aa"))]
+        assert done
+
+
+class TestMouse(object):
+
+    def test_legacy(self):
+        run, remaining = escape.process_keyqueue(codes("\x1b[M !!"), False)
+        assert run == [('mouse press', 1, 0, 0)]
+        run, remaining = escape.process_keyqueue(codes("\x1b[M@+!"), False)
+        assert run == [('mouse drag', 1, 10, 0)]
+
+    def test_sgr(self):
+        run, remaining = escape.process_keyqueue(codes("\x1b[<0;300;2Mx"),
+                                                 False)
+        assert run == [('mouse press', 1, 299, 1)]
+        assert remaining == codes("x")
+        run, remaining = escape.process_keyqueue(codes("\x1b[<0;300;2m"),
+                                                 False)
+        assert run == [('mouse release', 1, 299, 1)]
+        run, remaining = escape.process_keyqueue(codes("\x1b[<48;5;6M"),
+                                                 False)
+        assert run == [('ctrl mouse drag', 1, 4, 5)]
+        run, remaining = escape.process_keyqueue(codes("\x1b[<35;5;6M"),
+                                                 False)
+        assert run == [('mouse motion', 0, 4, 5)]
+        run, remaining = escape.process_keyqueue(codes("\x1b[<65;1;1M"),
+                                                 False)
+        assert run == [('mouse press', 5, 0, 0)]
+
+    def test_sgr_incomplete(self):
+        with pytest.raises(escape.MoreInputRequired):
+            escape.process_keyqueue(codes("\x1b[<0;30"), True)
+
+    def test_coalesce(self):
+        keys = [('mouse press', 1, 0, 0),
+                ('mouse drag', 1, 1, 0),
+                ('mouse drag', 1, 2, 0),
+                ('mouse drag', 1, 3, 0),
+                'a',
+                ('mouse drag', 1, 4, 0),
+                ('mouse drag', 2, 5, 0),
+                ('mouse motion', 0, 6, 0),
+                ('mouse motion', 0, 7, 0),
+                ('mouse release', 1, 7, 0)]
+        assert escape.coalesce_mouse_events(keys) == [
+                ('mouse press', 1, 0, 0),
+                ('mouse drag', 1, 3, 0),
+                'a',
+                ('mouse drag', 1, 4, 0),
+                ('mouse drag', 2, 5, 0),
+                ('mouse motion', 0, 7, 0),
+                ('mouse release', 1, 7, 0)]
+
+
+def test_input_table_up_to_date():
+    # regenerate with: python -m utk.escape utk/_keytable.py
+    from utk import _keytable
+    classes, num_classes, transitions, results = \
+        escape.compile_sequences(escape.input_sequences)
+    assert _keytable.CLASSES == classes
+    assert _keytable.NUM_CLASSES == num_classes
+    assert _keytable.TRANSITIONS == transitions
+    assert _keytable.RESULTS == results
+
+
+def test_compile_sequences_conflict():
+    with pytest.raises(AssertionError):
+        escape.compile_sequences([('[A', 'up'), ('[A', 'down')])
+    with pytest.raises(AssertionError):
+        escape.compile_sequences([('[A', 'up'), ('[AB', 'down')])
+
+
+def test_keyqueue_trie():
+    trie = escape.KeyqueueTrie([('[A', 'up'), ('[1A', 'shift up')])
+    assert trie.get(codes("[Ax"), False) == ('up', codes("x"))
+    assert trie.get(codes("[1Ax"), False) == ('shift up', codes("x"))
+    assert trie.get(codes("[Z"), False) is None
+    with pytest.raises(escape.MoreInputRequired):
+        trie.get(codes("[1"), True)
+
+
+def test_input_trie():
+    trie = escape.get_input_trie()
+    assert trie is escape.get_input_trie()
+    assert trie.get(codes("[Ax"), False) == ('up', codes("x"))
+    assert escape.input_trie is trie
+    assert ('[A', 'up') in escape.input_sequences
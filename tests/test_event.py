@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from utk.event import InputEvent, make_event, make_events, split_modifiers
+from utk.constants import (
+    EVENT_KEY, EVENT_MOUSE, EVENT_PASTE, EVENT_RESIZE, EVENT_CURSOR,
+    MODIFIER_SHIFT, MODIFIER_META, MODIFIER_CTRL,
+)
+
+
+def test_input_event_defaults():
+    e = InputEvent(EVENT_KEY, 'a')
+    assert e == (EVENT_KEY, 'a', 0, -1, -1, 0, None)
+    assert not hasattr(e, '__dict__')
+
+
+def test_split_modifiers():
+    assert split_modifiers('up') == (0, 'up')
+    assert split_modifiers('ctrl meta up') == (MODIFIER_CTRL|MODIFIER_META,
+                                               'up')
+    assert split_modifiers('shift tab') == (MODIFIER_SHIFT, 'tab')
+    assert split_modifiers('meta ') == (0, 'meta ')
+    assert split_modifiers(' ') == (0, ' ')
+
+
+def test_make_event():
+    e = make_event('ctrl b', 10.0)
+    assert e == InputEvent(EVENT_KEY, 'b', modifiers=MODIFIER_CTRL,
+                           timestamp=10.0)
+    e = make_event(('ctrl mouse drag', 1, 18, 13))
+    assert e == InputEvent(EVENT_MOUSE, 'drag', 1, 18, 13, MODIFIER_CTRL)
+    e = make_event(('meta double mouse click', 1, 3, 4))
+    assert e == InputEvent(EVENT_MOUSE, 'double click', 1, 3, 4,
+                           MODIFIER_META)
+    e = make_event(('paste', b'text'))
+    assert e == InputEvent(EVENT_PASTE, b'text')
+    e = make_event(('cursor position', 4, 2))
+    assert e == InputEvent(EVENT_CURSOR, 'cursor position', x=4, y=2)
+    e = make_event('window resize')
+    assert e.kind == EVENT_RESIZE
+
+
+def test_make_events():
+    events = make_events(['a', 'up'], 5.0)
+    assert [e.key for e in events] == ['a', 'up']
+    assert [e.timestamp for e in events] == [5.0, 5.0]
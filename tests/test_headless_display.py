@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+from gulib.compat import b
+
+from utk.headless_display import Screen
+from utk.screen import get_default_screen, set_default_screen
+from utk.label import Label
+from utk.window import Window
+
+
+@pytest.fixture
+def screen():
+    old_screen = get_default_screen()
+    screen = Screen(500, 200)
+    set_default_screen(screen)
+    yield screen
+    set_default_screen(old_screen)
+
+
+def show_label(text):
+    win = Window()
+    label = Label(text)
+    win.add(label)
+    label.show()
+    win.show()
+    return win, label
+
+
+def test_cols_rows(screen):
+    assert screen.get_cols_rows() == (500, 200)
+    screen.start()
+    screen.set_cols_rows(120, 40)
+    assert screen.get_cols_rows() == (120, 40)
+    assert screen.get_input() == ['window resize']
+    assert screen.get_input() == []
+
+
+def test_draw_screen(screen):
+    win, label = show_label("hello\nworld")
+    assert screen.started
+    screen.draw_screen()
+    text = screen.get_text()
+    assert len(text) == 200
+    assert text[0].startswith(b("hello"))
+    assert text[1].startswith(b("world"))
+    assert screen.get_cell(1, 1)[2] == b("o")
+    assert screen.get_cell(499, 1)[2] == b(" ")
+    with pytest.raises(IndexError):
+        screen.get_cell(500, 1)
+    assert screen.frames_written == 1
+    # blank row ends are erased instead of written
+    assert 0 < screen.bytes_written < 500 * 200
+    assert screen.escapes_written > 0
+
+
+def test_counters(screen):
+    win, label = show_label("hello")
+    screen.draw_screen()
+    frame_bytes = screen.bytes_written
+    screen.reset_counters()
+    assert screen.bytes_written == 0
+    screen.draw_screen()
+    assert screen.frames_written == 1
+    assert screen.bytes_written == frame_bytes
+
+
+def test_wide_cell(screen):
+    win, label = show_label(u"a一b".encode("utf-8"))
+    screen.draw_screen()
+    assert screen.get_cell(1, 0)[2] == u"一".encode('utf-8')
+    assert screen.get_cell(2, 0)[2] == b("")
+    assert screen.get_cell(3, 0)[2] == b("b")
+
+
+def test_feed_data(screen):
+    screen.start()
+    screen.feed_keys(['a', 'enter'])
+    screen.feed_data("x\x1b[A")
+    screen.feed_data("\x1b[200~pasted\x1b[201~")
+    assert screen.get_input() == ['a', 'enter']
+    assert screen.get_input(raw_keys=True) == (['x', 'up'],
+                                               [120, 27, 91, 65])
+    assert screen.get_input() == [('paste', b("pasted"))]
+    assert screen.get_input() == []
+
+
+def test_latency(screen):
+    win, label = show_label("hello")
+    screen.feed_keys(['a'])
+    screen.get_input()
+    screen.queue_draw()
+    screen.draw_screen()
+    assert screen.latency.count == 1
+
+
+def test_latency_input_without_redraw(screen):
+    win, label = show_label("hello")
+    screen.draw_screen()
+    screen.latency.clear()
+    screen.feed_keys(['a'])
+    # nothing handles the key, then a timer changes the label
+    screen.process_input()
+    label.set_text("tick")
+    screen.draw_screen()
+    assert screen.latency.count == 0
+
+
+def test_no_descriptors():
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("needs /proc/self/fd")
+    before = len(os.listdir("/proc/self/fd"))
+    screens = [Screen(20, 4) for i in range(10)]
+    assert len(os.listdir("/proc/self/fd")) == before
+    for screen in screens:
+        screen.start()
+        screen.feed_data("a")
+        assert screen.get_input() == ["a"]
+        screen.stop()
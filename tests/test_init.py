@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+import utk
+
+
+def run_python(code):
+    # a new interpreter, with the path of this one to find utk and gulib
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    output = subprocess.check_output([sys.executable, "-c", code], env=env)
+    return output.decode("ascii").split()
+
+
+needs_pep562 = pytest.mark.skipif(sys.version_info < (3, 7),
+                                  reason="module __getattr__ is python 3.7+")
+
+
+@needs_pep562
+def test_import_is_lazy():
+    loaded = run_python(
+        "import sys, utk\n"
+        "for name in ('utk.label', 'utk.window', 'utk.screen', 'utk.utils',"
+        " 'utk.mainloop', 'asyncio', 'multiprocessing'):\n"
+        "    print(name in sys.modules)\n")
+    assert loaded == ["False"] * 7
+
+
+@needs_pep562
+def test_public_name_imports_its_module():
+    loaded = run_python(
+        "import sys, utk\n"
+        "utk.Label\n"
+        "print('utk.label' in sys.modules)\n"
+        "print('utk.text_edit' in sys.modules)\n")
+    assert loaded == ["True", "False"]
+
+
+def test_public_names():
+    from utk.label import Label
+    from utk.box import VBox
+    from utk.updates import freeze_updates
+    from utk import mainloop
+    from gulib import MainLoop
+    assert utk.MainLoop is MainLoop
+    assert utk.Label is Label
+    assert utk.VBox is VBox
+    assert utk.freeze_updates is freeze_updates
+    assert utk.mainloop is mainloop
+    assert "Window" in dir(utk)
+    with pytest.raises(AttributeError):
+        utk.NoSuchWidget
@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 
+from gulib.compat import b
 from tests.test_misc import TestMisc
 from tests.callback import NotifyPropCallback
 
 from utk.label import Label
+from utk.box import VBox
+from utk.utils import Rectangle, Requisition
+from utk.constants import WRAP_WORD
 
 class TestLabel(TestMisc):
 
@@ -33,3 +37,22 @@ class TestLabel(TestMisc):
         l.set_text(l.get_text() + " t")
         assert l.text == "t t"
         assert on_text_notify.value == "t t"
+
+    def test_multiline(self):
+        l = self.widget("one\ntwo words")
+        assert l.size_request() == Requisition(9, 2)
+        assert l.get_lines() == [b("one"), b("two words")]
+
+    def test_wrap(self):
+        vb = VBox()
+        l = self.widget("some words to wrap")
+        vb.pack_start(l)
+        vb.show_all()
+        l.set_wrap_mode(WRAP_WORD)
+        assert vb.size_request() == Requisition(18, 1)
+        vb.size_allocate(Rectangle(0, 0, 10, 5))
+        assert l.get_lines() == [b("some words"), b("to wrap")]
+        # the allocation changed the height for width
+        assert vb.size_request() == Requisition(18, 2)
+        vb.size_allocate(Rectangle(0, 0, 10, 5))
+        assert l._allocation == Rectangle(0, 0, 10, 5)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+from utk.latency import LatencyStats, percentile
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([7], 99) == 7
+
+
+class TestLatencyStats(object):
+
+    def test_add(self):
+        stats = LatencyStats()
+        stats.add(1.0, 1.5, 2.0, 4.0)
+        assert len(stats) == 1
+        assert stats.samples() == [(0.5, 0.5, 2.0, 3.0)]
+
+    def test_size(self):
+        stats = LatencyStats(size=10)
+        for i in range(20):
+            stats.add(0, 0, 0, i)
+        assert len(stats) == 10
+        assert stats.count == 20
+        assert stats.percentiles()['total'][50] == 14
+
+    def test_format(self):
+        stats = LatencyStats()
+        assert stats.format() == "no samples"
+        stats.add(0, 0.001, 0.002, 0.003)
+        assert stats.format().startswith("1 samples, p50/95/99 ms:")
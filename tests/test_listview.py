@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from gulib.compat import b
+from tests.callback import SignalEmitCallback
+from tests.test_container import TestContainer
+
+from utk.widget import Widget
+from utk.listview import ListView
+from utk.window import Window
+from utk.utils import Rectangle
+
+
+def show_in_window(widget, width=20, height=10):
+    win = Window()
+    win.add(widget)
+    widget.show()
+    # showing the window would start the terminal, map it by hand instead
+    win._visible = True
+    win.size_request()
+    win.size_allocate(Rectangle(0, 0, width, height))
+    win.map()
+    return win
+
+
+class RowRenderer(object):
+
+    def __init__(self):
+        self.rendered = []
+
+    def __call__(self, index):
+        self.rendered.append(index)
+        return "row %d" % index
+
+
+class TestListView(TestContainer):
+
+    widget = ListView
+    default_name = "UtkListView"
+
+    # ListView rows aren't widgets
+    def test_add_signal(self):
+        with pytest.raises(Warning):
+            self.widget().add(ListView())
+
+    def test_remove_signal(self):
+        with pytest.raises(Warning):
+            self.widget().remove(Widget())
+
+    def test_foreach_signal(self):
+        # the rows aren't widgets, there are no children to call back
+        called = []
+        lv = self.widget()
+        on_foreach = SignalEmitCallback("foreach")
+        lv.connect("foreach", on_foreach)
+        lv.foreach(lambda *a: called.append(a), "data")
+        assert on_foreach.called
+        assert on_foreach.args == ("data", False)
+        assert called == []
+
+    def test_render_visible_rows(self):
+        renderer = RowRenderer()
+        lv = ListView(10000000, renderer, overscan=2)
+        show_in_window(lv)
+        assert lv.is_mapped
+        assert sorted(renderer.rendered) == list(range(12))
+        assert [i for i, c in sorted(lv._row_canvases.items())
+                if c.is_visible] == list(range(10))
+        assert lv._row_canvases[3]._text == [b("row 3")]
+        assert lv._row_canvases[3].top == 3
+
+    def test_scroll(self):
+        renderer = RowRenderer()
+        lv = ListView(10000000, renderer, overscan=2)
+        show_in_window(lv)
+
+        del renderer.rendered[:]
+        lv.scroll(1)
+        assert lv.get_top() == 1
+        assert renderer.rendered == [12]
+        assert lv._row_canvases[1].top == 0
+
+        del renderer.rendered[:]
+        lv.set_top(5000000)
+        assert sorted(renderer.rendered) == list(range(4999998, 5000012))
+        assert lv._row_canvases[5000000].top == 0
+        assert lv._row_canvases[5000000]._text == [b("row 5000000")]
+        assert len(lv._row_canvases) == 14
+        # row canvases are recycled
+        lv.set_top(7000000)
+        assert len(lv.canvas._childs) == 14
+
+        lv.set_top(20000000)
+        assert lv.get_top() == 10000000 - 10
+
+    def test_model(self):
+        model = ["first", "a very long row that doesn't fit"]
+        lv = ListView(model=model)
+        show_in_window(lv, width=10)
+        assert lv.get_row_count() == 2
+        assert lv._row_canvases[0]._text == [b("first")]
+        assert lv._row_canvases[1]._text == [b("a very lon")]
+        model[0] = "changed"
+        model.append("third")
+        lv.refresh()
+        assert lv.get_row_count() == 3
+        assert lv._row_canvases[0]._text == [b("changed")]
+        assert lv._row_canvases[2]._text == [b("third")]
+        assert len(list(lv.canvas.content())) == 10
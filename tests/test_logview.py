@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from gulib.compat import b
+from tests.test_listview import TestListView, show_in_window
+
+from utk import text_shaping
+from utk.constants import WRAP_CHAR, WRAP_WORD, WRAP_CLIP
+from utk.logview import LogView
+from utk.text_layout import calc_line_segments
+
+
+def write_log(path, text, mode="wb"):
+    with open(str(path), mode) as f:
+        f.write(b(text))
+
+
+class TestLogView(TestListView):
+
+    widget = LogView
+    default_name = "UtkLogView"
+
+    # rows come from the file
+    def test_render_visible_rows(self):
+        pass
+
+    def test_scroll(self):
+        pass
+
+    def test_model(self):
+        pass
+
+    def test_index(self, tmpdir):
+        path = tmpdir.join("log")
+        write_log(path, "".join("line %d\n" % i for i in range(1000)))
+        lv = LogView(str(path))
+        lv.index_chunk_size = 100
+        assert lv.get_row_count() == 0
+        assert lv.index_step()
+        assert not lv.is_indexed
+        assert 0 < lv.get_row_count() < 1000
+        lv.index_all()
+        assert lv.is_indexed
+        assert lv.get_row_count() == 1000
+        assert lv.get_line(0) == b("line 0")
+        assert lv.get_line(999) == b("line 999")
+        lv.close()
+
+    def test_large_offsets(self, tmpdir):
+        path = tmpdir.join("log")
+        write_log(path, "a\n")
+        lv = LogView(str(path))
+        lv.index_all()
+        # offsets past 4 GiB don't overflow
+        lv._offsets.append(2 ** 40)
+        assert lv._offsets[-1] == 2 ** 40
+        lv.close()
+
+    def test_render(self, tmpdir):
+        path = tmpdir.join("log")
+        write_log(path, "first\r\nsecond\ta very long line\nlast")
+        lv = LogView(str(path))
+        lv.index_all()
+        assert lv.get_row_count() == 3
+        show_in_window(lv, width=10)
+        assert lv._row_canvases[0]._text == [b("first")]
+        assert lv._row_canvases[1]._text == [b("second a v")]
+        assert lv._row_canvases[2]._text == [b("last")]
+        lv.close()
+        assert lv._row_canvases == {}
+
+    def test_follow(self, tmpdir):
+        path = tmpdir.join("log")
+        write_log(path, "".join("line %d\n" % i for i in range(20)))
+        lv = LogView(str(path), follow=True)
+        lv.index_all()
+        show_in_window(lv, height=5)
+        lv.set_top(lv.get_row_count())
+        assert lv.get_top() == 15
+
+        write_log(path, "line 20\nline 21\npartial", "ab")
+        lv.poll()
+        lv.index_all()
+        assert lv.get_row_count() == 23
+        assert lv.get_top() == 18
+        assert lv._row_canvases[22]._text == [b("partial")]
+
+        write_log(path, " line\n", "ab")
+        lv.poll()
+        lv.index_all()
+        assert lv.get_row_count() == 23
+        assert lv._row_canvases[22]._text == [b("partial line")]
+
+        write_log(path, "new\n")
+        lv.poll()
+        lv.index_all()
+        assert lv.get_row_count() == 1
+        assert lv.get_top() == 0
+        lv.close()
+
+    def test_wrap(self, tmpdir):
+        path = tmpdir.join("log")
+        write_log(path, "short\nthe quick brown fox jumps\n\tover\nlast one")
+        lv = LogView(str(path))
+        lv.index_all()
+        lv.set_wrap_mode(WRAP_WORD)
+        # not shaped until the width is known, a row each
+        assert lv.get_row_count() == 4
+        show_in_window(lv, width=10)
+        assert lv.get_row_count() == 6
+        assert lv.get_row_line(2) == (1, 1)
+        assert lv.get_line_row(3) == 5
+        assert [lv._row_canvases[i]._text[0] for i in range(6)] == [
+            b("short"), b("the quick"), b("brown fox"), b("jumps"),
+            b(" over"), b("last one")]
+        lv.set_wrap_mode(WRAP_CLIP)
+        assert lv.get_row_count() == 4
+        assert lv._row_canvases[1]._text == [b("the quick ")]
+        lv.close()
+
+    def test_wrap_progressive(self, tmpdir):
+        path = tmpdir.join("log")
+        write_log(path, "".join("%d %s\n" % (i, "word " * (i % 5))
+                                for i in range(200)))
+        lv = LogView(str(path))
+        lv.index_all()
+        lv.set_wrap_mode(WRAP_CHAR)
+        lv.shape_chunk_lines = 30
+        show_in_window(lv, width=10, height=5)
+        # the first screen was shaped when allocated
+        shaped = len(lv._line_widths)
+        assert 0 < shaped < 200
+        assert lv._row_canvases[0]._text == [b("0 ")]
+        rows = lv.get_row_count()
+        assert lv.shape_step()
+        assert len(lv._line_widths) > shaped
+        assert lv.get_row_count() > rows
+        lv.shape_all()
+        assert len(lv._line_widths) == 200
+        expected = sum(len(calc_line_segments(
+            b("%d %s" % (i, "word " * (i % 5))), 10, WRAP_CHAR))
+            for i in range(200))
+        assert lv.get_row_count() == expected
+        line, row = lv.get_row_line(expected - 1)
+        assert line == 199
+        lv.close()
+        assert lv.get_row_count() == 0
+
+    def test_wrap_follow(self, tmpdir):
+        path = tmpdir.join("log")
+        write_log(path, "one two three\npartial")
+        lv = LogView(str(path), follow=True)
+        lv.set_wrap_mode(WRAP_WORD)
+        lv.index_all()
+        show_in_window(lv, width=8, height=5)
+        lv.shape_all()
+        assert lv.get_row_count() == 3
+        write_log(path, " line grows\n", "ab")
+        lv.poll()
+        lv.index_all()
+        lv.shape_all()
+        # partial line grows -> "partial line grows" wraps in 3 rows
+        assert lv.get_row_count() == 5
+        assert lv._row_canvases[4]._text == [b("grows")]
+        lv.close()
+
+    def test_wrap_executor(self, tmpdir):
+        futures = pytest.importorskip("concurrent.futures")
+        path = tmpdir.join("log")
+        text = "".join("line %d %s\n" % (i, "x" * (i % 30)) for i in range(500))
+        write_log(path, text)
+        executor = futures.ProcessPoolExecutor(2)
+        text_shaping.set_executor(executor)
+        try:
+            lv = LogView(str(path))
+            lv.index_all()
+            lv.set_wrap_mode(WRAP_CHAR)
+            lv.shape_chunk_lines = 64
+            show_in_window(lv, width=12, height=4)
+            lv.shape_all()
+        finally:
+            text_shaping.set_executor(None)
+            executor.shutdown()
+        expected = sum(len(calc_line_segments(b(line), 12, WRAP_CHAR))
+                       for line in text.splitlines())
+        assert lv.get_row_count() == expected
+        lv.close()
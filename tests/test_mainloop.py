@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+import utk
+from utk import mainloop
+from utk.mainloop import GulibLoop, get_backend, set_backend
+from utk.constants import PRIORITY_RESIZE, PRIORITY_REDRAW, PRIORITY_IDLE
+from utk.headless_display import Screen
+from utk.screen import get_default_screen, set_default_screen
+from utk.label import Label
+from utk.window import Window
+
+asyncio = pytest.importorskip("asyncio")
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def backend(loop):
+    old_backend = get_backend()
+    backend = mainloop.AsyncioLoop(loop)
+    set_backend(backend)
+    yield backend
+    set_backend(old_backend)
+
+
+@pytest.fixture
+def screen():
+    old_screen = get_default_screen()
+    screen = Screen(20, 4)
+    set_default_screen(screen)
+    yield screen
+    if screen.started:
+        screen.stop()
+    set_default_screen(old_screen)
+
+
+class PipeScreen(object):
+    # the parts of a screen AsyncioLoop uses to read input
+
+    def __init__(self):
+        self.rd, self.wr = os.pipe()
+        self.started = True
+        self.timeout = None
+        self.events = []
+
+    def close(self):
+        os.close(self.rd)
+        os.close(self.wr)
+
+    def get_input_descriptors(self):
+        return [self.rd]
+
+    def get_input_nonblocking(self):
+        data = os.read(self.rd, 100)
+        keys = [chr(c) for c in bytearray(data)]
+        return self.timeout, keys, list(bytearray(data))
+
+    def dispatch_events(self, events):
+        self.events.extend(events)
+        return []
+
+
+def test_default_backend():
+    assert isinstance(get_backend(), GulibLoop)
+
+
+def test_gulib_backend_idle_add(monkeypatch):
+    calls = []
+    monkeypatch.setattr(mainloop.gulib, "idle_add",
+                        lambda callback, priority: calls.append(priority) or 7)
+    assert mainloop.idle_add(lambda: False, priority=PRIORITY_REDRAW) == 7
+    assert mainloop.idle_add(lambda: False) == 7
+    assert calls == [PRIORITY_REDRAW, PRIORITY_IDLE]
+
+
+def test_idle_priority_order(backend, loop):
+    calls = []
+    backend.idle_add(lambda: calls.append("idle"))
+    backend.idle_add(lambda: calls.append("redraw"), PRIORITY_REDRAW)
+    backend.idle_add(lambda: calls.append("resize"), PRIORITY_RESIZE)
+    backend.idle_add(lambda: calls.append("redraw2"), PRIORITY_REDRAW)
+    mainloop.run_pending()
+    assert calls == ["resize", "redraw", "redraw2", "idle"]
+
+
+def test_idle_repeats_while_true(backend, loop):
+    calls = []
+
+    def idle():
+        calls.append(len(calls))
+        return len(calls) < 3
+
+    assert backend.idle_add(idle) != backend.idle_add(lambda: False)
+    backend.run_pending()
+    assert calls == [0, 1, 2]
+
+
+def test_idle_added_from_idle(backend, loop):
+    calls = []
+
+    def first():
+        calls.append("first")
+        backend.idle_add(lambda: calls.append("resize"), PRIORITY_RESIZE)
+
+    backend.idle_add(first, PRIORITY_REDRAW)
+    backend.idle_add(lambda: calls.append("idle"))
+    backend.run_pending()
+    assert calls == ["first", "resize", "idle"]
+
+
+def test_run_pending_without_idles(backend, loop):
+    backend.run_pending()
+    assert not loop.is_running()
+
+
+def test_timeout_repeats_while_true(backend, loop):
+    calls = []
+
+    def timeout():
+        calls.append(1)
+        if len(calls) == 3:
+            loop.stop()
+            return False
+        return True
+
+    mainloop.timeout_add_seconds(0.001, timeout)
+    loop.run_forever()
+    assert len(calls) == 3
+
+
+def test_widgets_draw(backend, screen):
+    window = Window()
+    window.add(Label("hello"))
+    window.show_all()
+    assert screen.frames_written == 0
+    mainloop.run_pending()
+    assert screen.frames_written == 1
+    assert b"hello" in screen.get_text()[0]
+
+
+def test_watch_screen_input(backend, loop):
+    screen = PipeScreen()
+    try:
+        backend.watch_screen(screen)
+        backend.watch_screen(screen)
+        os.write(screen.wr, b"ab")
+        loop.call_later(0.05, loop.stop)
+        loop.run_forever()
+        assert [e.key for e in screen.events] == ["a", "b"]
+        backend.unwatch_screen(screen)
+        os.write(screen.wr, b"c")
+        loop.call_later(0.05, loop.stop)
+        loop.run_forever()
+        assert len(screen.events) == 2
+    finally:
+        screen.close()
+
+
+def test_watch_screen_input_timeout(backend, loop):
+    screen = PipeScreen()
+    calls = []
+    read = screen.get_input_nonblocking
+
+    def get_input_nonblocking():
+        calls.append(1)
+        if len(calls) == 1:
+            return read()
+        return None, [], []
+
+    screen.get_input_nonblocking = get_input_nonblocking
+    screen.timeout = 0.01
+    try:
+        backend.watch_screen(screen)
+        os.write(screen.wr, b"\x1b")
+        loop.call_later(0.1, loop.stop)
+        loop.run_forever()
+        # read the input and again after the timeout
+        assert len(calls) == 2
+    finally:
+        backend.unwatch_screen(screen)
+        screen.close()
+
+
+def test_watch_screen_input_closed(backend, loop):
+    screen = PipeScreen()
+    calls = []
+    read = screen.get_input_nonblocking
+
+    def get_input_nonblocking():
+        calls.append(1)
+        return read()
+
+    screen.get_input_nonblocking = get_input_nonblocking
+    os.write(screen.wr, b"a")
+    os.close(screen.wr)
+    try:
+        backend.watch_screen(screen)
+        utk.main_loops.append(backend)
+        # returns when the end of the input is read
+        loop.call_later(5, loop.stop)
+        backend.run()
+        assert [e.key for e in screen.events] == ["a"]
+        assert len(calls) == 2
+        assert not utk.main_loops
+        assert screen not in backend._screens
+    finally:
+        del utk.main_loops[:]
+        os.close(screen.rd)
+
+
+def test_watch_screen_other_input(backend, loop):
+    screen = PipeScreen()
+    # like the resize pipe, readable but the screen returns no keys
+    other_rd, other_wr = os.pipe()
+    read = screen.get_input_nonblocking
+
+    def get_input_nonblocking():
+        os.read(other_rd, 100)
+        return None, [], []
+
+    screen.get_input_descriptors = lambda: [screen.rd, other_rd]
+    screen.get_input_nonblocking = get_input_nonblocking
+    try:
+        backend.watch_screen(screen)
+        utk.main_loops.append(backend)
+        os.write(other_wr, b"R")
+        loop.call_later(0.05, loop.stop)
+        loop.run_forever()
+        assert backend in utk.main_loops
+        assert screen in backend._screens
+        screen.get_input_nonblocking = read
+        os.write(screen.wr, b"a")
+        loop.call_later(0.05, loop.stop)
+        loop.run_forever()
+        assert [e.key for e in screen.events] == ["a"]
+    finally:
+        del utk.main_loops[:]
+        backend.unwatch_screen(screen)
+        screen.close()
+        os.close(other_rd)
+        os.close(other_wr)
+
+
+def test_main_blocking(backend, loop, screen):
+    screen.start()
+    backend.idle_add(utk.main_quit)
+    assert utk.main() is None
+    assert not utk.main_loops
+    assert not screen.started
+
+
+def test_main_in_running_loop(backend, loop, screen):
+    screen.start()
+    window = Window()
+    window.add(Label("async"))
+    window.show_all()
+    result = []
+
+    def quit():
+        result.append(screen.get_text()[0])
+        utk.main_quit()
+
+    def application():
+        # an asyncio application starting utk from a callback
+        future = utk.main()
+        assert future is not None
+        future.add_done_callback(lambda f: loop.stop())
+        loop.call_later(0.01, quit)
+
+    loop.call_soon(application)
+    loop.run_forever()
+    assert b"async" in result[0]
+    assert not utk.main_loops
+    assert not screen.started
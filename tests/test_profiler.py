@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from utk import profiler as profiler_module
+from utk.profiler import (
+    FrameProfiler, ProfilerHook, PHASES, get_profiler, set_profiler,
+)
+from utk.profiler_view import ProfilerView
+from utk.headless_display import Screen
+from utk.screen import get_default_screen, set_default_screen
+from utk.label import Label
+from utk.window import Window
+
+
+class FakeTime(object):
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(profiler_module.time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def screen():
+    old_screen = get_default_screen()
+    screen = Screen(40, 10)
+    set_default_screen(screen)
+    yield screen
+    set_profiler(None)
+    set_default_screen(old_screen)
+
+
+class TestFrameProfiler(object):
+
+    def test_frame(self, fake_time):
+        profiler = FrameProfiler()
+        profiler.begin("layout")
+        fake_time.now += 1
+        profiler.end("layout")
+        for phase in ("compose", "encode", "write"):
+            profiler.begin(phase)
+            fake_time.now += 0.5
+            profiler.end(phase)
+        profiler.frame_done()
+        assert len(profiler) == 1
+        assert profiler.last() == (100.0, 1.0, 0.5, 0.5, 0.5, 2.5)
+        profiler.frame_done()
+        assert profiler.last() == (102.5, 0, 0, 0, 0, 0)
+
+    def test_nested(self, fake_time):
+        profiler = FrameProfiler()
+        profiler.begin("layout")
+        fake_time.now += 1
+        profiler.begin("layout")
+        fake_time.now += 1
+        profiler.end("layout")
+        profiler.end("layout")
+        profiler.frame_done()
+        assert profiler.last().layout == 2
+
+    def test_size(self):
+        profiler = FrameProfiler(size=5)
+        for i in range(8):
+            profiler.frame_done()
+        assert len(profiler) == 5
+        assert profiler.count == 8
+        profiler.clear()
+        assert profiler.records() == []
+        assert profiler.last() is None
+
+    def test_listener(self):
+        profiler = FrameProfiler()
+        records = []
+        profiler.add_listener(records.append)
+        profiler.frame_done()
+        profiler.remove_listener(records.append)
+        profiler.frame_done()
+        assert records == profiler.records()[:1]
+
+    def test_format(self, fake_time):
+        profiler = FrameProfiler()
+        assert profiler.format() == "no frames"
+        profiler.begin("compose")
+        fake_time.now += 0.002
+        profiler.end("compose")
+        profiler.frame_done()
+        assert profiler.percentiles()["compose"][95] == pytest.approx(0.002)
+        assert profiler.format() == ("1 frames, p50 ms: layout 0.0, "
+                                     "compose 2.0, encode 0.0, write 0.0, "
+                                     "total 2.0")
+
+
+class RecordingHook(ProfilerHook):
+
+    def __init__(self):
+        self.calls = []
+
+    def begin(self, phase):
+        self.calls.append(("begin", phase))
+
+    def end(self, phase):
+        self.calls.append(("end", phase))
+
+    def frame_done(self):
+        self.calls.append(("frame",))
+
+
+def test_screen_phases(screen):
+    win = Window()
+    label = Label("hello")
+    win.add(label)
+    label.show()
+    win.show()
+
+    hook = RecordingHook()
+    set_profiler(hook)
+    assert get_profiler() is hook
+    label.set_text("hello world")
+    win.check_resize()
+    screen.draw_screen()
+    assert hook.calls == [("begin", "layout"), ("end", "layout"),
+                          ("begin", "compose"), ("end", "compose"),
+                          ("begin", "encode"), ("end", "encode"),
+                          ("begin", "write"), ("end", "write"),
+                          ("frame",)]
+
+
+class BrokenCanvas(object):
+
+    cursor = None
+
+    def content(self):
+        raise ValueError("broken")
+        yield
+
+
+def test_screen_compose_error(screen):
+    win = Window()
+    win.show()
+    hook = RecordingHook()
+    set_profiler(hook)
+    screen.get_topcanvas = BrokenCanvas
+    with pytest.raises(ValueError):
+        screen.draw_screen()
+    del screen.get_topcanvas
+    # the compose phase ended anyway
+    assert hook.calls == [("begin", "compose"), ("end", "compose")]
+
+
+def test_profiler_view(screen):
+    profiler = FrameProfiler()
+    set_profiler(profiler)
+    view = ProfilerView(profiler, interval=None)
+    assert view.get_text().splitlines()[0] == "frames 0 (p50 ms)"
+    assert view.get_text().splitlines()[1].split() == ["layout", "-"]
+
+    win = Window()
+    win.add(view)
+    view.show()
+    win.show()
+    screen.draw_screen()
+    view.refresh()
+    lines = view.get_text().splitlines()
+    assert lines[0] == "frames 1 (p50 ms)"
+    assert [line.split()[0] for line in lines[1:]] == \
+        list(PHASES) + ["total"]
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import os
+import signal
+import tty
+
+import pytest
+from gulib.compat import b
+
+from utk import mainloop
+from utk.raw_display import Screen
+
+
+@pytest.fixture
+def screen():
+    # read the input from a pipe instead of a terminal, without start()
+    # changing the terminal modes
+    rd, wr = os.pipe()
+    screen = Screen()
+    screen._term_input_file = os.fdopen(rd, "rb", 0)
+    screen.set_input_timeouts(max_wait=0)
+    screen._input_iter = screen._run_input_iter()
+    screen._started = True
+    yield screen, wr
+    screen._started = False
+    screen._term_input_file.close()
+    os.close(wr)
+    os.close(screen._resize_pipe_rd)
+    os.close(screen._resize_pipe_wr)
+
+
+def test_get_input(screen):
+    screen, wr = screen
+    os.write(wr, b("a\x1b[A"))
+    assert screen.get_input(raw_keys=True) == (['a', 'up'], [97, 27, 91, 65])
+    # nothing pending, max_wait is 0
+    assert screen.get_input() == []
+    os.write(wr, b("\t"))
+    assert screen.get_input() == ['tab']
+
+
+def test_resize_asyncio():
+    asyncio = pytest.importorskip("asyncio")
+    # a pty so the terminal size can be read after the resize
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    screen = Screen()
+    screen._term_input_file = os.fdopen(slave, "rb", 0)
+    screen.set_input_timeouts(max_wait=0)
+    screen._input_iter = screen._run_input_iter()
+    screen._started = True
+    events = []
+    screen.dispatch_events = events.extend
+    loop = asyncio.new_event_loop()
+    backend = mainloop.AsyncioLoop(loop)
+    try:
+        backend.watch_screen(screen)
+        screen._sigwinch_handler(signal.SIGWINCH, None)
+        loop.call_later(0.05, loop.stop)
+        loop.run_forever()
+        assert [e.key for e in events] == ['window resize']
+        # the resize pipe emptied isn't taken as the input closed
+        assert screen in backend._screens
+        os.write(master, b("a"))
+        loop.call_later(0.05, loop.stop)
+        loop.run_forever()
+        assert [e.key for e in events] == ['window resize', 'a']
+    finally:
+        backend.unwatch_screen(screen)
+        loop.close()
+        screen._started = False
+        screen._term_input_file.close()
+        os.close(master)
+        os.close(screen._resize_pipe_rd)
+        os.close(screen._resize_pipe_wr)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+
+import pytest
+from gulib.compat import b
+
+from utk import recording
+from utk.recording import (
+    Recorder, RecordingError, load_recording, replay,
+    INPUT, OUTPUT, FRAME, RESIZE,
+)
+from utk.constants import EVENT_KEY, EVENT_RESIZE
+from utk.headless_display import Screen
+from utk.mainloop import run_pending
+from utk.screen import get_default_screen, set_default_screen
+from utk.label import Label
+from utk.window import Window
+
+
+def setup_app(screen, prefix="key"):
+    win = Window()
+    label = Label("start")
+    win.add(label)
+    label.show()
+    win.show()
+
+    def on_key(event):
+        label.set_text("%s %s" % (prefix, event.key))
+        return True
+
+    screen.add_event_handler(EVENT_KEY, on_key)
+
+
+def record_session(filename, inputs, resize=None):
+    old_screen = get_default_screen()
+    screen = Screen(30, 5)
+    set_default_screen(screen)
+    try:
+        screen.start()
+        screen.start_recording(filename)
+        setup_app(screen)
+        run_pending()
+        for data in inputs:
+            screen.feed_data(data)
+            screen.process_input()
+            run_pending()
+        if resize is not None:
+            screen.set_cols_rows(*resize)
+            screen.process_input()
+            run_pending()
+        screen.stop()
+    finally:
+        set_default_screen(old_screen)
+    return screen
+
+
+def test_recorder(tmpdir):
+    filename = str(tmpdir.join("session.utkrec"))
+    recorder = Recorder(filename, 80, 24)
+    recorder.record_input(b("a"), timestamp=1.0)
+    recorder.output("before")
+    recorder.begin_frame()
+    recorder.output(b("frame "))
+    recorder.output("data")
+    recorder.flush_output(timestamp=2.0)
+    recorder.record_resize(100, 30, timestamp=3.0)
+    recorder.output(b("after"))
+    recorder.close()
+    cols, rows, entries = load_recording(filename)
+    assert (cols, rows) == (80, 24)
+    assert [(e.kind, e.data) for e in entries] == [
+        (INPUT, b("a")), (OUTPUT, b("before")), (FRAME, b("frame data")),
+        (RESIZE, recording._HEADER.pack(100, 30)), (OUTPUT, b("after"))]
+    assert [e.timestamp for e in entries[2:4]] == [2.0, 3.0]
+
+
+def test_load_invalid(tmpdir):
+    filename = str(tmpdir.join("invalid"))
+    with gzip.open(filename, "wb") as f:
+        f.write(b("not a recording"))
+    with pytest.raises(RecordingError):
+        load_recording(filename)
+    with gzip.open(filename, "wb") as f:
+        f.write(recording.MAGIC + recording._HEADER.pack(1, 1) + b("\x01"))
+    with pytest.raises(RecordingError):
+        load_recording(filename)
+
+
+def test_record(tmpdir):
+    filename = str(tmpdir.join("session.utkrec"))
+    screen = record_session(filename, ["a", "b\x1b[A"])
+    assert screen._recorder is None
+    cols, rows, entries = load_recording(filename)
+    assert (cols, rows) == (30, 5)
+    inputs = [e.data for e in entries if e.kind == INPUT]
+    assert inputs == [b("a"), b("b\x1b[A")]
+    frames = [e for e in entries if e.kind == FRAME]
+    assert len(frames) == 3
+    assert b("key up") in frames[-1].data
+
+
+def test_replay(tmpdir):
+    filename = str(tmpdir.join("session.utkrec"))
+    record_session(filename, ["a", "xy", "\x1b[200~paste\x1b[201~", "z"])
+    screen = replay(filename, setup_app)
+    assert not screen.has_input()
+    assert len(screen.frames) == len(screen.recorded_frames) == 4
+    assert screen.mismatched_frames() == []
+    assert b("key z") in screen.frames[-1]
+
+    screen = replay(filename, lambda s: setup_app(s, prefix="other"))
+    assert screen.mismatched_frames() == [1, 2, 3]
+
+
+def test_replay_resize(tmpdir):
+    filename = str(tmpdir.join("session.utkrec"))
+    record_session(filename, ["a"], resize=(40, 8))
+    cols, rows, entries = load_recording(filename)
+    assert [e.kind for e in entries if e.kind != FRAME] == [INPUT, RESIZE]
+
+    kinds = []
+
+    def setup(screen):
+        for kind in (EVENT_KEY, EVENT_RESIZE):
+            screen.add_event_handler(kind, lambda event: kinds.append(
+                event.kind))
+
+    screen = replay(filename, setup)
+    assert screen.get_cols_rows() == (40, 8)
+    assert kinds == [EVENT_KEY, EVENT_RESIZE]
+
+
+def test_main_info(tmpdir, capsys):
+    filename = str(tmpdir.join("session.utkrec"))
+    record_session(filename, ["a"])
+    assert recording.main(["info", filename]) == 0
+    out = capsys.readouterr()[0]
+    assert out.startswith("screen 30x5\n")
+    assert "input       1 entries" in out
+    assert recording.main(["bogus"]) == 2
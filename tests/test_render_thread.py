@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pytest
+from gulib.compat import b
+
+from utk.render_thread import RenderThread
+from utk.headless_display import Screen
+from utk.screen import get_default_screen, set_default_screen
+from utk.label import Label
+from utk.window import Window
+
+
+@pytest.fixture
+def screen():
+    old_screen = get_default_screen()
+    screen = Screen(40, 5)
+    set_default_screen(screen)
+    yield screen
+    if screen.started:
+        screen.stop()
+    set_default_screen(old_screen)
+
+
+def show_label(text):
+    win = Window()
+    label = Label(text)
+    win.add(label)
+    win.show_all()
+    return win, label
+
+
+class BlockedRender(object):
+
+    def __init__(self):
+        self.frames = []
+        self.threads = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, frame):
+        self.threads.append(threading.current_thread())
+        self.started.set()
+        self.release.wait(5)
+        self.frames.append(frame)
+
+
+def test_render_thread():
+    render = BlockedRender()
+    rt = RenderThread(render)
+    rt.start()
+    assert rt.is_running
+    with pytest.raises(Warning):
+        rt.start()
+    rt.publish(1)
+    assert render.started.wait(5)
+    # the render thread is busy, 3 replaces 2
+    rt.publish(2)
+    rt.publish(3)
+    assert not rt.wait_idle(0.01)
+    render.release.set()
+    assert rt.wait_idle(5)
+    assert render.frames == [1, 3]
+    assert rt.rendered == 2
+    assert rt.dropped == 1
+    assert render.threads[0] is not threading.current_thread()
+    rt.stop()
+    assert not rt.is_running
+    rt.stop()
+
+
+def test_render_thread_stop_renders_pending():
+    render = BlockedRender()
+    rt = RenderThread(render)
+    rt.start()
+    rt.publish(1)
+    assert render.started.wait(5)
+    rt.publish(2)
+    render.release.set()
+    rt.stop()
+    assert render.frames == [1, 2]
+
+
+def test_render_thread_error():
+    frames = []
+
+    def render(frame):
+        if frame == 1:
+            raise ValueError(frame)
+        frames.append(frame)
+
+    rt = RenderThread(render)
+    rt.start()
+    rt.publish(1)
+    assert rt.wait_idle(5)
+    rt.publish(2)
+    rt.stop()
+    assert frames == [2]
+
+
+def test_threaded_render_same_output(screen):
+    win, label = show_label("hello\nworld")
+    screen.draw_screen()
+    text = screen.get_text()
+    bytes_written = screen.bytes_written
+
+    screen.set_threaded_render(True)
+    assert screen.threaded_render
+    screen.clear()
+    screen.reset_counters()
+    screen.draw_screen()
+    assert screen.wait_rendered(5)
+    assert screen.get_text() == text
+    assert screen.bytes_written == bytes_written
+    assert screen.frames_written == 1
+
+
+def test_threaded_render_lifecycle(screen):
+    screen.set_threaded_render(True)
+    assert screen._render_thread is None
+    win, label = show_label("hello")
+    assert screen.started
+    assert screen._render_thread.is_running
+    label.set_text("bye")
+    screen.draw_screen()
+    rt = screen._render_thread
+    screen.stop()
+    # the last frame was written before stopping
+    assert not rt.is_running
+    assert screen._render_thread is None
+    assert rt.rendered == 1
+    screen.start()
+    assert screen._render_thread.is_running
+    screen.set_threaded_render(False)
+    assert screen._render_thread is None
+    assert screen.wait_rendered()
+
+
+def test_threaded_render_latency(screen):
+    screen.set_threaded_render(True)
+    win, label = show_label("hello")
+    screen.input_received(10.0)
+    label.set_text("bye")
+    screen.draw_screen()
+    assert screen.wait_rendered(5)
+    assert screen.get_text()[0].startswith(b("bye"))
+    assert screen.latency.count == 1
+
+
+def test_threaded_render_resize_during_frame(screen):
+    screen.set_threaded_render(True)
+    win, label = show_label("hello\nworld")
+    screen.draw_screen()
+    assert screen.wait_rendered(5)
+
+    # block the render thread in the middle of writing a frame
+    writing = threading.Event()
+    release = threading.Event()
+    write = screen.write
+
+    def blocking_write(data):
+        if not writing.is_set():
+            writing.set()
+            release.wait(5)
+        write(data)
+
+    screen.write = blocking_write
+    label.set_text("hello\nthere")
+    screen.draw_screen()
+    assert writing.wait(5)
+    # a resize (SIGWINCH on a terminal) while the frame is written
+    screen.set_cols_rows(40, 6)
+    release.set()
+    assert screen.wait_rendered(5)
+    del screen.write
+    assert screen.get_text()[1].startswith(b("there"))
+
+    # the buffer of that frame isn't the one the next frame is diffed
+    # against, the next frame repaints everything
+    frames = []
+    write_frame = screen._write_frame
+
+    def recording_write_frame(frame, profiler):
+        frames.append(screen._screen_buf_clears == screen._clears)
+        write_frame(frame, profiler)
+
+    screen._write_frame = recording_write_frame
+    for i in range(2):
+        screen.draw_screen()
+        assert screen.wait_rendered(5)
+    assert frames == [False, True]
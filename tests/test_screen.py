@@ -9,6 +9,9 @@ from utk.screen import (
     AttrSpec, AttrSpecError,
     BaseScreen,
 )
+from utk.event import make_events
+from utk.canvas import SolidCanvas
+from utk.constants import EVENT_KEY, EVENT_MOUSE
 
 def test_value_lookup_table():
     r = _value_lookup_table([0, 7, 9], 10)
@@ -117,6 +120,14 @@ class FakeBaseScreen(BaseScreen):
         return 80, 24
 
 
+class FakeToplevel(object):
+
+    def __init__(self, *area):
+        self.is_mapped = True
+        self.canvas = SolidCanvas("x", None, *area)
+        self.canvas.show()
+
+
 class TestBaseScreen(object):
 
     def test_start_signal(self):
@@ -164,3 +175,101 @@ class TestBaseScreen(object):
         bs.connect("draw-screen", on_draw_screen)
         bs.draw_screen()
         assert on_draw_screen.called
+
+    def test_draw_screen_idle_stopped(self):
+        bs = FakeBaseScreen()
+        on_draw_screen = SignalEmitCallback("draw-screen")
+        bs.connect("draw-screen", on_draw_screen)
+        assert bs.draw_screen_idle() is False
+        assert not on_draw_screen.called
+        bs.start()
+        bs.draw_screen_idle()
+        assert on_draw_screen.called
+
+    def test_get_events(self):
+        bs = FakeBaseScreen()
+        bs.get_input = lambda raw_keys=False: ['a', ('mouse press', 1, 2, 3)]
+        events = bs.get_events()
+        assert [e.kind for e in events] == [EVENT_KEY, EVENT_MOUSE]
+        assert events[0].timestamp is not None
+        assert events[0].timestamp == events[1].timestamp
+
+    def test_dispatch_events(self):
+        bs = FakeBaseScreen()
+        keys = []
+        bs.add_event_handler(EVENT_KEY, lambda e: keys.append(e.key))
+        bs.add_event_handler(EVENT_KEY, lambda e: e.key == 'b')
+        events = make_events(['a', 'b', ('mouse press', 1, 2, 3)])
+        unhandled = bs.dispatch_events(events)
+        assert keys == ['a', 'b']
+        assert unhandled == [events[0], events[2]]
+
+    def test_remove_event_handler(self):
+        bs = FakeBaseScreen()
+        keys = []
+        def handler(event):
+            keys.append(event.key)
+            bs.remove_event_handler(EVENT_KEY, handler)
+        bs.add_event_handler(EVENT_KEY, handler)
+        bs.dispatch_events(make_events(['a', 'b']))
+        assert keys == ['a']
+
+    def test_latency(self):
+        bs = FakeBaseScreen()
+        # input without damage is not recorded
+        bs.input_received(1.0)
+        bs.input_received(2.0)
+        bs.queue_draw()
+        bs._draw_start = 3.0
+        bs.frame_written(3.5, 4.0)
+        assert bs.latency.samples() == [(1.0, 0.5, 0.5, 2.0)]
+        bs.frame_written(5.0, 6.0)
+        assert len(bs.latency) == 1
+
+    def test_get_input_default(self):
+        bs = FakeBaseScreen()
+        assert bs.get_input() == []
+        assert bs.get_input(raw_keys=True) == ([], [])
+        assert bs.get_events() == []
+
+    def test_latency_input_without_redraw(self):
+        bs = FakeBaseScreen()
+        bs.input_received(1.0)
+        # the input handled queues no redraw
+        bs.dispatch_events(make_events(['a'], 1.0))
+        # a redraw from a timer afterwards
+        bs.queue_draw()
+        bs._draw_start = 3.0
+        bs.frame_written(3.5, 4.0)
+        assert len(bs.latency) == 0
+        bs.input_received(5.0)
+        bs.input_handled()
+        bs.queue_draw()
+        bs.frame_written(6.0, 6.5)
+        assert len(bs.latency) == 0
+
+    def test_topcanvas(self):
+        bs = FakeBaseScreen()
+        dashboard = FakeToplevel(0, 0, 80, 24)
+        dialog = FakeToplevel(20, 5, 40, 10)
+        bs.add_toplevel(dashboard)
+        bs.add_toplevel(dialog)
+        root = bs.get_topcanvas()
+        assert root._childs == [dashboard.canvas, dialog.canvas]
+        assert root._get_exposed_childs() == [dashboard.canvas, dialog.canvas]
+        bs.raise_toplevel(dashboard)
+        assert bs.get_topcanvas() is root
+        assert root._childs == [dialog.canvas, dashboard.canvas]
+        # the dialog is covered by the dashboard
+        assert root._get_exposed_childs() == [dashboard.canvas]
+        dashboard.is_mapped = False
+        assert bs.get_topcanvas()._childs == [dialog.canvas]
+
+
+def test_color_tables_built_on_use():
+    from utk import screen
+    screen._build_color_tables()
+    assert screen._COLOR_VALUES_256[16] == (0, 0, 0)
+    assert len(screen._COLOR_VALUES_88) == 88
+    assert AttrSpec('#fff', 'default', 256).get_rgb_values()[:3] == \
+        (255, 255, 255)
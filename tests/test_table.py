@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+from gulib.compat import b
+from tests.test_listview import TestListView, show_in_window
+
+from utk.table import Table
+from utk.utils import Requisition
+
+
+class CellRenderer(object):
+
+    def __init__(self):
+        self.rendered = set()
+
+    def __call__(self, row, column):
+        self.rendered.add((row, column))
+        return "%d.%d" % (row, column)
+
+
+class TestTable(TestListView):
+
+    widget = Table
+    default_name = "UtkTable"
+
+    # rows are rendered from cells
+    def test_render_visible_rows(self):
+        pass
+
+    def test_scroll(self):
+        pass
+
+    def test_model(self):
+        pass
+
+    def test_layout(self):
+        model = [["a", "bb", "c"], ["dddd", "e", "f"]]
+        t = Table(model=model, header=[["x", "y", "zzz"]])
+        assert t.get_columns() == 3
+        assert t.get_column_widths() == [4, 2, 3]
+        assert t.size_request() == Requisition(11, 2)
+        show_in_window(t, width=20, height=5)
+        assert t._header_canvases[0]._text == [b("x    y  zzz")]
+        assert t._row_canvases[0]._text == [b("a    bb c  ")]
+        assert t._row_canvases[0].top == 1
+        assert t._row_canvases[1]._text == [b("dddd e  f  ")]
+
+    def test_lazy_cells(self):
+        renderer = CellRenderer()
+        t = Table(3, 100000, renderer, header=[["one", "two", "three"]],
+                  sample_size=10)
+        # sampling measures 10 rows
+        assert len(renderer.rendered) == 30
+        assert t.get_column_widths() == [7, 7, 7]
+        renderer.rendered.clear()
+        show_in_window(t, width=10, height=6)
+        # 5 visible rows plus overscan, only the columns that fit
+        assert renderer.rendered == set((r, c) for r in range(7)
+                                        for c in range(2))
+        t.set_top(50000)
+        assert t._row_canvases[50000]._text == [b("50000.0 50")]
+        assert t._row_canvases[50000].top == 1
+        assert t._header_canvases[0].top == 0
+
+    def test_width_grows(self):
+        model = [["a"]] * 200 + [["a longer cell"]]
+        t = Table(model=model, sample_size=10)
+        assert t.get_column_widths() == [1]
+        show_in_window(t, width=20, height=5)
+        t.set_top(196)
+        assert t.get_column_widths() == [13]
+        assert t._row_canvases[196]._text == [b("a            ")]
+
+    def test_fixed_width(self):
+        t = Table(model=[["abcdef", "g"]])
+        t.set_column_width(0, 3)
+        assert t.get_column_widths() == [3, 1]
+        show_in_window(t)
+        assert t._row_canvases[0]._text == [b("abc g")]
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+from gulib.compat import b
+
+from utk import text_buffer
+from utk.text_buffer import TextBuffer
+
+
+@pytest.fixture
+def small_leaves(monkeypatch):
+    monkeypatch.setattr(text_buffer, "LEAF_SIZE", 8)
+
+
+def test_empty():
+    buf = TextBuffer()
+    assert len(buf) == 0
+    assert buf.line_count == 1
+    assert buf.get_line(0) == b("")
+    assert buf.offset_to_line_col(0) == (0, 0)
+
+
+def test_lines(small_leaves):
+    text = b("".join("line %d\n" % i for i in range(100)))
+    buf = TextBuffer(text)
+    assert buf.get_text() == text
+    assert buf.line_count == 101
+    assert buf.get_line(42) == b("line 42")
+    assert buf.get_line(100) == b("")
+    assert buf.line_start(10) == text.index(b("line 10"))
+    offset = text.index(b("line 57")) + 3
+    assert buf.offset_to_line_col(offset) == (57, 3)
+    assert buf.line_col_to_offset(57, 3) == offset
+    assert buf.line_col_to_offset(57, 100) == offset + 4
+    assert buf.get_text(5, 13) == text[5:13]
+
+
+def test_edits(small_leaves):
+    rnd = random.Random(1)
+    text = b("")
+    buf = TextBuffer()
+    for i in range(2000):
+        if text and rnd.random() < 0.4:
+            start = rnd.randrange(len(text))
+            end = min(len(text), start + rnd.randrange(1, 20))
+            buf.delete(start, end)
+            text = text[:start] + text[end:]
+        else:
+            offset = rnd.randint(0, len(text))
+            new = b(rnd.choice(["a", "bc\n", "\n", "defgh ijk", "\nx\ny"]))
+            buf.insert(offset, new)
+            text = text[:offset] + new + text[offset:]
+    assert buf.get_text() == text
+    assert buf.line_count == text.count(b("\n")) + 1
+    lines = text.split(b("\n"))
+    for i in range(0, len(lines), 7):
+        assert buf.get_line(i) == lines[i]
+    # the tree stays balanced
+    assert buf._root.height <= 2 * (len(text) // 8 + 1).bit_length() + 2
+
+
+def test_large():
+    text = b("x" * 79 + "\n") * 100000
+    buf = TextBuffer(text)
+    assert buf.line_count == 100001
+    buf.insert(4000000, b("hello\n"))
+    assert buf.get_line(50000) == b("hello")
+    assert buf.get_line(50001) == b("x" * 79)
+    assert buf.offset_to_line_col(4000003) == (50000, 3)
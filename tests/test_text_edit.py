@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from gulib.compat import b
+from tests.test_listview import TestListView, show_in_window
+
+from utk import str_util, utils
+from utk.text_edit import TextEdit
+
+
+@pytest.fixture
+def utf8():
+    old = str_util.get_byte_encoding(), utils._target_encoding
+    utils.set_encoding("utf-8")
+    yield
+    str_util._byte_encoding, utils._target_encoding = old
+
+
+class TestTextEdit(TestListView):
+
+    widget = TextEdit
+    default_name = "UtkTextEdit"
+
+    # rows come from the buffer
+    def test_render_visible_rows(self):
+        pass
+
+    def test_scroll(self):
+        pass
+
+    def test_model(self):
+        pass
+
+    def test_edit(self):
+        te = TextEdit("one\ntwo\nthree")
+        assert te.get_row_count() == 3
+        te.keypress('down')
+        te.keypress('end')
+        assert te.get_cursor_position() == (1, 3)
+        for key in "!!":
+            assert te.keypress(key)
+        te.keypress('backspace')
+        assert te.get_text() == b("one\ntwo!\nthree")
+        te.keypress('enter')
+        assert te.get_row_count() == 4
+        assert te.get_cursor_position() == (2, 0)
+        te.keypress('up')
+        te.keypress('home')
+        te.keypress('delete')
+        assert te.get_text() == b("one\nwo!\n\nthree")
+        assert not te.keypress('f1')
+
+    def test_goal_column(self):
+        te = TextEdit("long line\nab\nanother line")
+        te.set_cursor(7)
+        te.move_cursor(lines=1)
+        assert te.get_cursor_position() == (1, 2)
+        te.move_cursor(lines=1)
+        assert te.get_cursor_position() == (2, 7)
+
+    def test_goal_column_multibyte(self, utf8):
+        te = TextEdit(u"\u00e9\u00e9\nabc\n\u6f22\u5b57".encode("utf-8"))
+        te.set_cursor(2)
+        te.move_cursor(lines=1)
+        assert te.get_cursor_position() == (1, 1)
+        te.move_cursor(lines=-1)
+        assert te.get_cursor_position() == (0, 2)
+        te.insert_text("x")
+        assert te.get_text() == u"\u00e9x\u00e9\nabc\n\u6f22\u5b57".encode(
+            "utf-8")
+        # column 3 is in the middle of the second wide character
+        te.set_cursor(te.get_buffer().line_start(1) + 3)
+        te.move_cursor(lines=1)
+        assert te.get_cursor_position() == (2, 3)
+
+    def test_non_ascii_keys(self, utf8):
+        te = TextEdit()
+        for key in [u"\u00e9", u"\u6f22", "a"]:
+            assert te.keypress(key)
+        assert te.get_text() == u"\u00e9\u6f22a".encode("utf-8")
+        assert te.get_cursor() == len(te.get_text())
+
+    def test_damage(self):
+        lines = ["line %d" % i for i in range(1000)]
+        te = TextEdit("\n".join(lines))
+        show_in_window(te, width=20, height=5)
+        rendered = []
+        render_line = te._row_renderer
+        def count_render(line):
+            rendered.append(line)
+            return render_line(line)
+        te._row_renderer = count_render
+
+        te.set_cursor(te.get_buffer().line_start(2))
+        te.insert_text("x")
+        # only the edited row is rendered again
+        assert rendered == [2]
+        assert te._row_canvases[2]._text == [b("xline 2")]
+
+        del rendered[:]
+        te.insert_text("\n")
+        # rows below the new line are rendered again, up to the overscan
+        assert sorted(rendered) == list(range(2, 7))
+        assert te.get_row_count() == 1001
+        assert te._row_canvases[3]._text == [b("line 2")]
+        assert te._row_canvases[4]._text == [b("line 3")]
+
+    def test_damage_area(self):
+        te = TextEdit("\n".join("line %d" % i for i in range(100)))
+        show_in_window(te, width=20, height=5)
+        root = te.canvas
+        while root._parent is not None:
+            root = root._parent
+
+        root._update = None
+        te.set_cursor(te.get_buffer().line_start(2))
+        te.insert_text("x")
+        # only the edited row is damaged, not the whole widget
+        assert root._update
+        assert all(area.y == 2 and area.height == 1 for area in root._update)
+
+        root._update = None
+        te.scroll(1)
+        assert te._allocation in root._update
+
+    def test_scroll_to_cursor(self):
+        te = TextEdit("\n".join("line %d" % i for i in range(100)))
+        show_in_window(te, width=20, height=5)
+        te.set_cursor(te.get_buffer().line_start(50))
+        assert te.get_top() == 46
+        te.keypress('page up')
+        assert te.get_top() == 45
+        assert te.get_cursor_position() == (45, 0)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from gulib.compat import b
+
+from utk.constants import WRAP_CHAR, WRAP_WORD, WRAP_CLIP
+from utk.text_layout import TextLayout, calc_line_segments
+
+
+def lines(text, width, mode):
+    text = b(text)
+    return [text[start:end] for start, end in
+            TextLayout().layout(text, width, mode)]
+
+
+def test_clip():
+    assert lines("hello world\nab", 5, WRAP_CLIP) == [b("hello"), b("ab")]
+    assert lines("hello", None, WRAP_CLIP) == [b("hello")]
+
+
+def test_char():
+    assert lines("hello world", 4, WRAP_CHAR) == [b("hell"), b("o wo"),
+                                                  b("rld")]
+    assert lines("", 4, WRAP_CHAR) == [b("")]
+
+
+def test_word():
+    assert lines("hello big world", 9, WRAP_WORD) == [b("hello big"),
+                                                      b("world")]
+    assert lines("hello big  world", 5, WRAP_WORD) == [b("hello"), b("big"),
+                                                       b("world")]
+    # words longer than the width are broken
+    assert lines("abcdefgh ij", 3, WRAP_WORD) == [b("abc"), b("def"),
+                                                  b("gh"), b("ij")]
+    assert lines("one\n\ntwo", 10, WRAP_WORD) == [b("one"), b(""), b("two")]
+
+
+def test_wide_chars():
+    text = u"中文".encode("utf-8")
+    assert calc_line_segments(text, 2, WRAP_CHAR) == [(0, 3), (3, 6)]
+    assert calc_line_segments(text, 1, WRAP_CHAR) == [(0, 3), (3, 6)]
+
+
+def test_cache():
+    layout = TextLayout(cache_size=2)
+    text = b("first line\nsecond line")
+    layout.layout(text, 5, WRAP_WORD)
+    assert (layout.hits, layout.misses) == (0, 2)
+    layout.layout(text, 5, WRAP_WORD)
+    assert (layout.hits, layout.misses) == (2, 2)
+    # only the edited line is laid out again
+    layout.layout(b("first line\nsecond line!"), 5, WRAP_WORD)
+    assert (layout.hits, layout.misses) == (3, 3)
+    assert len(layout._cache) == 2
+    assert layout.text_width(text) == 11
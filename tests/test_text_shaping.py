@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import pytest
+from gulib.compat import b
+
+from utk import str_util, text_shaping
+from utk.constants import WRAP_CHAR, WRAP_WORD, WRAP_CLIP
+from utk.text_layout import calc_line_segments
+from utk.text_shaping import (
+    FileSource, SharedTextSource, normalize_line, shape_lines, submit,
+    get_executor, set_executor,
+)
+
+TEXT = b("short\nthe quick brown fox jumps\r\n\n\tover\n") + \
+       u"漢字漢字漢字\n".encode("utf-8") + b("no newline at the end")
+
+
+@pytest.fixture(autouse=True)
+def utf8():
+    old = str_util.get_byte_encoding()
+    str_util.set_byte_encoding("utf8")
+    yield
+    str_util._byte_encoding = old
+
+
+@pytest.fixture
+def executor():
+    futures = pytest.importorskip("concurrent.futures")
+    executor = futures.ProcessPoolExecutor(2)
+    set_executor(executor)
+    yield executor
+    set_executor(None)
+    executor.shutdown()
+
+
+def expected(text, width, mode):
+    widths, rows = [], []
+    for line in text.split(b("\n")):
+        line = normalize_line(line)
+        widths.append(str_util.calc_width(line, 0, len(line)))
+        rows.append(1 if mode == WRAP_CLIP else
+                    len(calc_line_segments(line, width, mode)))
+    return widths, rows
+
+
+def test_normalize_line():
+    assert normalize_line(b("a\tb\r")) == b("a b")
+
+
+@pytest.mark.parametrize("mode", [WRAP_CHAR, WRAP_WORD, WRAP_CLIP])
+def test_shape_lines(mode):
+    widths, rows = shape_lines(TEXT, 0, len(TEXT), 6, mode)
+    assert (list(widths), list(rows)) == expected(TEXT, 6, mode)
+    assert list(widths)[:2] == [5, 25]
+    assert list(widths)[4] == 12
+
+
+def test_shape_lines_range():
+    start = TEXT.index(b("\n")) + 1
+    end = TEXT.index(b("\n\n")) + 1
+    widths, rows = shape_lines(TEXT, start, end, 10, WRAP_WORD)
+    assert list(widths) == [25]
+    assert list(rows) == [3]
+    widths, rows = shape_lines(TEXT, start, start, 10, WRAP_WORD)
+    assert (list(widths), list(rows)) == ([], [])
+    # a range ending in a newline has no empty last line
+    widths, rows = shape_lines(TEXT, end, end + 1, 10, WRAP_WORD)
+    assert list(widths) == [0]
+
+
+def test_file_source(tmpdir):
+    path = tmpdir.join("text")
+    path.write_binary(TEXT)
+    source = FileSource(str(path), TEXT)
+    assert source.shape(0, len(TEXT), 4, WRAP_CHAR) == \
+        shape_lines(TEXT, 0, len(TEXT), 4, WRAP_CHAR)
+    # the data isn't pickled, the file is read instead
+    copy = pickle.loads(pickle.dumps(source))
+    assert copy.data is None
+    assert copy.shape(0, len(TEXT), 4, WRAP_CHAR) == \
+        source.shape(0, len(TEXT), 4, WRAP_CHAR)
+
+
+def test_shared_text_source():
+    source = SharedTextSource(TEXT)
+    try:
+        assert source.size == len(TEXT)
+        assert source.shape(6, len(TEXT), 8, WRAP_WORD) == \
+            shape_lines(TEXT, 6, len(TEXT), 8, WRAP_WORD)
+        copy = pickle.loads(pickle.dumps(source))
+        assert copy.shape(6, len(TEXT), 8, WRAP_WORD) == \
+            shape_lines(TEXT, 6, len(TEXT), 8, WRAP_WORD)
+    finally:
+        source.close()
+
+
+def test_submit_without_executor():
+    assert get_executor() is None
+    source = SharedTextSource(TEXT)
+    future = submit(source, 0, len(TEXT), 6, WRAP_CHAR)
+    source.close()
+    assert future.done()
+    assert future.result() == shape_lines(TEXT, 0, len(TEXT), 6, WRAP_CHAR)
+
+
+def test_submit_executor(executor, tmpdir):
+    path = tmpdir.join("text")
+    path.write_binary(TEXT)
+    source = SharedTextSource(TEXT)
+    try:
+        fs = [submit(source, 0, len(TEXT), 6, WRAP_WORD),
+              submit(FileSource(str(path)), 0, len(TEXT), 6, WRAP_WORD)]
+        for future in fs:
+            assert future.result(30) == \
+                shape_lines(TEXT, 0, len(TEXT), 6, WRAP_WORD)
+    finally:
+        source.close()
+
+
+def test_submit_executor_encoding(executor):
+    # the workers measure with the byte encoding of the caller
+    str_util.set_byte_encoding("narrow")
+    text = u"漢字\n".encode("utf-8")
+    source = SharedTextSource(text)
+    try:
+        widths, rows = submit(source, 0, len(text), 80, WRAP_CHAR).result(30)
+    finally:
+        source.close()
+    assert list(widths) == [len(text) - 1]
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+
+import pytest
+
+from utk import trace
+from utk import widget as widget_module
+from utk.headless_display import Screen
+from utk.screen import get_default_screen, set_default_screen
+from utk.label import Label
+from utk.window import Window
+
+
+@pytest.fixture
+def screen():
+    old_screen = get_default_screen()
+    screen = Screen(40, 10)
+    set_default_screen(screen)
+    yield screen
+    trace.stop()
+    set_default_screen(old_screen)
+
+
+class RecordingLog(object):
+
+    def __init__(self):
+        self.messages = []
+        self.level = logging.WARNING
+
+    def isEnabledFor(self, level):
+        return level >= self.level
+
+    def debug(self, msg, *args):
+        self.messages.append(msg % args)
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_debug_guard(monkeypatch):
+    log = RecordingLog()
+    monkeypatch.setattr(widget_module, "log", log)
+    label = Label("hello")
+    label.show()
+    assert log.messages == []
+    label.hide()
+    log.level = logging.DEBUG
+    label.show()
+    assert log.messages == ["UtkLabel::show()"]
+
+
+def test_debug_logging_configured_late():
+    # configured by the application after utk is imported
+    logger = logging.getLogger("utk")
+    handler = RecordingHandler()
+    old_level = logger.level
+    logger.addHandler(handler)
+    try:
+        label = Label("hello")
+        label.show()
+        assert handler.messages == []
+        label.hide()
+        logger.setLevel(logging.DEBUG)
+        label.show()
+        assert "UtkLabel::show()" in handler.messages
+        # the level of a module logger is followed too
+        del handler.messages[:]
+        logger.setLevel(logging.INFO)
+        logging.getLogger("utk.widget").setLevel(logging.DEBUG)
+        label.hide()
+        assert "UtkLabel::hide()" in handler.messages
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(old_level)
+        logging.getLogger("utk.widget").setLevel(logging.NOTSET)
+
+
+class TestTracer(object):
+
+    def test_size(self):
+        tracer = trace.Tracer(size=3)
+        for i in range(5):
+            tracer.add("event %d" % i, "test", "i", i)
+        assert len(tracer) == 3
+        assert tracer.count == 5
+        assert [e.name for e in tracer.events()] == ["event 2", "event 3",
+                                                     "event 4"]
+        tracer.clear()
+        assert tracer.events() == []
+
+    def test_chrome_trace(self, tmpdir):
+        tracer = trace.Tracer()
+        tracer.add("span", "test", "X", 1.5, 0.25, {"n": 1})
+        tracer.add("point", "test", "i", 2.0)
+        chrome = tracer.to_chrome_trace()
+        span, point = chrome["traceEvents"]
+        assert span["ts"] == 1500000 and span["dur"] == 250000
+        assert span["args"] == {"n": 1}
+        assert point["ph"] == "i" and point["s"] == "t"
+        assert "args" not in point
+        filename = str(tmpdir.join("trace.json"))
+        tracer.save(filename)
+        with open(filename) as f:
+            assert json.load(f) == chrome
+
+
+def test_disabled():
+    assert not trace.enabled
+    trace.instant("nothing")
+    trace.complete("nothing", trace.now())
+
+
+def test_frame_events(screen):
+    win = Window()
+    label = Label("hello")
+    win.add(label)
+    label.show()
+    win.show()
+
+    tracer = trace.start()
+    assert trace.get_tracer() is tracer
+    label.set_text("hello world")
+    win.check_resize()
+    screen.draw_screen()
+    assert trace.stop() is tracer
+    assert not trace.enabled
+    label.set_text("not traced")
+
+    names = [e.name for e in tracer.events()]
+    assert names[0] == "queue_resize"
+    assert "queue_draw_area" in names
+    assert "check_resize" in names
+    assert "calculate_shards" in names
+    assert names[-1] == "draw_screen"
+    assert all(e.dur >= 0 for e in tracer.events())
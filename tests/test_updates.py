@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import utk
+from tests.test_box import CountingLabel
+
+from utk import updates
+from utk.box import VBox
+from utk.window import Window
+from utk.utils import Rectangle
+
+
+class CountingWindow(Window):
+
+    def __init__(self):
+        super(CountingWindow, self).__init__()
+        self.resizes = 0
+
+    def do_check_resize(self):
+        self.resizes += 1
+        super(CountingWindow, self).do_check_resize()
+
+
+def make_window():
+    win = CountingWindow()
+    vbox = VBox()
+    win.add(vbox)
+    vbox.show()
+    # showing the window would start the terminal, map it by hand instead
+    win._visible = True
+    win.size_request()
+    win.size_allocate(Rectangle(0, 0, 20, 100))
+    win.map()
+    assert vbox.is_mapped
+    win.resizes = 0
+    return win, vbox
+
+
+def test_freeze_updates():
+    win, vbox = make_window()
+    labels = [CountingLabel("row %d" % i) for i in range(50)]
+    with utk.freeze_updates():
+        for label in labels:
+            vbox.pack_start(label, expand=False)
+            label.show()
+            label.set_text(label.get_text() + "!")
+        assert updates.is_frozen()
+        assert not any(l.is_realized for l in labels)
+        assert win.resizes == 0
+    assert not updates.is_frozen()
+    assert all(l.is_mapped for l in labels)
+    assert win.resizes == 1
+    assert [l.requests for l in labels] == [1] * 50
+    assert [l.allocations for l in labels] == [1] * 50
+    assert labels[49]._allocation == Rectangle(0, 49, 20, 1)
+
+
+def test_nested():
+    win, vbox = make_window()
+    label = CountingLabel("text")
+    utk.freeze_updates()
+    utk.freeze_updates()
+    vbox.pack_start(label)
+    label.show()
+    utk.thaw_updates()
+    assert not label.is_mapped
+    utk.thaw_updates()
+    assert label.is_mapped
+    assert win.resizes == 1
+
+
+def test_draws_while_flushing():
+    win, vbox = make_window()
+    labels = [CountingLabel("row %d" % i) for i in range(3)]
+    with utk.freeze_updates():
+        for label in labels:
+            vbox.pack_start(label, expand=False)
+            label.show()
+    assert all(l.is_mapped for l in labels)
+    # mapping the labels queued draws, done by the thaw
+    assert updates._deferred_toplevels == []
+    assert win.resizes == 1
+    with utk.freeze_updates():
+        pass
+    assert win.resizes == 1
+
+
+def test_thaw_without_freeze():
+    with pytest.raises(AssertionError):
+        utk.thaw_updates()
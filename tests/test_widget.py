@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import pytest
+from gulib import UObject
 from tests.callback import NotifyPropCallback, SignalEmitCallback
 
 from utk.widget import Widget
 from utk.bin import Bin
+from utk.box import HBox, VBox
+from utk.misc import Misc
+from utk.label import Label
 from utk.window import Window
 
 from utk.utils import Requisition, Rectangle
@@ -221,3 +225,12 @@ class TestWidget(BaseTest):
         b.add(w)
         ancesors = list(w.ancesor_iter())
         assert ancesors == [b, win]
+
+
+@pytest.mark.parametrize("cls", [Widget, Bin, Window, Misc, Label,
+                                 HBox, VBox])
+def test_attributes_in_slots(cls):
+    # the instance dict, if any, only has what UObject keeps
+    base = set(getattr(UObject(), "__dict__", ()))
+    w = cls()
+    assert set(getattr(w, "__dict__", ())) <= base
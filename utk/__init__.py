@@ -10,29 +10,83 @@
     :license: LGPL 2 or later (see README/COPYING/LICENSE)
 """
 
+import sys
 import logging
-
-from gulib import MainLoop
-from utk.label import Label
-from utk.box import VBox, HBox
-from utk.window import Window
-from utk.screen import get_default_screen
+import importlib
 
 # version information
 __version__ = '0.0.1'
 
+# the public API and the module of each name, imported on first use so
+# "import utk" is fast for programs that only show a TUI sometimes
+_lazy_names = {
+    "MainLoop": "gulib",
+    "Label": "utk.label",
+    "VBox": "utk.box",
+    "HBox": "utk.box",
+    "ListView": "utk.listview",
+    "LogView": "utk.logview",
+    "Table": "utk.table",
+    "TextEdit": "utk.text_edit",
+    "Window": "utk.window",
+    "get_default_screen": "utk.screen",
+    "freeze_updates": "utk.updates",
+    "thaw_updates": "utk.updates",
+}
+_lazy_submodules = ("mainloop", "trace")
+
+__all__ = sorted(_lazy_names) + [
+    "main", "main_quit", "register_palette", "set_terminal_file",
+    "configure_logging",
+]
+
+def __getattr__(name):
+    if name in _lazy_submodules:
+        return importlib.import_module("utk." + name)
+    if name not in _lazy_names:
+        raise AttributeError("module 'utk' has no attribute %r" % name)
+    value = getattr(importlib.import_module(_lazy_names[name]), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_names) | set(_lazy_submodules))
+
+if sys.version_info < (3, 7):
+    # no module __getattr__ (PEP 562), import everything now
+    for _name in list(_lazy_names) + list(_lazy_submodules):
+        globals()[_name] = __getattr__(_name)
+
 _running_from_pytest = False
 
 main_loops = []
 
 def main():
-    loop = MainLoop()
-    main_loops.append(loop)
-
-    loop.run()
-
+    """
+    Run the main loop of the installed mainloop backend until main_quit()
+    is called. With an AsyncioLoop backend whose event loop is already
+    running it returns a future to await instead.
+    """
+    from utk import mainloop
+    from utk.screen import get_default_screen
+
+    backend = mainloop.get_backend()
+    screen = get_default_screen()
+    main_loops.append(backend)
+    backend.watch_screen(screen)
+
+    future = backend.run()
+
+    if future is None:
+        _main_done(backend, screen)
+    else:
+        future.add_done_callback(lambda f: _main_done(backend, screen))
+    return future
+
+def _main_done(backend, screen):
+    if backend not in main_loops:
+        backend.unwatch_screen(screen)
     if not main_loops:
-        screen = get_default_screen()
         if screen.started:
             screen.stop()
 
@@ -40,11 +94,12 @@ def main_quit(*args):
 
     assert len(main_loops), "There is no running loop"
 
-    loop = main_loops.pop()
-    loop.quit()
+    backend = main_loops.pop()
+    backend.quit()
 
 
 def register_palette(palette):
+    from utk.screen import get_default_screen
     get_default_screen().register_palette(palette)
 
 def set_terminal_file(fname):
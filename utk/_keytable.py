@@ -0,0 +1,506 @@
+# -*- coding: utf-8 -*-
+# Generated by utk.escape.write_input_table(), do not edit.
+
+import sys
+import zlib
+from array import array
+from binascii import a2b_base64
+
+CLASSES = bytearray((
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 0, 12, 13, 0, 0, 0,
+    0, 14, 15, 16, 17, 18, 19, 20, 21, 0, 0, 0, 0, 22, 0, 23,
+    24, 25, 26, 27, 0, 0, 0, 0, 0, 0, 28, 29, 0, 0, 30, 0,
+    0, 31, 32, 33, 34, 0, 0, 0, 0, 0, 35, 36, 0, 37, 38, 39,
+    40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 0, 0, 0, 0, 50, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+))
+
+NUM_CLASSES = 51
+
+# zlib compressed little-endian signed 16 bit values
+TRANSITIONS = array('h', zlib.decompress(a2b_base64(
+    b'eNrV2QOMJFsYxfEza9u2bdu2bdu2bdu2bdu2bc7Zyr7Ke5vM1r7eSdVJ6iZ3Upn6'
+    b'bv36P51JTzLA36yYv1x74e+WHy8/8At/8I8ACIhACPzzuyW9SW9+5zd+5Rd+5ieW'
+    b'8v7vzCEGMb7u4W7u4k565gRFMARHCIQ0rkMhNMIglnG1iAu5gPM5j3M5h7MJX66P'
+    b'xskdDItwxnV4REBERDKuIiPKz7uzOJMzOJ3TOJVTONmHsslD94Mxt93YUREN0RHj'
+    b'lzupjT2JEzmB4zmOYzmGo308c6OHyvs/zo3iSI7gcA7jUA7hYF//xN4ZJ7f99nRa'
+    b'Yw/iQA5gf/ZjX/Zhbx9zGzx03xpzW387m97YvdiTPdid3diVXdjZx9x6D5U3xtwW'
+    b'y9lO7MgObM92bMs2bO1jbp2HymtjbrPlbCu2ZAs2ZzM2ZRM29jG31kPl1R/nXvIF'
+    b'n/MZn/r6ff+/ldHGZz2xfJWZbVQeWypZbVQeWSrZbVQeWio5bVQeWCq5bVTuWyp5'
+    b'bVTuWSr5bVTu/qN4efn4eC1oo3LHsqWwjcptS6WojcotS6W4jcpNS6WkjcoNS6W0'
+    b'jcp1S6Wsjco1S6W8jcpVS6WijcoVS6WyjcplS6WqjcolS6W6jcpFU0mMJEiKZEiO'
+    b'FEiJVObdCzzPczxrzJw29pmfs6d4kid43Dx3gPu5j3t5lId5hAd5jGu4mqu4kiu4'
+    b'nMu4lEu4+N+S2IiDuIiH+EiAhEgE5WrEhmzA+qzHuqzD2g79vVSLNVmD1VmNVVmF'
+    b'lR1SKrEiK7A8y7Esy7C0Q0oplmQJFmcxFmURFnZIKcSCLMD8zMe8zMPcDim5mJM5'
+    b'mJ3ZmJVZmNkhJRMzMgPTMx3TMg1TO6SkYkqmYHImY1ImYWLqfocSMSETML7DYjzG'
+    b'ZRzGdliJxZiMwegOK9EYlVEY2WElEiMyAsM7rIRjWIZhaIeVUAzJEAzusBKMQRmE'
+    b'gX2lpEFNdMBwzMNWnMFjuHEFMsvToRY6YgTmYxvO4okrWwKaLRlQG50wEguwHefw'
+    b'1JUtAcyWTKiDzhiFhdiB83jmyhb/ZksW1EUXjMYi7MQFPHdliz+zJRvqoSvGYDF2'
+    b'4SJeuLLFr9mSA/XRDWOxBLtxCS9d2eLHbMmFBuiOcViKPbiMV65s8TJb8qAhemA8'
+    b'lmEvruC1K1tgtuRDI/TEBCzHPlzFG3emmP/pKoDG6IWJWIH9uIa3rmzxNlsKoQl6'
+    b'YxJW4gCu450rW76bLUXQFH0wGatwEDfw3pUt38yWYmiGvpiC1TiEm/jgypavZksJ'
+    b'NEc/TMUaHMYtfHRlyxezpRRaoD+mYS2O4DY+ubLls9lSBi0xANOxDkdxB59d2fLJ'
+    b'bCmHVhiIGViPY7iLL65s+Wi2VEBrDMJMbMBx3MNXV7Z8MFsqoQ0GYxY24gTu45sr'
+    b'W96bLVXQFkMwG5twEg/w3ZUt78yWamiHoZiDzTiFh/B2Zctb82XXQHsMw1xswWk8'
+    b'Al3Z8kbyFryWKK8kykuJ8kKiPJcozyTKU4nyRKI8liiPJMpDifJAotyXKPckyl2J'
+    b'ckei3JYotyTKTYlyQ6JclyjXJMpViXJFolyWKJckykWJckGinJco5yTKWYlyRqKc'
+    b'liinJMpJiXJCohyXKMckylGJckSiHJYohyTKQYlyQKLslyj7JMpeibJHouyWKLsk'
+    b'yk6JskOibJco2yTKVomyRaJsliibJMpGibJBoqyXKOskylqJskairJYoqyTKSomy'
+    b'QqIslyjLJMpSibJEoiyWKIskykKJskCizJco8yTKXIkyR6LMliizJMpMiTJDokyX'
+    b'KNMkylSJMkWiTJYokyTKRIkyQaKMlyjjJMpYiTJGooyWKKMkykiJMkKiDJcowyTK'
+    b'UIkyRKIMliiDJMpAiTJAovSXKP0kSl+J0kei9JYovSRKT4nSQ6J0lyjdJEpXidJF'
+    b'onSWKJ0kSkeJ0kGitJco7SRKW4nSRqK0liitJEpLidJCojSXKM0kSlOJ0kSiNJYo'
+    b'jSRKQ4nSQKLUlyj1JEpdiVJHotSWKLUkSk2JUkOiVJco1SRKVYlSRaJUliiVJEpF'
+    b'iVJBopSXKOUkSlmJUkailJYoJSRKcVuVYpZP+wFwQCUq'
+)))
+if sys.byteorder == 'big':
+    TRANSITIONS.byteswap()
+
+RESULTS = (
+    'up',
+    'down',
+    'right',
+    'left',
+    '5',
+    'end',
+    '5',
+    'home',
+    'home',
+    'insert',
+    'delete',
+    'end',
+    'page up',
+    'page down',
+    'home',
+    'end',
+    'f1',
+    'f2',
+    'f3',
+    'f4',
+    'f5',
+    'f1',
+    'f2',
+    'f3',
+    'f4',
+    'f5',
+    'f6',
+    'f7',
+    'f8',
+    'f9',
+    'f10',
+    'f11',
+    'f12',
+    'f13',
+    'f14',
+    'f15',
+    'f16',
+    'f17',
+    'f18',
+    'f19',
+    'f20',
+    'up',
+    'down',
+    'right',
+    'left',
+    'home',
+    'end',
+    'f1',
+    'f2',
+    'f3',
+    'f4',
+    '/',
+    '*',
+    '-',
+    '+',
+    'shift tab',
+    '.',
+    'meta up',
+    'meta down',
+    'meta right',
+    'meta left',
+    'shift up',
+    'shift down',
+    'shift right',
+    'shift left',
+    'shift insert',
+    'shift delete',
+    'shift page up',
+    'shift page down',
+    'shift home',
+    'shift end',
+    'meta insert',
+    'meta delete',
+    'meta page up',
+    'meta page down',
+    'meta home',
+    'meta end',
+    '0',
+    '1',
+    '2',
+    '3',
+    '4',
+    '5',
+    '6',
+    '7',
+    '8',
+    '9',
+    'up',
+    'down',
+    'right',
+    'left',
+    '5',
+    'end',
+    '5',
+    'home',
+    'shift up',
+    'shift down',
+    'shift right',
+    'shift left',
+    'shift 5',
+    'shift end',
+    'shift 5',
+    'shift home',
+    'meta up',
+    'meta down',
+    'meta right',
+    'meta left',
+    'meta 5',
+    'meta end',
+    'meta 5',
+    'meta home',
+    'shift meta up',
+    'shift meta down',
+    'shift meta right',
+    'shift meta left',
+    'shift meta 5',
+    'shift meta end',
+    'shift meta 5',
+    'shift meta home',
+    'ctrl up',
+    'ctrl down',
+    'ctrl right',
+    'ctrl left',
+    'ctrl 5',
+    'ctrl end',
+    'ctrl 5',
+    'ctrl home',
+    'shift ctrl up',
+    'shift ctrl down',
+    'shift ctrl right',
+    'shift ctrl left',
+    'shift ctrl 5',
+    'shift ctrl end',
+    'shift ctrl 5',
+    'shift ctrl home',
+    'meta ctrl up',
+    'meta ctrl down',
+    'meta ctrl right',
+    'meta ctrl left',
+    'meta ctrl 5',
+    'meta ctrl end',
+    'meta ctrl 5',
+    'meta ctrl home',
+    'shift meta ctrl up',
+    'shift meta ctrl down',
+    'shift meta ctrl right',
+    'shift meta ctrl left',
+    'shift meta ctrl 5',
+    'shift meta ctrl end',
+    'shift meta ctrl 5',
+    'shift meta ctrl home',
+    'up',
+    'down',
+    'right',
+    'left',
+    '5',
+    'end',
+    '5',
+    'home',
+    'shift up',
+    'shift down',
+    'shift right',
+    'shift left',
+    'shift 5',
+    'shift end',
+    'shift 5',
+    'shift home',
+    'meta up',
+    'meta down',
+    'meta right',
+    'meta left',
+    'meta 5',
+    'meta end',
+    'meta 5',
+    'meta home',
+    'shift meta up',
+    'shift meta down',
+    'shift meta right',
+    'shift meta left',
+    'shift meta 5',
+    'shift meta end',
+    'shift meta 5',
+    'shift meta home',
+    'ctrl up',
+    'ctrl down',
+    'ctrl right',
+    'ctrl left',
+    'ctrl 5',
+    'ctrl end',
+    'ctrl 5',
+    'ctrl home',
+    'shift ctrl up',
+    'shift ctrl down',
+    'shift ctrl right',
+    'shift ctrl left',
+    'shift ctrl 5',
+    'shift ctrl end',
+    'shift ctrl 5',
+    'shift ctrl home',
+    'meta ctrl up',
+    'meta ctrl down',
+    'meta ctrl right',
+    'meta ctrl left',
+    'meta ctrl 5',
+    'meta ctrl end',
+    'meta ctrl 5',
+    'meta ctrl home',
+    'shift meta ctrl up',
+    'shift meta ctrl down',
+    'shift meta ctrl right',
+    'shift meta ctrl left',
+    'shift meta ctrl 5',
+    'shift meta ctrl end',
+    'shift meta ctrl 5',
+    'shift meta ctrl home',
+    'f1',
+    'f2',
+    'f3',
+    'f4',
+    'shift f1',
+    'shift f2',
+    'shift f3',
+    'shift f4',
+    'meta f1',
+    'meta f2',
+    'meta f3',
+    'meta f4',
+    'shift meta f1',
+    'shift meta f2',
+    'shift meta f3',
+    'shift meta f4',
+    'ctrl f1',
+    'ctrl f2',
+    'ctrl f3',
+    'ctrl f4',
+    'shift ctrl f1',
+    'shift ctrl f2',
+    'shift ctrl f3',
+    'shift ctrl f4',
+    'meta ctrl f1',
+    'meta ctrl f2',
+    'meta ctrl f3',
+    'meta ctrl f4',
+    'shift meta ctrl f1',
+    'shift meta ctrl f2',
+    'shift meta ctrl f3',
+    'shift meta ctrl f4',
+    'delete',
+    'page up',
+    'page down',
+    'f1',
+    'f2',
+    'f3',
+    'f4',
+    'f5',
+    'f6',
+    'f7',
+    'f8',
+    'f9',
+    'f10',
+    'f11',
+    'f12',
+    'f13',
+    'f14',
+    'f15',
+    'f16',
+    'f17',
+    'f18',
+    'f19',
+    'f20',
+    'shift delete',
+    'shift page up',
+    'shift page down',
+    'shift f1',
+    'shift f2',
+    'shift f3',
+    'shift f4',
+    'shift f5',
+    'shift f6',
+    'shift f7',
+    'shift f8',
+    'shift f9',
+    'shift f10',
+    'shift f11',
+    'shift f12',
+    'shift f13',
+    'shift f14',
+    'shift f15',
+    'shift f16',
+    'shift f17',
+    'shift f18',
+    'shift f19',
+    'shift f20',
+    'meta delete',
+    'meta page up',
+    'meta page down',
+    'meta f1',
+    'meta f2',
+    'meta f3',
+    'meta f4',
+    'meta f5',
+    'meta f6',
+    'meta f7',
+    'meta f8',
+    'meta f9',
+    'meta f10',
+    'meta f11',
+    'meta f12',
+    'meta f13',
+    'meta f14',
+    'meta f15',
+    'meta f16',
+    'meta f17',
+    'meta f18',
+    'meta f19',
+    'meta f20',
+    'shift meta delete',
+    'shift meta page up',
+    'shift meta page down',
+    'shift meta f1',
+    'shift meta f2',
+    'shift meta f3',
+    'shift meta f4',
+    'shift meta f5',
+    'shift meta f6',
+    'shift meta f7',
+    'shift meta f8',
+    'shift meta f9',
+    'shift meta f10',
+    'shift meta f11',
+    'shift meta f12',
+    'shift meta f13',
+    'shift meta f14',
+    'shift meta f15',
+    'shift meta f16',
+    'shift meta f17',
+    'shift meta f18',
+    'shift meta f19',
+    'shift meta f20',
+    'ctrl delete',
+    'ctrl page up',
+    'ctrl page down',
+    'ctrl f1',
+    'ctrl f2',
+    'ctrl f3',
+    'ctrl f4',
+    'ctrl f5',
+    'ctrl f6',
+    'ctrl f7',
+    'ctrl f8',
+    'ctrl f9',
+    'ctrl f10',
+    'ctrl f11',
+    'ctrl f12',
+    'ctrl f13',
+    'ctrl f14',
+    'ctrl f15',
+    'ctrl f16',
+    'ctrl f17',
+    'ctrl f18',
+    'ctrl f19',
+    'ctrl f20',
+    'shift ctrl delete',
+    'shift ctrl page up',
+    'shift ctrl page down',
+    'shift ctrl f1',
+    'shift ctrl f2',
+    'shift ctrl f3',
+    'shift ctrl f4',
+    'shift ctrl f5',
+    'shift ctrl f6',
+    'shift ctrl f7',
+    'shift ctrl f8',
+    'shift ctrl f9',
+    'shift ctrl f10',
+    'shift ctrl f11',
+    'shift ctrl f12',
+    'shift ctrl f13',
+    'shift ctrl f14',
+    'shift ctrl f15',
+    'shift ctrl f16',
+    'shift ctrl f17',
+    'shift ctrl f18',
+    'shift ctrl f19',
+    'shift ctrl f20',
+    'meta ctrl delete',
+    'meta ctrl page up',
+    'meta ctrl page down',
+    'meta ctrl f1',
+    'meta ctrl f2',
+    'meta ctrl f3',
+    'meta ctrl f4',
+    'meta ctrl f5',
+    'meta ctrl f6',
+    'meta ctrl f7',
+    'meta ctrl f8',
+    'meta ctrl f9',
+    'meta ctrl f10',
+    'meta ctrl f11',
+    'meta ctrl f12',
+    'meta ctrl f13',
+    'meta ctrl f14',
+    'meta ctrl f15',
+    'meta ctrl f16',
+    'meta ctrl f17',
+    'meta ctrl f18',
+    'meta ctrl f19',
+    'meta ctrl f20',
+    'shift meta ctrl delete',
+    'shift meta ctrl page up',
+    'shift meta ctrl page down',
+    'shift meta ctrl f1',
+    'shift meta ctrl f2',
+    'shift meta ctrl f3',
+    'shift meta ctrl f4',
+    'shift meta ctrl f5',
+    'shift meta ctrl f6',
+    'shift meta ctrl f7',
+    'shift meta ctrl f8',
+    'shift meta ctrl f9',
+    'shift meta ctrl f10',
+    'shift meta ctrl f11',
+    'shift meta ctrl f12',
+    'shift meta ctrl f13',
+    'shift meta ctrl f14',
+    'shift meta ctrl f15',
+    'shift meta ctrl f16',
+    'shift meta ctrl f17',
+    'shift meta ctrl f18',
+    'shift meta ctrl f19',
+    'shift meta ctrl f20',
+    'mouse',
+    'sgrmouse',
+    'begin paste',
+    'end paste',
+    'status ok',
+)
@@ -18,6 +18,8 @@ from utk.utils import Requisition
 class Bin(Container):
     __type_name__ = "UtkBin"
 
+    __slots__ = ("_child",)
+
     def __init__(self):
         self._child = None
         super(Bin, self).__init__()
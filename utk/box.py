@@ -26,6 +26,9 @@ log = logging.getLogger("utk.box")
 class Box(Container):
     __type_name__ = "UtkBox"
 
+    __slots__ = ("_childs", "_orientation", "_spacing", "_homogeneous",
+                 "_allocation_key", "_child_allocations")
+
     def __init__(self, spacing=0, homogeneous=False,
                  orientation=ORIENTATION_HORIZONTAL):
         super(Box, self).__init__()
@@ -33,6 +36,8 @@ class Box(Container):
         self._orientation = orientation
         self._spacing = spacing
         self._homogeneous = homogeneous
+        self._allocation_key = None
+        self._child_allocations = ()
 
     def get_orientation(self):
         return self._orientation
@@ -185,35 +190,68 @@ class Box(Container):
         if self.is_realized:
             self.canvas.move_resize(allocation.x, allocation.y,
                                     allocation.width, allocation.height)
+
+        # The child rectangles only depend on the allocation, the packing
+        # parameters and the child requisitions. When none of them changed
+        # the previous rectangles are reused, otherwise they are computed
+        # again and only the children whose rectangle moved are allocated.
+        key = self._get_allocation_key(allocation)
+        if key != self._allocation_key:
+            previous = dict((id(w), r) for w, r in self._child_allocations)
+            self._allocation_key = key
+            self._child_allocations = self._compute_child_allocations(allocation)
+        else:
+            previous = None
+
+        for widget, child_alloc in self._child_allocations:
+            if widget._alloc_needed or (previous is not None and
+                                        previous.get(id(widget)) != child_alloc):
+                widget.size_allocate(child_alloc)
+
+    def _get_allocation_key(self, allocation):
+        return (allocation, self._requisition, self.border_width,
+                self._spacing, self._homogeneous, self._orientation,
+                tuple((c, c.widget.is_visible, c.widget._requisition_gen)
+                      for c in self._childs))
+
+    def _compute_child_allocations(self, allocation):
+        """
+        Return a list of (widget, Rectangle()) with the allocation of each
+        visible child.
+        """
+        allocations = []
         visible_childs = len([c for c in self._childs if c.widget.is_visible])
-        expanded_childs = len([c for c in self._childs if c.expand])
-        log.debug("UtkBox::visible_childs: %d", visible_childs)
-        log.debug("UtkBox::expanded_childs: %d", expanded_childs)
+        expanded_childs = len([c for c in self._childs
+                               if c.expand and c.widget.is_visible])
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("UtkBox::visible_childs: %d", visible_childs)
+            log.debug("UtkBox::expanded_childs: %d", expanded_childs)
         if visible_childs < 1:
-            return
+            return allocations
 
         child_alloc = Rectangle()
         x = allocation.x + self.border_width
         y = allocation.y + self.border_width
         width = (allocation.width - self.border_width*2)
         height = (allocation.height - self.border_width*2)
+        extra = 0
 
         if self.homogeneous:
             if self.orientation == ORIENTATION_HORIZONTAL:
                 width = (allocation.width - self.border_width*2 -
                          (visible_childs-1) * self.spacing)
-                extra = width / visible_childs
+                extra = width // visible_childs
             else:
                 height = (allocation.height - self.border_width*2 -
                           (visible_childs-1) * self.spacing)
-                extra = height / visible_childs
+                extra = height // visible_childs
         elif expanded_childs > 0:
             if self.orientation == ORIENTATION_HORIZONTAL:
                 width = allocation.width - self._requisition.width
-                extra = width / expanded_childs
+                extra = width // expanded_childs
             else:
                 height = allocation.height - self._requisition.height
-                extra = height / expanded_childs
+                extra = height // expanded_childs
 
         if self.orientation == ORIENTATION_HORIZONTAL:
             child_alloc = child_alloc._replace(y=(allocation.y + self.border_width),
@@ -245,9 +283,9 @@ class Box(Container):
                         else:
                             child_width += extra
                             child_height += extra
-                    expanded_childs -= 1
-                    width -= extra
-                    height -= extra
+                        expanded_childs -= 1
+                        width -= extra
+                        height -= extra
 
                 if child.fill:
                     if self.orientation == ORIENTATION_HORIZONTAL:
@@ -259,13 +297,13 @@ class Box(Container):
                 else:
                     child_req = child.widget._requisition
                     if self.orientation == ORIENTATION_HORIZONTAL:
-                        child_alloc = child_alloc._replace(x=x+(child_width-child_alloc.width)/2,
+                        child_alloc = child_alloc._replace(x=x+(child_width-child_alloc.width)//2,
                                                            width=child_req.width)
                     else:
-                        child_alloc = child_alloc._replace(y=y+(child_height-child_alloc.height)/2,
+                        child_alloc = child_alloc._replace(y=y+(child_height-child_alloc.height)//2,
                                                            height=child_req.height)
 
-                child.widget.size_allocate(child_alloc)
+                allocations.append((child.widget, child_alloc))
                 x += child_width + self.spacing
                 y += child_height + self.spacing
 
@@ -294,7 +332,7 @@ class Box(Container):
                             child_height += height
                         else:
                             child_width += extra
-                            child_height += height
+                            child_height += extra
                         expanded_childs -= 1
                         width -= extra
                         height -= extra
@@ -307,16 +345,18 @@ class Box(Container):
                                                            height=max(1, child_height-child.padding*2))
                 else:
                     if self.orientation == ORIENTATION_HORIZONTAL:
-                        child_alloc = child_alloc._replace(x=x+(child_width-child_alloc.width)/2-child_width,
+                        child_alloc = child_alloc._replace(x=x+(child_width-child_alloc.width)//2-child_width,
                                                            width=child_req.width)
                     else:
-                        child_alloc = child_alloc._replace(y=y+(child_height-child_alloc.height)/2-child_height,
+                        child_alloc = child_alloc._replace(y=y+(child_height-child_alloc.height)//2-child_height,
                                                            height=child_req.height)
 
-                child.widget.size_allocate(child_alloc)
+                allocations.append((child.widget, child_alloc))
                 x -= (child_width + self.spacing)
                 y -= (child_height + self.spacing)
 
+        return allocations
+
 class HBox(Box):
     """
     Container that organizes childs widgets into a single row.
@@ -328,6 +368,8 @@ class HBox(Box):
     """
     __type_name__ = "UtkHBox"
 
+    __slots__ = ()
+
     def __init__(self, spacing=0, homogeneous=False):
         super(HBox, self).__init__(spacing, homogeneous, ORIENTATION_HORIZONTAL)
 
@@ -350,6 +392,8 @@ class VBox(Box):
     """
     __type_name__ = "UtkVBox"
 
+    __slots__ = ()
+
     def __init__(self, spacing=0, homogeneous=False):
         super(VBox, self).__init__(spacing, homogeneous, ORIENTATION_VERTICAL)
 
@@ -11,10 +11,12 @@
 """
 
 import logging
+from itertools import groupby
 from collections import namedtuple
 
 from gulib.compat import bytes3
 
+from utk import trace
 from utk.utils import (
     Rectangle, calc_text_pos, apply_target_encoding, trim_text_attr_cs,
     rle_product, rle_len, rle_append_modify, calc_width, isiterable,
@@ -57,16 +59,23 @@ class CanvasError(Exception):
 class Canvas(object):
     """Base class for canvases"""
 
+    # a widget has one canvas or more, keep them small: the childs list is
+    # allocated by the first add_child(), the areas to update only while
+    # the canvas is a root and the shards when first calculated
+    __slots__ = ("_shards", "_childs", "_parent", "_area", "_update",
+                 "_visible", "_dirty")
+
     def __init__(self, left=0, top=0, cols=1, rows=1):
-        self._shards = []
-        self._childs = []
+        self._shards = None
+        self._childs = ()
         self._parent = None
         self._area = Rectangle(left, top, cols, rows)
-        self._update = set() # areas to update
+        self._update = None # areas to update
         self._visible = False
         #self._dirty = True
         self.invalidate()
-        log.debug("%s%r", self.__class__.__name__, tuple(self._area))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s%r", self.__class__.__name__, tuple(self._area))
 
     # sortcuts
     left = property(lambda s: s._area.x)
@@ -79,8 +88,13 @@ class Canvas(object):
     def add_child(self, child):
         child._parent = self
         if child._update:
-            self._update.update(child._update)
-            child._update.clear()
+            if self._update is None:
+                self._update = child._update
+            else:
+                self._update.update(child._update)
+        child._update = None
+        if not self._childs:
+            self._childs = []
         self._childs.append(child)
         self.invalidate_area(child._area)
 
@@ -120,7 +134,8 @@ class Canvas(object):
         self.move_to(self.left+deltaleft, self.top+deltatop)
 
     def resize(self, newwidth=None, newheight=None):
-        log.debug("%s::resize(%d, %d)", repr(self), newwidth, newheight)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::resize(%d, %d)", repr(self), newwidth, newheight)
         oldarea = self._area
         if newwidth is None:
             newwidth = oldarea.width
@@ -157,7 +172,10 @@ class Canvas(object):
         if self._parent:
             self._parent.invalidate_area(area)
         else:
-            log.debug("%s::invalidate_area(%r)", repr(self), area)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s::invalidate_area(%r)", repr(self), area)
+            if self._update is None:
+                self._update = set()
             self._update.add(area)
         self._set_dirty()
 
@@ -165,12 +183,14 @@ class Canvas(object):
         self.invalidate_area(self._area)
 
     def show(self):
-        log.debug("Canvas::show()")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Canvas::show()")
         self._visible = True
         self.invalidate()
 
     def hide(self):
-        log.debug("Canvas::hide()")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Canvas::hide()")
         self._visible = False
         self.invalidate()
 
@@ -186,8 +206,10 @@ class Canvas(object):
     def calculate_shards(self):
         if not self.is_dirty:
             return
+        tstart = trace.now() if trace.enabled else None
 
-        log.debug("calculating shards in %s <%x>", repr(self), id(self))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("calculating shards in %s <%x>", repr(self), id(self))
 
         self._shards = [
             Shard(self.rows, [
@@ -197,8 +219,6 @@ class Canvas(object):
 
         updates = None
         if self._update:
-            import pprint
-            log.debug(pprint.pformat(self._update))
             for u in self._update:
                 if not updates:
                     updates = u
@@ -209,13 +229,12 @@ class Canvas(object):
                                        y=max(updates.y, self._area.y),
                                        width=min(updates.width, self._area.width),
                                        height=min(updates.height, self._area.height))
-            log.debug("updates for '%s': %r", self._text, updates,)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("updates for %r: %r", self, updates)
         else:
             updates = self._area
 
-        for child in self._childs:
-            if not child._visible:
-                continue
+        for child in self._get_exposed_childs():
             width = child.cols
             height = child.rows
             left = child.left - self.left
@@ -250,6 +269,37 @@ class Canvas(object):
 
             self._shards = top_shards + middle_shards + bottom_shards
         self._unset_dirty()
+        if tstart is not None:
+            trace.complete("calculate_shards", tstart, "canvas",
+                           canvas=self.__class__.__name__)
+
+    def _get_exposed_childs(self):
+        """
+        Return the visible children in stacking order, leaving out those
+        completely covered by a visible child above them, so they aren't
+        composed nor asked for their content.
+        """
+        visible = [child for child in self._childs if child._visible]
+        if len(visible) < 2:
+            return visible
+        # a child can only be covered by one spanning its top row: sweep
+        # the rows keeping the children that span the current one, so the
+        # row canvases of a list aren't compared with each other
+        exposed = [True] * len(visible)
+        order = sorted(range(len(visible)), key=lambda i: visible[i]._area.y)
+        active = []
+        for top, group in groupby(order, lambda i: visible[i]._area.y):
+            group = list(group)
+            active = [i for i in active
+                      if visible[i]._area.y + visible[i]._area.height > top]
+            active.extend(group)
+            for i in group:
+                area = visible[i]._area
+                for j in active:
+                    if j > i and visible[j]._area.contains(area):
+                        exposed[i] = False
+                        break
+        return [child for child, e in zip(visible, exposed) if e]
 
     def content(self):
         shard_tail = []
@@ -276,6 +326,8 @@ class Canvas(object):
 
 class SolidCanvas(Canvas):
 
+    __slots__ = ("_text", "_cs", "_attr")
+
     def __init__(self, fill_char, attr=None, left=0, top=0, cols=1, rows=1):
         end, col = calc_text_pos(fill_char, 0, len(fill_char), 1)
         assert col == 1, "Invalid fill_char: %r" % fill_char
@@ -303,6 +355,8 @@ class SolidCanvas(Canvas):
 class TextCanvas(Canvas):
     """Class for storing rendered text attributes"""
 
+    __slots__ = ("_text", "_attr", "_cs")
+
     def __init__(self, text=None, attr=None, cs=None, left=0, top=0, cols=1, rows=1):
         if text is None:
             text = []
@@ -323,9 +377,26 @@ class TextCanvas(Canvas):
 
         super(TextCanvas, self).__init__(left, top, cols, rows)
 
+    def set_text(self, text, attr=None, cs=None):
+        """
+        Replace the rows of text, and their attributes and character sets,
+        the area of the canvas is redrawn.
+        """
+        if attr is None:
+            attr = [[] for x in range(len(text))]
+        if cs is None:
+            cs = [[] for x in range(len(text))]
+        for t in text:
+            assert isinstance(t, bytes), "text must be bytes(), was %r" % type(t)
+        self._text = text
+        self._attr = attr
+        self._cs = cs
+        self.invalidate()
+
     def body_content(self, trim_left=0, trim_top=0, cols=None, rows=None,
                      attr_map=None):
-        log.debug("body_content for %s", self)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("body_content for %s", self)
         if cols is None:
             cols = self.cols - trim_left
         if rows is None:
@@ -336,15 +407,9 @@ class TextCanvas(Canvas):
         assert trim_top >= 0 and trim_top < self.rows
         assert rows > 0 and trim_top + rows <= self.rows
 
-        text, attr, cs = self.pad_text_attr()
-
-        if trim_top or rows < self.rows:
-            text_attr_cs = zip(
-                    text[trim_top:trim_top+rows],
-                    attr[trim_top:trim_top+rows],
-                    cs[trim_top:trim_top+rows])
-        else:
-            text_attr_cs = zip(text, attr, cs)
+        # only the rows asked for, the rest may be covered
+        text, attr, cs = self.pad_text_attr(trim_top, trim_top+rows)
+        text_attr_cs = zip(text, attr, cs)
 
         rows_done = 0
         for text, attr, cs in text_attr_cs:
@@ -366,10 +431,10 @@ class TextCanvas(Canvas):
     def __repr__(self):
         return "<TextCanvas(%r, left=%d, top=%d, cols=%d, rows=%d)>" % (self._text, self.left, self.top, self.cols, self.rows)
 
-    def pad_text_attr(self):
-        attr = list(self._attr)
-        cs = list(self._cs)
-        text = list(self._text)
+    def pad_text_attr(self, start=0, end=None):
+        attr = self._attr[start:end]
+        cs = self._cs[start:end]
+        text = self._text[start:end]
         maxcol = self.cols
 
         widths = []
@@ -398,6 +463,8 @@ class TextCanvas(Canvas):
 
 class BlankCanvas(Canvas):
 
+    __slots__ = ()
+
     def body_content(self, trim_left=0, trim_top=0, cols=None, rows=None, attr=None):
         if cols is None:
             cols = self.cols
@@ -412,7 +479,8 @@ class BlankCanvas(Canvas):
             yield line
 
     def show(self):
-        log.debug("BlankCanvas::show()")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("BlankCanvas::show()")
         self._visible = True
         for child in self._childs:
             child.show()
@@ -481,8 +549,9 @@ def shard_body(cviews, shard_tail, create_iter=True, iter_default=None):
             col += cview.cols
             col_gap -= cview.cols
             if col_gap < 0:
-                log.debug("col_gap = %d", col_gap)
-                log.debug("body = %r", body)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("col_gap = %d", col_gap)
+                    log.debug("body = %r", body)
                 raise CanvasError("cviews overflow gaps in shard_tail!!!")
             if create_iter and cview.canv:
                 new_iter = cview.content()
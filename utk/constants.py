@@ -40,3 +40,20 @@ ORIENTATION_VERTICAL = "orientation-vertical"
 # Pack Type Constants
 PACK_START = "pack-start"
 PACK_END = "pack-end"
+
+# Input Event Kinds
+EVENT_KEY = "event-key"
+EVENT_MOUSE = "event-mouse"
+EVENT_PASTE = "event-paste"
+EVENT_RESIZE = "event-resize"
+EVENT_CURSOR = "event-cursor"
+
+# Modifier Masks
+MODIFIER_SHIFT = 1
+MODIFIER_META = 2
+MODIFIER_CTRL = 4
+
+# Wrap Modes
+WRAP_CHAR = "wrap-char"
+WRAP_WORD = "wrap-word"
+WRAP_CLIP = "wrap-clip"
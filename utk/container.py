@@ -11,17 +11,79 @@
     :license: LGPL2 or later (see README/COPYING/LICENSE)
 """
 
+import heapq
 import logging
 
-import gulib
 from gulib import usignal
+from utk import mainloop, trace, updates
+from utk.profiler import get_profiler
 from utk.widget import Widget
 from utk.canvas import SolidCanvas
 from utk.constants import RESIZE_PARENT, RESIZE_QUEUE, RESIZE_IMMEDIATE, PRIORITY_RESIZE
 
 log = logging.getLogger("utk.container")
 
-_container_resize_queue = []
+
+class ResizeQueue(object):
+    """
+    Resize containers waiting for the idle sizer.
+
+    Containers are processed by tree depth, so an ancestor runs its size
+    negotiation before its descendants, and a descendant whose pending
+    resize was already done by that pass is dropped. A container is queued
+    at most once, using its _resize_pending flag.
+
+    queued -- containers added to the queue
+    processed -- check_resize() passes run
+    avoided -- redundant passes skipped, either because the container was
+               already queued or because an ancestor pass covered it
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._count = 0
+        self.queued = 0
+        self.processed = 0
+        self.avoided = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, container):
+        """Queue container, returns False if it was already queued."""
+        if container._resize_pending:
+            self.avoided += 1
+            return False
+        container._resize_pending = True
+        depth = len(list(container.ancesor_iter()))
+        self._count += 1
+        heapq.heappush(self._heap, (depth, self._count, container))
+        self.queued += 1
+        return True
+
+    def pop(self):
+        container = heapq.heappop(self._heap)[2]
+        container._resize_pending = False
+        return container
+
+    def run(self):
+        """Run check_resize() on every queued container that still needs it."""
+        while self._heap:
+            container = self.pop()
+            if not (container._request_needed or
+                    container._child_request_needed or
+                    container._alloc_needed):
+                self.avoided += 1
+                continue
+            self.processed += 1
+            container.check_resize()
+
+    def get_stats(self):
+        return {"queued": self.queued, "processed": self.processed,
+                "avoided": self.avoided}
+
+
+_container_resize_queue = ResizeQueue()
 
 class Container(Widget):
     __type_name__ = "UtkContainer"
@@ -32,6 +94,9 @@ class Container(Widget):
     usignal("foreach")
     usignal("check-resize")
 
+    __slots__ = ("_focus_child", "_border_width", "_need_resize",
+                 "_resize_mode", "_resize_pending", "_child_requisitions")
+
     def __init__(self):
         super(Container, self).__init__()
         self._focus_child = None
@@ -39,6 +104,7 @@ class Container(Widget):
         self._need_resize = False
         self._resize_mode = RESIZE_PARENT
         self._resize_pending = False
+        self._child_requisitions = None
 
     def get_border_width(self):
         return self._border_width
@@ -64,9 +130,52 @@ class Container(Widget):
     def foreach(self, callback, data=None, include_internals=False):
         self.emit("foreach", callback, data, include_internals)
 
+    def size_request(self):
+        """
+        Returns the container requisition. When only descendants have
+        queued a resize the children are queried again, and the cached
+        requisition is kept if none of theirs changed.
+        """
+        if not self._request_needed and self._requisition is not None:
+            if not self._child_request_needed:
+                return self._requisition
+            self._child_request_needed = False
+            if self._get_child_requisitions() == self._child_requisitions:
+                return self._requisition
+            self._request_needed = True
+        self._child_request_needed = False
+        requisition = super(Container, self).size_request()
+        self._child_requisitions = self._get_child_requisitions()
+        return requisition
+
+    def _get_child_requisitions(self):
+        """
+        Return a list of (child, requisition generation) for the visible
+        children, querying their (possibly cached) requisitions.
+        """
+        requisitions = []
+        def query_child(child, data):
+            if child.is_visible:
+                child.size_request()
+                requisitions.append((child, child._requisition_gen))
+        self.foreach(query_child)
+        return requisitions
+
     def check_resize(self):
-        log.debug("%s::check_resize()" % self.name)
-        self.emit("check-resize")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::check_resize()", self.name)
+        tstart = trace.now() if trace.enabled else None
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.begin("layout")
+        try:
+            self.emit("check-resize")
+        finally:
+            if profiler is not None:
+                profiler.end("layout")
+        if tstart is not None:
+            trace.complete("check_resize", tstart, "layout",
+                           widget=self.name)
 
     # "check-resize" signal handler
     def do_check_resize(self):
@@ -128,12 +237,13 @@ class Container(Widget):
         return None
 
     def _container_queue_resize(self):
-        log.debug("%s::_container_queue_resize()" % self.name)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::_container_queue_resize()", self.name)
         resize_container = self.get_resize_container()
         widget = self
         while True:
             widget._alloc_needed = True
-            widget._request_needed = True
+            widget._child_request_needed = True
             if (resize_container and widget == resize_container) or\
                 not widget._parent:
                     break
@@ -142,12 +252,11 @@ class Container(Widget):
             if resize_container.is_visible and\
               (resize_container.is_toplevel or resize_container.is_realized):
                   if resize_container._resize_mode == RESIZE_QUEUE:
-                      if not resize_container._resize_pending:
-                          resize_container._resize_pending = True
-                          if not _container_resize_queue:
+                      if not _container_resize_queue:
+                          if log.isEnabledFor(logging.DEBUG):
                               log.debug("Adding idle_sizer to loop")
-                              gulib.idle_add(self._idle_sizer, priority=PRIORITY_RESIZE)
-                          _container_resize_queue.append(resize_container)
+                          mainloop.idle_add(self._idle_sizer, priority=PRIORITY_RESIZE)
+                      _container_resize_queue.push(resize_container)
                   elif resize_container._resize_mode == RESIZE_IMMEDIATE:
                       resize_container.check_resize()
                   else:
@@ -156,10 +265,11 @@ class Container(Widget):
                 resize_container._need_resize = True
 
     def _idle_sizer(self):
-        log.debug("%s::_idle_sizer() running", self.name)
-        while _container_resize_queue:
-            resize = _container_resize_queue.pop(0)
-            resize._resize_pending = False
-            resize.check_resize()
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::_idle_sizer() running", self.name)
+        if updates.is_frozen():
+            # thaw_updates() runs the queue
+            return False
+        _container_resize_queue.run()
         # process all canvas updates
         return False
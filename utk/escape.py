@@ -26,6 +26,10 @@ Terminal Escape Sequences for input and display
 from __future__ import unicode_literals
 
 import re
+import sys
+import zlib
+import binascii
+from array import array
 
 from utk import str_util
 from gulib.compat import bytes
@@ -65,107 +69,155 @@ def escape_modifier( digit ):
     return "shift "*(mode&1) + "meta "*((mode&2)//2) + "ctrl "*((mode&4)//4)
 
 
-input_sequences = [
-    ('[A','up'),('[B','down'),('[C','right'),('[D','left'),
-    ('[E','5'),('[F','end'),('[G','5'),('[H','home'),
-
-    ('[1~','home'),('[2~','insert'),('[3~','delete'),('[4~','end'),
-    ('[5~','page up'),('[6~','page down'),
-    ('[7~','home'),('[8~','end'),
-
-    ('[[A','f1'),('[[B','f2'),('[[C','f3'),('[[D','f4'),('[[E','f5'),
-
-    ('[11~','f1'),('[12~','f2'),('[13~','f3'),('[14~','f4'),
-    ('[15~','f5'),('[17~','f6'),('[18~','f7'),('[19~','f8'),
-    ('[20~','f9'),('[21~','f10'),('[23~','f11'),('[24~','f12'),
-    ('[25~','f13'),('[26~','f14'),('[28~','f15'),('[29~','f16'),
-    ('[31~','f17'),('[32~','f18'),('[33~','f19'),('[34~','f20'),
-
-    ('OA','up'),('OB','down'),('OC','right'),('OD','left'),
-    ('OH','home'),('OF','end'),
-    ('OP','f1'),('OQ','f2'),('OR','f3'),('OS','f4'),
-    ('Oo','/'),('Oj','*'),('Om','-'),('Ok','+'),
-
-    ('[Z','shift tab'),
-    ('On', '.'),
-] + [
-    (prefix + letter, modifier + key)
-    for prefix, modifier in zip('O[', ('meta ', 'shift '))
-    for letter, key in zip('abcd', ('up', 'down', 'right', 'left'))
-] + [
-    ("[" + digit + symbol, modifier + key)
-    for modifier, symbol in zip(('shift ', 'meta '), '$^')
-    for digit, key in zip('235678',
-        ('insert', 'delete', 'page up', 'page down', 'home', 'end'))
-] + [
-    ('O' + chr(ord('p')+n), str(n)) for n in range(10)
-] + [
-    # modified cursor keys + home, end, 5 -- [#X and [1;#X forms
-    (prefix+digit+letter, escape_modifier(digit) + key)
-    for prefix in ("[", "[1;")
-    for digit in "12345678"
-    for letter,key in zip("ABCDEFGH",
-        ('up','down','right','left','5','end','5','home'))
-] + [
-    # modified F1-F4 keys -- O#X form
-    ("O"+digit+letter, escape_modifier(digit) + key)
-    for digit in "12345678"
-    for letter,key in zip("PQRS",('f1','f2','f3','f4'))
-] + [
-    # modified F1-F13 keys -- [XX;#~ form
-    ("["+str(num)+";"+digit+"~", escape_modifier(digit) + key)
-    for digit in "12345678"
-    for num,key in zip(
-        (3,5,6,11,12,13,14,15,17,18,19,20,21,23,24,25,26,28,29,31,32,33,34),
-        ('delete', 'page up', 'page down',
-        'f1','f2','f3','f4','f5','f6','f7','f8','f9','f10','f11',
-        'f12','f13','f14','f15','f16','f17','f18','f19','f20'))
-] + [
-    # mouse reporting (special handling done in KeyqueueTrie)
-    ('[M', 'mouse'),
-    # report status response
-    ('[0n', 'status ok')
-]
-
-class KeyqueueTrie(object):
-    def __init__( self, sequences ):
-        self.data = {}
-        for s, result in sequences:
-            assert type(result) != dict
-            self.add(self.data, s, result)
-
-    def add(self, root, s, result):
-        assert type(root) == dict, "trie conflict detected"
+def _build_input_sequences():
+    """
+    Returns the (escape sequence, key) pairs of the input, built when
+    first needed instead of at import.
+    """
+    return [
+        ('[A','up'),('[B','down'),('[C','right'),('[D','left'),
+        ('[E','5'),('[F','end'),('[G','5'),('[H','home'),
+
+        ('[1~','home'),('[2~','insert'),('[3~','delete'),('[4~','end'),
+        ('[5~','page up'),('[6~','page down'),
+        ('[7~','home'),('[8~','end'),
+
+        ('[[A','f1'),('[[B','f2'),('[[C','f3'),('[[D','f4'),('[[E','f5'),
+
+        ('[11~','f1'),('[12~','f2'),('[13~','f3'),('[14~','f4'),
+        ('[15~','f5'),('[17~','f6'),('[18~','f7'),('[19~','f8'),
+        ('[20~','f9'),('[21~','f10'),('[23~','f11'),('[24~','f12'),
+        ('[25~','f13'),('[26~','f14'),('[28~','f15'),('[29~','f16'),
+        ('[31~','f17'),('[32~','f18'),('[33~','f19'),('[34~','f20'),
+
+        ('OA','up'),('OB','down'),('OC','right'),('OD','left'),
+        ('OH','home'),('OF','end'),
+        ('OP','f1'),('OQ','f2'),('OR','f3'),('OS','f4'),
+        ('Oo','/'),('Oj','*'),('Om','-'),('Ok','+'),
+
+        ('[Z','shift tab'),
+        ('On', '.'),
+    ] + [
+        (prefix + letter, modifier + key)
+        for prefix, modifier in zip('O[', ('meta ', 'shift '))
+        for letter, key in zip('abcd', ('up', 'down', 'right', 'left'))
+    ] + [
+        ("[" + digit + symbol, modifier + key)
+        for modifier, symbol in zip(('shift ', 'meta '), '$^')
+        for digit, key in zip('235678',
+            ('insert', 'delete', 'page up', 'page down', 'home', 'end'))
+    ] + [
+        ('O' + chr(ord('p')+n), str(n)) for n in range(10)
+    ] + [
+        # modified cursor keys + home, end, 5 -- [#X and [1;#X forms
+        (prefix+digit+letter, escape_modifier(digit) + key)
+        for prefix in ("[", "[1;")
+        for digit in "12345678"
+        for letter,key in zip("ABCDEFGH",
+            ('up','down','right','left','5','end','5','home'))
+    ] + [
+        # modified F1-F4 keys -- O#X form
+        ("O"+digit+letter, escape_modifier(digit) + key)
+        for digit in "12345678"
+        for letter,key in zip("PQRS",('f1','f2','f3','f4'))
+    ] + [
+        # modified F1-F13 keys -- [XX;#~ form
+        ("["+str(num)+";"+digit+"~", escape_modifier(digit) + key)
+        for digit in "12345678"
+        for num,key in zip(
+            (3,5,6,11,12,13,14,15,17,18,19,20,21,23,24,25,26,28,29,31,32,33,34),
+            ('delete', 'page up', 'page down',
+            'f1','f2','f3','f4','f5','f6','f7','f8','f9','f10','f11',
+            'f12','f13','f14','f15','f16','f17','f18','f19','f20'))
+    ] + [
+        # mouse reporting (special handling done in KeyqueueTrie)
+        ('[M', 'mouse'),
+        ('[<', 'sgrmouse'),
+        # bracketed paste markers (content is read with process_paste)
+        ('[200~', 'begin paste'),
+        ('[201~', 'end paste'),
+        # report status response
+        ('[0n', 'status ok')
+    ]
+
+def compile_sequences(sequences):
+    """
+    Compile a list of (escape sequence, result) pairs into the flat
+    transition tables used by KeyqueueTrie.
+
+    returns (classes, num_classes, transitions, results) where classes
+    maps every byte value to a column (0 for bytes not used by any
+    sequence), transitions holds num_classes columns per state with the
+    next state number, or -(result index + 1) when the sequence is
+    complete, and results is a tuple with the results.  State 0 is the
+    initial state and is never the target of a transition.
+    """
+    chars = sorted(set(c for s, result in sequences for c in s))
+    classes = bytearray(256)
+    for i, c in enumerate(chars):
+        classes[ord(c)] = i + 1
+    num_classes = len(chars) + 1
+
+    transitions = array('h', [0] * num_classes)
+    results = []
+    for s, result in sequences:
         assert len(s) > 0, "trie conflict detected"
+        state = 0
+        for c in s[:-1]:
+            pos = state * num_classes + classes[ord(c)]
+            assert transitions[pos] >= 0, "trie conflict detected"
+            if not transitions[pos]:
+                transitions[pos] = len(transitions) // num_classes
+                transitions.extend([0] * num_classes)
+            state = transitions[pos]
+        pos = state * num_classes + classes[ord(s[-1])]
+        assert not transitions[pos], "trie conflict detected"
+        results.append(result)
+        transitions[pos] = -len(results)
+    return classes, num_classes, transitions, tuple(results)
 
-        if ord(s[0]) in root:
-            return self.add(root[ord(s[0])], s[1:], result)
-        if len(s)>1:
-            d = {}
-            root[ord(s[0])] = d
-            return self.add(d, s[1:], result)
-        root[ord(s)] = result
+
+class KeyqueueTrie(object):
+    def __init__(self, sequences=None, table=None):
+        """
+        sequences -- list of (escape sequence, result) pairs
+        table -- tables already built by compile_sequences(), used
+            instead of sequences
+        """
+        if table is None:
+            table = compile_sequences(sequences)
+        self.classes, self.num_classes, self.transitions, self.results = table
 
     def get(self, keys, more_available):
-        result = self.get_recurse(self.data, keys, more_available)
+        result = self.get_sequence(keys, more_available)
         if not result:
             result = self.read_cursor_position(keys, more_available)
         return result
 
-    def get_recurse(self, root, keys, more_available):
-        if type(root) != dict:
-            if root == "mouse":
-                return self.read_mouse_info(keys,
-                    more_available)
-            return (root, keys)
-        if not keys:
-            # get more keys
-            if more_available:
-                raise MoreInputRequired()
-            return None
-        if keys[0] not in root:
-            return None
-        return self.get_recurse(root[keys[0]], keys[1:], more_available)
+    def get_sequence(self, keys, more_available):
+        classes = self.classes
+        num_classes = self.num_classes
+        transitions = self.transitions
+        state = 0
+        i = 0
+        for k in keys:
+            i += 1
+            if k < 0 or k > 255:
+                return None
+            state = transitions[state * num_classes + classes[k]]
+            if state < 0:
+                result = self.results[-state - 1]
+                if result == "mouse":
+                    return self.read_mouse_info(keys[i:], more_available)
+                if result == "sgrmouse":
+                    return self.read_sgr_mouse_info(keys[i:], more_available)
+                return (result, keys[i:])
+            if not state:
+                return None
+        # get more keys
+        if more_available:
+            raise MoreInputRequired()
+        return None
 
     def read_mouse_info(self, keys, more_available):
         if len(keys) < 3:
@@ -176,29 +228,34 @@ class KeyqueueTrie(object):
         b = keys[0] - 32
         x, y = (keys[1] - 33)%256, (keys[2] - 33)%256  # supports 0-255
 
-        prefix = ""
-        if b & 4:    prefix = prefix + "shift "
-        if b & 8:    prefix = prefix + "meta "
-        if b & 16:    prefix = prefix + "ctrl "
-        if (b & MOUSE_MULTIPLE_CLICK_MASK)>>9 == 1:    prefix = prefix + "double "
-        if (b & MOUSE_MULTIPLE_CLICK_MASK)>>9 == 2:    prefix = prefix + "triple "
-
-        # 0->1, 1->2, 2->3, 64->4, 65->5
-        button = ((b&64)/64*3) + (b & 3) + 1
-
-        if b & 3 == 3:
-            action = "release"
-            button = 0
-        elif b & MOUSE_RELEASE_FLAG:
-            action = "release"
-        elif b & MOUSE_DRAG_FLAG:
-            action = "drag"
-        elif b & MOUSE_MULTIPLE_CLICK_MASK:
-            action = "click"
-        else:
-            action = "press"
+        return (mouse_event(b, x, y), keys[3:])
 
-        return ( (prefix + "mouse " + action, button, x, y), keys[3:] )
+    def read_sgr_mouse_info(self, keys, more_available):
+        """
+        Interpret SGR (1006) extended mouse reports ESC[<b;x;yM for
+        press, drag and motion and ESC[<b;x;ym for release.  These are
+        not limited to 223 columns/rows like the legacy form.
+        """
+        values = [0]
+        i = 0
+        for k in keys:
+            i += 1
+            if k == ord(';'):
+                if len(values) == 3:
+                    return None
+                values.append(0)
+            elif k >= ord('0') and k <= ord('9'):
+                values[-1] = values[-1] * 10 + k - ord('0')
+            elif k in (ord('M'), ord('m')) and len(values) == 3:
+                b, x, y = values
+                if k == ord('m'):
+                    b |= MOUSE_RELEASE_FLAG
+                return (mouse_event(b, max(x-1, 0), max(y-1, 0)), keys[i:])
+            else:
+                return None
+        if more_available:
+            raise MoreInputRequired()
+        return None
 
     def read_cursor_position(self, keys, more_available):
         """
@@ -269,9 +326,121 @@ MOUSE_MULTIPLE_CLICK_FLAG = 512
 MOUSE_DRAG_FLAG = 32
 
 
+def mouse_event(b, x, y):
+    """
+    Return the mouse event tuple for xterm button value b at column x
+    and row y, eg. ('ctrl mouse drag', 1, 18, 13).
+    """
+    prefix = ""
+    if b & 4:    prefix = prefix + "shift "
+    if b & 8:    prefix = prefix + "meta "
+    if b & 16:    prefix = prefix + "ctrl "
+    if (b & MOUSE_MULTIPLE_CLICK_MASK)>>9 == 1:    prefix = prefix + "double "
+    if (b & MOUSE_MULTIPLE_CLICK_MASK)>>9 == 2:    prefix = prefix + "triple "
+
+    # 0->1, 1->2, 2->3, 64->4, 65->5
+    button = ((b&64)//64*3) + (b & 3) + 1
+
+    if b & 3 == 3 and b & MOUSE_DRAG_FLAG:
+        # pointer moved with no button pressed (any-motion tracking)
+        action = "motion"
+        button = 0
+    elif b & 3 == 3:
+        action = "release"
+        button = 0
+    elif b & MOUSE_RELEASE_FLAG:
+        action = "release"
+    elif b & MOUSE_DRAG_FLAG:
+        action = "drag"
+    elif b & MOUSE_MULTIPLE_CLICK_MASK:
+        action = "click"
+    else:
+        action = "press"
+
+    return (prefix + "mouse " + action, button, x, y)
+
+
+def coalesce_mouse_events(keys):
+    """
+    Return keys with runs of consecutive mouse drag or motion events of
+    the same button replaced by the last event of each run.
+
+    Other events and their order are left untouched, so a press or a
+    release always sees the position it was reported at.
+    """
+    result = []
+    for key in keys:
+        if (type(key) == tuple and len(key) == 4 and
+            key[0].endswith(("mouse drag", "mouse motion")) and
+            result and type(result[-1]) == tuple and
+            result[-1][0] == key[0] and result[-1][1] == key[1]):
+            result[-1] = key
+        else:
+            result.append(key)
+    return result
+
+
+def write_input_table(filename):
+    """
+    Write the module with the compiled input_sequences tables that is
+    loaded instead of compiling them on every import.  Run again after
+    changing input_sequences:
+
+        python -m utk.escape utk/_keytable.py
+    """
+    classes, num_classes, transitions, results = \
+        compile_sequences(_build_input_sequences())
+    transitions = array('h', transitions)
+    if sys.byteorder == 'big':
+        transitions.byteswap()
+
+    classes = bytearray(classes)
+    data = binascii.b2a_base64(zlib.compress(transitions.tobytes(), 9))
+    data = data.decode('ascii').strip()
+
+    with open(filename, "w") as f:
+        f.write("# -*- coding: utf-8 -*-\n"
+                "# Generated by utk.escape.write_input_table(), do not edit.\n"
+                "\n"
+                "import sys\n"
+                "import zlib\n"
+                "from array import array\n"
+                "from binascii import a2b_base64\n"
+                "\n")
+        f.write("CLASSES = bytearray((\n")
+        for i in range(0, len(classes), 16):
+            f.write("    %s,\n" % ", ".join("%d" % c for c in classes[i:i+16]))
+        f.write("))\n\n")
+        f.write("NUM_CLASSES = %d\n\n" % num_classes)
+        f.write("# zlib compressed little-endian signed 16 bit values\n")
+        f.write("TRANSITIONS = array('h', zlib.decompress(a2b_base64(\n")
+        for i in range(0, len(data), 64):
+            f.write("    b'%s'\n" % data[i:i+64])
+        f.write(")))\n"
+                "if sys.byteorder == 'big':\n"
+                "    TRANSITIONS.byteswap()\n\n")
+        f.write("RESULTS = (\n")
+        for result in results:
+            f.write("    %r,\n" % str(result))
+        f.write(")\n")
+
+
 #################################################
-# Build the input trie from input_sequences list
-input_trie = KeyqueueTrie(input_sequences)
+# The input trie built from input_sequences, loaded on first use
+_input_trie = None
+
+def get_input_trie():
+    """Returns the KeyqueueTrie decoding the input escape sequences."""
+    global _input_trie
+    if _input_trie is None:
+        try:
+            from utk._keytable import CLASSES, NUM_CLASSES, TRANSITIONS, \
+                RESULTS
+            _input_trie = KeyqueueTrie(table=(CLASSES, NUM_CLASSES,
+                                              TRANSITIONS, RESULTS))
+        except ImportError:
+            _input_trie = KeyqueueTrie(_build_input_sequences())
+    return _input_trie
 #################################################
 
 _keyconv = {
@@ -370,7 +539,7 @@ def process_keyqueue(codes, more_available):
     if code != 27:
         return ["<%d>"%code], codes[1:]
 
-    result = input_trie.get(codes[1:], more_available)
+    result = get_input_trie().get(codes[1:], more_available)
 
     if result is not None:
         result, remaining_codes = result
@@ -387,6 +556,44 @@ def process_keyqueue(codes, more_available):
     return ['esc'], codes[1:]
 
 
+# Sent by the terminal after the pasted text when bracketed paste is enabled
+PASTE_END = b"\x1b[201~"
+
+# Maximum size of each ('paste', bytes) event
+PASTE_CHUNK_SIZE = 4096
+
+def process_paste(codes, chunk_size=PASTE_CHUNK_SIZE):
+    """
+    codes -- list of key codes received after a 'begin paste' marker
+    chunk_size -- maximum number of bytes delivered by each paste event
+
+    returns (list of ('paste', bytes) events, list of remaining key codes,
+        True if the end paste marker was found).
+
+    Pasted text is not interpreted as keys. When the codes end with an
+    incomplete end paste marker those codes are returned as remaining so
+    the caller can retry once more input arrives.
+    """
+    data = bytes(codes)
+    end = data.find(PASTE_END)
+    if end >= 0:
+        content = data[:end]
+        remaining_codes = codes[end+len(PASTE_END):]
+        done = True
+    else:
+        keep = 0
+        for k in range(min(len(PASTE_END)-1, len(data)), 0, -1):
+            if data.endswith(PASTE_END[:k]):
+                keep = k
+                break
+        content = data[:len(data)-keep]
+        remaining_codes = codes[len(codes)-keep:]
+        done = False
+    run = [('paste', content[i:i+chunk_size])
+           for i in range(0, len(content), chunk_size)]
+    return run, remaining_codes, done
+
+
 ####################
 ## Output sequences
 ####################
@@ -431,9 +638,33 @@ def move_cursor_down(x):
 HIDE_CURSOR = ESC+"[?25l"
 SHOW_CURSOR = ESC+"[?25h"
 
-MOUSE_TRACKING_ON = ESC+"[?1000h"+ESC+"[?1002h"
-MOUSE_TRACKING_OFF = ESC+"[?1002l"+ESC+"[?1000l"
+MOUSE_TRACKING_ON = ESC+"[?1000h"+ESC+"[?1002h"+ESC+"[?1006h"
+MOUSE_MOTION_TRACKING_ON = ESC+"[?1003h"
+MOUSE_TRACKING_OFF = (ESC+"[?1006l"+ESC+"[?1003l"+ESC+"[?1002l"+
+                      ESC+"[?1000l")
+
+BRACKETED_PASTE_ON = ESC+"[?2004h"
+BRACKETED_PASTE_OFF = ESC+"[?2004l"
 
 DESIGNATE_G1_SPECIAL = ESC+")0"
 
 ERASE_IN_LINE_RIGHT = ESC+"[K"
+
+
+def __getattr__(name):
+    # input_sequences and input_trie are only built when used (PEP 562)
+    if name == "input_sequences":
+        value = globals()[name] = _build_input_sequences()
+        return value
+    if name == "input_trie":
+        return get_input_trie()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+if sys.version_info < (3, 7):
+    # no module __getattr__
+    input_sequences = _build_input_sequences()
+    input_trie = get_input_trie()
+
+
+if __name__ == "__main__":
+    write_input_table(sys.argv[1])
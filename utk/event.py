@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.event
+    ~~~~~~~~~
+
+    Input events read from the screen.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+from collections import namedtuple
+
+from utk.constants import (
+    EVENT_KEY, EVENT_MOUSE, EVENT_PASTE, EVENT_RESIZE, EVENT_CURSOR,
+    MODIFIER_SHIFT, MODIFIER_META, MODIFIER_CTRL,
+)
+
+_MODIFIER_PREFIXES = (
+    ("shift ", MODIFIER_SHIFT),
+    ("meta ", MODIFIER_META),
+    ("ctrl ", MODIFIER_CTRL),
+)
+
+_InputEvent = namedtuple("InputEvent",
+                         "kind key button x y modifiers timestamp")
+
+class InputEvent(_InputEvent):
+    """
+    A single input event.
+
+    kind -- one of the EVENT_* constants
+    key -- key name without modifiers for key events ('a', 'up', 'f1'),
+           the action for mouse events ('press', 'drag', 'double click'),
+           the pasted bytes for paste events
+    button -- mouse button number, 0 when unknown or not a mouse event
+    x, y -- mouse or cursor position, -1 when not available
+    modifiers -- MODIFIER_* mask
+    timestamp -- time.time() when the input was read
+    """
+    __slots__ = ()
+
+    def __new__(cls, kind, key=None, button=0, x=-1, y=-1, modifiers=0,
+                timestamp=None):
+        return _InputEvent.__new__(cls, kind, key, button, x, y, modifiers,
+                                   timestamp)
+
+
+def split_modifiers(name):
+    """
+    Return (modifiers mask, name without modifier prefixes) for a key or
+    mouse event name, eg. 'ctrl meta up' -> (6, 'up').
+    """
+    modifiers = 0
+    found = True
+    while found:
+        found = False
+        for prefix, mask in _MODIFIER_PREFIXES:
+            if name.startswith(prefix) and len(name) > len(prefix):
+                modifiers |= mask
+                name = name[len(prefix):]
+                found = True
+    return modifiers, name
+
+
+def make_event(key, timestamp=None):
+    """
+    Return the InputEvent for a key as returned by Screen.get_input().
+    """
+    if isinstance(key, tuple):
+        name = key[0]
+        if name == 'paste':
+            return InputEvent(EVENT_PASTE, key[1], timestamp=timestamp)
+        if name == 'cursor position':
+            return InputEvent(EVENT_CURSOR, name, x=key[1], y=key[2],
+                              timestamp=timestamp)
+        modifiers, name = split_modifiers(name)
+        return InputEvent(EVENT_MOUSE, name.replace("mouse ", ""),
+                          key[1], key[2], key[3], modifiers, timestamp)
+    if key == 'window resize':
+        return InputEvent(EVENT_RESIZE, key, timestamp=timestamp)
+    modifiers, name = split_modifiers(key)
+    return InputEvent(EVENT_KEY, name, modifiers=modifiers,
+                      timestamp=timestamp)
+
+
+def make_events(keys, timestamp=None):
+    """Return a list of InputEvent for the list of keys read together."""
+    return [make_event(key, timestamp) for key in keys]
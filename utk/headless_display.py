@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.headless_display
+    ~~~~~~~~~~~~~~~~~~~~
+
+    A screen that draws to memory instead of a terminal.
+
+    UtkHeadlessScreen encodes each frame exactly as the raw display does,
+    but counts the bytes and escape sequences instead of writing them, and
+    keeps the drawn cells so they can be inspected. Its size is whatever it
+    is told and its input is scripted, so drawing can be tested and
+    measured deterministically without a tty.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import time
+import logging
+from collections import deque
+
+from gulib.compat import b
+
+from utk import escape
+from utk.raw_display import Screen as RawScreen
+from utk.utils import calc_text_pos, calc_width
+
+log = logging.getLogger("utk.headless_display")
+
+
+class Screen(RawScreen):
+    """
+    In memory screen of cols x rows cells.
+    """
+    __type_name__ = "UtkHeadlessScreen"
+
+    def __init__(self, cols=80, rows=24):
+        super(Screen, self).__init__()
+        self._cols = cols
+        self._rows = rows
+        self._input = deque()
+        # don't depend on $TERM, so the output is the same everywhere
+        self.bright_is_bold = False
+        self.back_color_erase = True
+        self.reset_counters()
+
+    def _open_resize_pipe(self):
+        # no SIGWINCH handler and no input descriptors to wake up
+        return None, None
+
+    def reset_counters(self):
+        """Set the output counters back to zero."""
+        self.bytes_written = 0
+        self.escapes_written = 0
+        self.frames_written = 0
+
+    def write(self, data):
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        with self._output_lock:
+            self.bytes_written += len(data)
+            self.escapes_written += data.count(b(escape.ESC))
+            if self._recorder is not None:
+                self._recorder.output(data)
+
+    def flush(self):
+        with self._output_lock:
+            if self._recorder is not None:
+                self._recorder.flush_output()
+
+    def set_cols_rows(self, cols, rows):
+        """
+        Resize the screen, a 'window resize' key is queued as a terminal
+        would do.
+        """
+        if (cols, rows) != (self._cols, self._rows):
+            self._cols = cols
+            self._rows = rows
+            self._clear_screen_buf()
+            self._record_resize(cols, rows)
+            self.feed_keys(['window resize'])
+
+    def feed_keys(self, keys):
+        """Queue keys to be returned by a future call to get_input()."""
+        self._input.append((list(keys), []))
+
+    def feed_data(self, data):
+        """
+        Queue data as if it was typed in the terminal, it's decoded into
+        keys like the raw display input.
+        """
+        codes = list(bytearray(b(data)))
+        keys = []
+        remaining = codes
+        while remaining:
+            run, remaining = self._process_input(remaining, False)
+            keys.extend(run)
+        if self.coalesce_mouse:
+            keys = escape.coalesce_mouse_events(keys)
+        self._input.append((keys, codes))
+
+    def get_input(self, raw_keys=False):
+        """
+        Return the next batch of queued input, or an empty list without
+        waiting when there is none.
+        """
+        assert self.started
+        keys, raw = [], []
+        if self._input:
+            keys, raw = self._input.popleft()
+            self.input_received(time.time())
+            if raw:
+                self._record_input(bytearray(raw))
+        if raw_keys:
+            return keys, raw
+        return keys
+
+    def get_input_descriptors(self):
+        return []
+
+    def get_input_nonblocking(self):
+        assert self.started
+        return (None,) + tuple(self.get_input(raw_keys=True))
+
+    def get_text(self):
+        """Return the drawn text of each row."""
+        if not self._screen_buf:
+            return [b(" ") * self._cols for y in range(self._rows)]
+        return [b("").join(run for a, cs, run in row)
+                for row in self._screen_buf]
+
+    def get_cell(self, x, y):
+        """
+        Return the (attribute, charset, text) drawn at column x of row y.
+        For the right half of a wide char the text is empty.
+        """
+        if not self._screen_buf:
+            return (None, None, b(" "))
+        col = 0
+        for a, cs, run in self._screen_buf[y]:
+            width = calc_width(run, 0, len(run))
+            if x < col + width:
+                start, start_col = calc_text_pos(run, 0, len(run), x - col)
+                if start_col < x - col:
+                    return (a, cs, b(""))
+                end, end_col = calc_text_pos(run, start, len(run), 1)
+                if end == start:
+                    end, end_col = calc_text_pos(run, start, len(run), 2)
+                return (a, cs, run[start:end])
+            col += width
+        raise IndexError("column %d out of range" % x)
+
+    # "start" signal handler
+    def do_start(self):
+        assert not self.started
+        self._rows_used = None
+        self._pasting = False
+        self._paste_codes = []
+        self._started = True
+        self._start_render_thread()
+
+    # "stop" signal handler
+    def do_stop(self):
+        self._stop_render_thread()
+        self.clear()
+        if not self.started:
+            return
+        self._started = False
+        self.stop_recording()
+
+    # "get-cols-rows" signal handler
+    def do_get_cols_rows(self):
+        return self._cols, self._rows
+
+    # "draw-screen" signal handler
+    def do_draw_screen(self):
+        super(Screen, self).do_draw_screen()
+        self.frames_written += 1
+
+    def signal_init(self):
+        pass
+
+    def signal_restore(self):
+        pass
@@ -5,14 +5,22 @@ from gulib.compat import b, s
 from utk.misc import Misc
 from utk.utils import Requisition
 from utk.canvas import TextCanvas
+from utk.constants import WRAP_CHAR, WRAP_WORD, WRAP_CLIP
+from utk.text_layout import default_layout
 
 
 class Label(Misc):
     __type_name__ = "UtkLabel"
 
+    __slots__ = ("_text", "_wrap_mode", "_lines", "_lines_key", "_allocated")
+
     def __init__(self, text=""):
         super(Label, self).__init__()
         self._text = b(text)
+        self._wrap_mode = WRAP_CLIP
+        self._lines = None
+        self._lines_key = None
+        self._allocated = False
 
     def get_text(self):
         return s(self._text)
@@ -26,28 +34,94 @@ class Label(Misc):
         if text != self._text:
             self._text = text
             if self.is_realized:
-                self.canvas._text = [self._text]
+                self._update_canvas()
             self.notify("text")
             self.queue_resize()
             self.queue_draw()
 
     text = property(get_text, set_text)
 
+    def get_wrap_mode(self):
+        return self._wrap_mode
+
+    def set_wrap_mode(self, wrap_mode):
+        """
+        Sets how lines wider than the label are broken: WRAP_WORD breaks
+        them at spaces, WRAP_CHAR at any character and WRAP_CLIP doesn't
+        break them.
+        """
+        assert wrap_mode in (WRAP_CHAR, WRAP_WORD, WRAP_CLIP)
+        if wrap_mode != self._wrap_mode:
+            self._wrap_mode = wrap_mode
+            self.notify("wrap-mode")
+            if self.is_realized:
+                self._update_canvas()
+            self.queue_resize()
+            self.queue_draw()
+
+    wrap_mode = property(get_wrap_mode, set_wrap_mode)
+
+    def _get_text_width(self):
+        """Returns the width available for the text, None if unknown."""
+        if not self._allocated:
+            return None
+        return max(1, self._allocation.width - self.xpad*2)
+
+    def get_lines(self, width=None):
+        """
+        Returns the text of each screen line when laid out in width
+        columns, by default the allocated width.
+        """
+        if width is None:
+            width = self._get_text_width()
+        key = (self._text, width, self._wrap_mode)
+        if key != self._lines_key:
+            text = self._text
+            self._lines = [text[start:end] for start, end in
+                           default_layout.layout(text, width, self._wrap_mode)]
+            self._lines_key = key
+        return self._lines
+
+    def _update_canvas(self):
+        pad = b(" ") * self.xpad
+        text = [b("")] * self.ypad
+        text.extend(pad + line for line in self.get_lines())
+        self.canvas.set_text(text[:self.canvas.rows])
+
     # "size-request" signal handler
     def do_size_request(self):
-        text_lines = self.text.split('\n')
-        text_width = max([len(l) for l in text_lines])
-        req = Requisition(text_width, len(text_lines))
+        text_width = default_layout.text_width(self._text)
+        if self._wrap_mode == WRAP_CLIP:
+            text_height = self._text.count(b("\n")) + 1
+        else:
+            # height for the allocated width, a resize is queued when
+            # the allocation changes it
+            text_height = len(self.get_lines())
+        req = Requisition(text_width, text_height)
         req = req._replace(width=self.xpad+req.width+self.xpad,
                            height=self.ypad+req.height+self.ypad)
         return req
 
+    # "size-allocate" signal handler
+    def do_size_allocate(self, allocation):
+        old_allocation = self._allocation
+        self._allocated = True
+        super(Label, self).do_size_allocate(allocation)
+        if self.is_realized:
+            self._update_canvas()
+        if old_allocation.width == allocation.width:
+            return
+        if self._wrap_mode != WRAP_CLIP and self._requisition is not None and\
+           len(self.get_lines()) + self.ypad*2 != self._requisition.height:
+            self.queue_resize()
+
     # "realize" signal handler
     def do_realize(self):
         assert self.canvas is None
         self._realized = True
-        self.canvas = TextCanvas(text=[self._text],
+        self.canvas = TextCanvas(text=[],
                                  left=self._allocation.x,
                                  top=self._allocation.y,
                                  cols=self._allocation.width,
                                  rows=self._allocation.height)
+        self._update_canvas()
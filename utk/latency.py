@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.latency
+    ~~~~~~~~~~~
+
+    Input to screen latency statistics.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import math
+from collections import deque, namedtuple
+
+# phases of a latency sample, in seconds:
+#   wait -- from input read to the start of draw_screen (event handling,
+#           idle queue and size negotiation)
+#   compose -- canvas composition and escape encoding
+#   output -- writing the frame to the terminal
+#   total -- from input read to the frame handed to the terminal
+LatencySample = namedtuple("LatencySample", "wait compose output total")
+
+PHASES = LatencySample._fields
+
+
+def percentile(sorted_values, percent):
+    """Return the nearest-rank percent percentile of sorted_values."""
+    if not sorted_values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(sorted_values))) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+class LatencyStats(object):
+    """
+    Keep the last `size` latency samples and compute their percentiles.
+    """
+
+    def __init__(self, size=1000):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, input_time, draw_time, write_time, done_time):
+        """Record the latency of one input batch shown by a frame."""
+        draw_time = max(draw_time, input_time)
+        self._samples.append(LatencySample(draw_time - input_time,
+                                           write_time - draw_time,
+                                           done_time - write_time,
+                                           done_time - input_time))
+        self.count += 1
+
+    def clear(self):
+        self._samples.clear()
+
+    def samples(self):
+        return list(self._samples)
+
+    def percentiles(self, percents=(50, 95, 99)):
+        """
+        Return a {phase: {percent: seconds}} dict for the recorded
+        samples, eg. stats.percentiles()['total'][99].
+        """
+        result = {}
+        for i, phase in enumerate(PHASES):
+            values = sorted(s[i] for s in self._samples)
+            result[phase] = dict((p, percentile(values, p)) for p in percents)
+        return result
+
+    def format(self, percents=(50, 95, 99)):
+        """Return a one line summary in milliseconds."""
+        if not self._samples:
+            return "no samples"
+        pct = self.percentiles(percents)
+        parts = []
+        for phase in PHASES:
+            parts.append("%s %s" % (phase, "/".join(
+                "%.1f" % (pct[phase][p] * 1000) for p in percents)))
+        return "%d samples, p%s ms: %s" % (
+            len(self._samples), "/".join("%d" % p for p in percents),
+            ", ".join(parts))
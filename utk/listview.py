@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.listview
+    ~~~~~~~~~~~~
+
+    A list of text rows that only renders the visible ones.
+
+    UtkListView shows `row_count` rows, each one produced on demand by a
+    row renderer callback or read from a sequence model. Only the rows in
+    the viewport, plus a few overscan rows on each side, have a canvas, and
+    those canvases are recycled as the list scrolls.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import logging
+
+from gulib.compat import b
+
+from utk import updates
+from utk.container import Container
+from utk.utils import Requisition, calc_text_pos
+from utk.canvas import SolidCanvas, TextCanvas
+
+log = logging.getLogger("utk.listview")
+
+
+class ListView(Container):
+    """
+    Container that renders rows of text on demand.
+
+    :row_count: number of rows in the list.
+    :row_renderer: callable returning the text of the row with the given
+                   index, called only for rows about to be shown.
+    :model: a sequence used instead of row_renderer, its length is the
+            row count and its items the rows text.
+    :overscan: rows rendered above and below the viewport so short scrolls
+               don't need to render.
+    """
+    __type_name__ = "UtkListView"
+
+    def __init__(self, row_count=0, row_renderer=None, model=None,
+                 overscan=2):
+        super(ListView, self).__init__()
+        self._row_count = row_count
+        self._row_renderer = row_renderer
+        self._model = None
+        self._overscan = overscan
+        self._top = 0
+        self._row_cols = 0
+        # (top, viewport) the row canvases were laid out for
+        self._rows_layout = None
+        self._row_canvases = {} # row index -> TextCanvas
+        self._free_canvases = []
+        if model is not None:
+            self.set_model(model)
+
+    def get_row_count(self):
+        return self._row_count
+
+    def set_row_count(self, row_count):
+        if self._row_count != row_count:
+            self._row_count = row_count
+            self.notify("row-count")
+            self._set_top(self._top)
+            self.refresh()
+
+    row_count = property(get_row_count, set_row_count)
+
+    def get_model(self):
+        return self._model
+
+    def set_model(self, model):
+        """
+        Use the sequence model for the rows, it's length is read again
+        on :meth:refresh().
+        """
+        self._model = model
+        self._row_renderer = None
+        self._row_count = len(model)
+        self._set_top(self._top)
+        self.refresh()
+
+    model = property(get_model, set_model)
+
+    def set_row_renderer(self, row_renderer):
+        self._row_renderer = row_renderer
+        self._model = None
+        self.refresh()
+
+    def get_top(self):
+        return self._top
+
+    def set_top(self, top):
+        """Scrolls the list to show the row @top at the first line."""
+        if self._set_top(top):
+            self._update_rows()
+
+    top = property(get_top, set_top,
+                   doc="Index of the first visible row")
+
+    def scroll(self, delta):
+        self.set_top(self._top + delta)
+
+    def get_page_rows(self):
+        """Returns the number of rows that fit in the viewport."""
+        return self._get_viewport()[3]
+
+    def _get_viewport(self):
+        """Returns (left, top, cols, rows) of the area where rows scroll."""
+        return (self._allocation.x + self.border_width,
+                self._allocation.y + self.border_width,
+                max(1, self._allocation.width - self.border_width*2),
+                max(0, self._allocation.height - self.border_width*2))
+
+    def _set_top(self, top):
+        top = max(0, min(top, self._row_count - self.get_page_rows()))
+        if top != self._top:
+            self._top = top
+            self.notify("top")
+            return True
+        return False
+
+    def refresh(self, start=0, end=None):
+        """
+        Renders again the rows from @start to @end that have a canvas, call
+        it when the model or renderer output changes.
+        """
+        if self._model is not None:
+            self._row_count = len(self._model)
+        if end is None:
+            end = self._row_count
+        for index in list(self._row_canvases):
+            if start <= index < end:
+                self._recycle_row(index)
+        self._update_rows()
+
+    def _render_row(self, index, cols):
+        if self._row_renderer is not None:
+            text = self._row_renderer(index)
+        elif self._model is not None:
+            text = self._model[index]
+        else:
+            text = ""
+        text = b(text)
+        end, col = calc_text_pos(text, 0, len(text), cols)
+        return text[:end]
+
+    def _recycle_row(self, index):
+        canvas = self._row_canvases.pop(index)
+        if canvas.is_visible:
+            canvas.hide()
+        self._free_canvases.append(canvas)
+
+    def _get_row_canvas(self, index, left, top, cols):
+        text = self._render_row(index, cols)
+        if self._free_canvases:
+            canvas = self._free_canvases.pop()
+            canvas.set_text([text])
+            canvas.resize(cols, 1)
+        else:
+            canvas = TextCanvas(text=[text], left=left, top=top,
+                                cols=cols, rows=1)
+            self.canvas.add_child(canvas)
+        self._row_canvases[index] = canvas
+        return canvas
+
+    def _update_rows(self):
+        """
+        Give a canvas to the rows inside the viewport and the overscan,
+        and recycle the canvases of the rows that left it.
+        """
+        if not self.is_realized:
+            return
+        left, top, cols, rows = self._get_viewport()
+        first = self._top
+        last = min(self._row_count, first + rows)
+        start = max(0, first - self._overscan)
+        end = min(self._row_count, last + self._overscan)
+
+        # the row canvases invalidate what they change, the whole widget
+        # is damaged only when the rows shift
+        layout = (first, (left, top, cols, rows))
+        shifted = layout != self._rows_layout
+        self._rows_layout = layout
+        changed = False
+
+        if cols != self._row_cols:
+            self._row_cols = cols
+            for index in list(self._row_canvases):
+                self._recycle_row(index)
+
+        for index in list(self._row_canvases):
+            if index < start or index >= end:
+                self._recycle_row(index)
+                changed = True
+
+        for index in range(start, end):
+            row_top = top + index - first
+            canvas = self._row_canvases.get(index)
+            if canvas is None:
+                canvas = self._get_row_canvas(index, left, row_top, cols)
+                changed = True
+            if first <= index < last:
+                canvas.move_to(left, row_top)
+                if not canvas.is_visible:
+                    canvas.show()
+                    changed = True
+            elif canvas.is_visible:
+                canvas.hide()
+                changed = True
+        if shifted:
+            self.queue_draw()
+        elif changed:
+            self._queue_screen_draw()
+
+    def _queue_screen_draw(self):
+        """Draws the screen without invalidating the widget area."""
+        if not self.is_realized:
+            return
+        if updates.draws_deferred():
+            updates.defer_resize(self.get_toplevel())
+            return
+        toplevel = self.get_toplevel()
+        if toplevel.is_toplevel:
+            toplevel.queue_screen_draw()
+
+    # "add" signal handler
+    def do_add(self, widget):
+        raise Warning("UtkListView rows are rendered by its row renderer, "
+                      "it can't contain widgets")
+
+    # "remove" signal handler
+    def do_remove(self, widget):
+        raise Warning("UtkListView rows are rendered by its row renderer, "
+                      "it doesn't contain widgets")
+
+    # "foreach" signal handler
+    def do_foreach(self, callback, data=None, include_internals=False):
+        pass
+
+    # "size-request" signal handler
+    def do_size_request(self):
+        return Requisition(1 + self.border_width*2,
+                           min(self._row_count, 1) + self.border_width*2)
+
+    # "size-allocate" signal handler
+    def do_size_allocate(self, allocation):
+        self._allocation = allocation
+        if self.is_realized:
+            self.canvas.move_resize(allocation.x, allocation.y,
+                                    allocation.width, allocation.height)
+        self._set_top(self._top)
+        self._update_rows()
+
+    # "realize" signal handler
+    def do_realize(self):
+        assert self.canvas is None
+        self._realized = True
+        self.canvas = SolidCanvas(' ', None,
+                                  self._allocation.x, self._allocation.y,
+                                  self._allocation.width, self._allocation.height)
+        self._update_rows()
+
+    # "unrealize" signal handler
+    def do_unrealize(self):
+        self._row_canvases.clear()
+        del self._free_canvases[:]
+        self._row_cols = 0
+        self._rows_layout = None
+        super(ListView, self).do_unrealize()
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.logview
+    ~~~~~~~~~~~
+
+    A list view over a memory mapped log file.
+
+    UtkLogView maps the file instead of reading it, and builds the index of
+    line offsets a chunk at a time in idle callbacks, so the first lines
+    can be shown while a multi-gigabyte file is still being indexed. Rows
+    are sliced from the map only when they are shown. With follow enabled
+    the file is polled for growth and the view sticks to its end.
+
+    With a wrap mode other than WRAP_CLIP long lines take several rows.
+    The number of rows of each line is found by utk.text_shaping a chunk
+    of lines at a time, in the executor installed there if any, following
+    the indexing. Lines not shaped yet take one row.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import os
+import re
+import mmap
+import logging
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+from gulib.compat import b
+
+from utk import mainloop, text_shaping
+from utk.constants import WRAP_CHAR, WRAP_WORD, WRAP_CLIP
+from utk.listview import ListView
+from utk.text_layout import default_layout
+from utk.utils import calc_text_pos
+
+log = logging.getLogger("utk.logview")
+
+# typecode of the line offsets array, 64 bits so files over 4 GiB can be
+# indexed where unsigned long is 32 bits
+try:
+    array('Q')
+    _OFFSET_TYPECODE = 'Q'
+except ValueError:
+    _OFFSET_TYPECODE = 'L' # python 2
+
+_newline_re = re.compile(b("\n"))
+
+# bytes indexed by each idle callback
+INDEX_CHUNK_SIZE = 4 * 1024 * 1024
+
+# lines shaped by each text_shaping job
+SHAPE_CHUNK_LINES = 8192
+# shaping jobs submitted to the executor at once
+SHAPE_JOBS = 4
+# seconds a shaping idle callback waits for the executor
+SHAPE_WAIT = 0.005
+
+# a column takes at most this many bytes, used to bound the row slices
+_MAX_BYTES_PER_COL = 4
+
+
+class LogView(ListView):
+    """
+    ListView showing the lines of a file.
+
+    :filename: file to show, see :meth:open().
+    :follow: poll the file for growth and keep the last line visible while
+             the view is scrolled to the end.
+    :poll_interval: seconds between file size checks when following.
+    """
+    __type_name__ = "UtkLogView"
+
+    def __init__(self, filename=None, follow=False, poll_interval=1):
+        super(LogView, self).__init__()
+        self._file = None
+        self._map = None
+        self._size = 0
+        # start offset of each line
+        self._offsets = array(_OFFSET_TYPECODE, [0])
+        self._indexed = 0
+        self._file_id = 0
+        self._indexing = False
+        self._follow = False
+        self._poll_interval = poll_interval
+        self.index_chunk_size = INDEX_CHUNK_SIZE
+        self._wrap_mode = WRAP_CLIP
+        self._shape_source = None
+        self._shape_width = None
+        self._row_starts = array('L', [0]) # first row of each shaped line
+        self._line_widths = array('L')
+        self._shape_jobs = deque() # (first line, end line, future)
+        self._shape_queued = 0 # lines submitted to shape
+        self._shape_id = 0
+        self._shaping = False
+        self.shape_chunk_lines = SHAPE_CHUNK_LINES
+        if filename is not None:
+            self.open(filename)
+        self.set_follow(follow)
+
+    def open(self, filename):
+        """Shows @filename, the line index is built in idle callbacks."""
+        self.close()
+        self._file = open(filename, "rb")
+        self._file_id += 1
+        self._remap()
+        self.notify("filename")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._size = 0
+        self._offsets = array(_OFFSET_TYPECODE, [0])
+        self._indexed = 0
+        self._file_id += 1
+        self._indexing = False
+        self._shape_source = None
+        self._clear_shaping()
+        self.set_row_count(0)
+
+    def get_filename(self):
+        if self._file is not None:
+            return self._file.name
+        return None
+
+    filename = property(get_filename)
+
+    def get_follow(self):
+        return self._follow
+
+    def set_follow(self, follow):
+        if follow == self._follow:
+            return
+        self._follow = follow
+        self.notify("follow")
+        if follow:
+            file_id = self._file_id
+
+            def poll_file():
+                if not self._follow or file_id != self._file_id:
+                    return False
+                self.poll()
+                return True
+
+            mainloop.timeout_add_seconds(self._poll_interval, poll_file)
+            self.set_top(self._row_count)
+
+    follow = property(get_follow, set_follow)
+
+    def get_wrap_mode(self):
+        return self._wrap_mode
+
+    def set_wrap_mode(self, wrap_mode):
+        """
+        Sets how lines wider than the view are shown: WRAP_WORD breaks
+        them at spaces, WRAP_CHAR at any character and WRAP_CLIP cuts them.
+        """
+        assert wrap_mode in (WRAP_CHAR, WRAP_WORD, WRAP_CLIP)
+        if wrap_mode == self._wrap_mode:
+            return
+        self._wrap_mode = wrap_mode
+        self.notify("wrap-mode")
+        if self.is_realized:
+            left, top, cols, rows = self._get_viewport()
+            self._reshape(cols, rows)
+        else:
+            self._shape_width = None
+            self._clear_shaping()
+            self._update_row_count()
+        self.refresh()
+
+    wrap_mode = property(get_wrap_mode, set_wrap_mode)
+
+    @property
+    def is_indexed(self):
+        """True when the whole mapped file has been indexed."""
+        return self._indexed >= self._size
+
+    def _remap(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if size < self._size:
+            # truncated, index it again
+            self._offsets = array(_OFFSET_TYPECODE, [0])
+            self._indexed = 0
+            self._clear_shaping()
+            self.set_row_count(0)
+        elif self._shape_queued >= len(self._offsets):
+            # the last line, shaped without newline, may have grown
+            self._trim_shaping(len(self._offsets) - 1)
+        self._size = size
+        if size:
+            self._map = mmap.mmap(self._file.fileno(), size,
+                                  access=mmap.ACCESS_READ)
+        self._shape_source = text_shaping.FileSource(self._file.name,
+                                                     self._map)
+        # the last line may have grown
+        self.refresh(self.get_line_row(len(self._offsets) - 1))
+        self._queue_index()
+
+    def poll(self):
+        """Checks the file for growth, done every poll interval when
+        following."""
+        if self._file is None:
+            return
+        if os.fstat(self._file.fileno()).st_size != self._size:
+            log.debug("%s: file size changed", self.name)
+            self._remap()
+
+    def _queue_index(self):
+        if self._indexing or self.is_indexed:
+            self._update_row_count()
+            return
+        self._indexing = True
+        file_id = self._file_id
+
+        def index_idle():
+            if file_id != self._file_id:
+                return False
+            more = self.index_step()
+            if not more:
+                self._indexing = False
+            return more
+
+        mainloop.idle_add(index_idle)
+
+    def index_step(self):
+        """
+        Indexes the next chunk of the file, returns True while there is
+        more to index.
+        """
+        if self._map is None:
+            return False
+        end = min(self._size, self._indexed + self.index_chunk_size)
+        self._offsets.extend(m.end() for m in
+                             _newline_re.finditer(self._map, self._indexed, end))
+        self._indexed = end
+        self._update_row_count()
+        return not self.is_indexed
+
+    def index_all(self):
+        """Indexes the rest of the file at once."""
+        while self.index_step():
+            pass
+        self._indexing = False
+
+    def get_line_count(self):
+        """Returns the number of lines indexed."""
+        count = len(self._offsets) - 1
+        if self.is_indexed and self._offsets[-1] < self._size:
+            # last line without newline
+            count += 1
+        return count
+
+    def _update_row_count(self):
+        count = self.get_line_count()
+        if self._wrap_mode != WRAP_CLIP:
+            # the extra rows of the wrapped lines
+            count += self._row_starts[-1] - (len(self._row_starts) - 1)
+            self._queue_shape()
+        at_end = self._top >= self._row_count - self.get_page_rows()
+        if count != self._row_count:
+            self.set_row_count(count)
+            if self._follow and at_end:
+                self.set_top(count)
+
+    def _clear_shaping(self):
+        self._trim_shaping(0)
+        self._shape_id += 1
+        self._shaping = False
+
+    def _trim_shaping(self, lines):
+        """Forgets the shape of the lines after the first @lines."""
+        for first, end, future in self._shape_jobs:
+            future.cancel()
+        self._shape_jobs.clear()
+        del self._row_starts[lines + 1:]
+        del self._line_widths[lines:]
+        self._shape_queued = len(self._line_widths)
+
+    def _reshape(self, cols, rows):
+        """
+        Shapes again for cols columns. The lines of the first rows are
+        shaped right away, so the first screen is shown wrapped.
+        """
+        self._shape_width = cols
+        self._clear_shaping()
+        if self._map is not None:
+            end = min(self.get_line_count(), rows + self._overscan)
+            if end:
+                start_offset, end_offset = self._line_offsets(0, end)
+                self._add_shaped(*self._shape_source.shape(
+                    start_offset, end_offset, cols, self._wrap_mode))
+                self._shape_queued = end
+        self._update_row_count()
+
+    def _line_offsets(self, first, end):
+        """Returns the (start, end) offsets of the lines first to end."""
+        end_offset = self._offsets[end] if end < len(self._offsets) \
+                     else self._size
+        return self._offsets[first], end_offset
+
+    def _add_shaped(self, widths, rows):
+        row_starts = self._row_starts
+        total = row_starts[-1]
+        for count in rows:
+            total += count
+            row_starts.append(total)
+        self._line_widths.extend(widths)
+
+    def _queue_shape(self):
+        if self._shaping or self._wrap_mode == WRAP_CLIP or \
+           self._shape_width is None:
+            return
+        self._shaping = True
+        shape_id = self._shape_id
+
+        def shape_idle():
+            if shape_id != self._shape_id:
+                return False
+            more = self.shape_step(SHAPE_WAIT)
+            if not more:
+                self._shaping = False
+            return more
+
+        mainloop.idle_add(shape_idle)
+
+    def shape_step(self, timeout=0):
+        """
+        Submits the lines indexed to shape and adds the rows of the ones
+        shaped, waiting up to timeout seconds for the first job. Returns
+        True while there are lines being shaped or left to shape.
+        """
+        if self._wrap_mode == WRAP_CLIP or self._shape_width is None or \
+           self._map is None:
+            return False
+        line_count = self.get_line_count()
+        while len(self._shape_jobs) < SHAPE_JOBS and \
+              self._shape_queued < line_count:
+            first = self._shape_queued
+            end = min(line_count, first + self.shape_chunk_lines)
+            start_offset, end_offset = self._line_offsets(first, end)
+            self._shape_jobs.append((first, end, text_shaping.submit(
+                self._shape_source, start_offset, end_offset,
+                self._shape_width, self._wrap_mode)))
+            self._shape_queued = end
+
+        shaped_rows = self._row_starts[-1]
+        shaped_lines = len(self._line_widths)
+        while self._shape_jobs:
+            first, end, future = self._shape_jobs[0]
+            if not future.done():
+                if not timeout:
+                    break
+                # only futures of an executor aren't done
+                from concurrent import futures
+                futures.wait([future], timeout)
+                timeout = 0
+                if not future.done():
+                    break
+            self._shape_jobs.popleft()
+            self._add_shaped(*future.result())
+
+        if len(self._line_widths) != shaped_lines:
+            # the rows after the ones shaped before show other lines now
+            self._update_row_count()
+            self.refresh(shaped_rows)
+        return bool(self._shape_jobs) or self._shape_queued < line_count
+
+    def shape_all(self):
+        """Shapes the lines indexed at once."""
+        while self.shape_step(1):
+            pass
+        self._shaping = False
+
+    def get_row_line(self, index):
+        """
+        Returns the (line, wrapped row of the line) shown at row @index.
+        """
+        row_starts = self._row_starts
+        shaped_rows = row_starts[-1]
+        if index >= shaped_rows:
+            # not shaped yet, a row each
+            return len(row_starts) - 1 + index - shaped_rows, 0
+        line = bisect_right(row_starts, index) - 1
+        return line, index - row_starts[line]
+
+    def get_line_row(self, line):
+        """Returns the index of the first row showing @line."""
+        row_starts = self._row_starts
+        if line < len(row_starts):
+            return row_starts[line]
+        return row_starts[-1] + line - (len(row_starts) - 1)
+
+    def get_line_range(self, index):
+        """Returns the (start, end) offsets of line @index, without the
+        line terminator."""
+        start = self._offsets[index]
+        if index + 1 < len(self._offsets):
+            end = self._offsets[index + 1] - 1
+        else:
+            # the rest of the file may not be indexed yet
+            end = self._map.find(b("\n"), start)
+            if end < 0:
+                end = self._size
+        return start, end
+
+    def get_line(self, index):
+        start, end = self.get_line_range(index)
+        return self._map[start:end]
+
+    def _render_row(self, index, cols):
+        if self._wrap_mode != WRAP_CLIP:
+            return self._render_wrapped_row(index, cols)
+        start, end = self.get_line_range(index)
+        text = self._map[start:min(end, start + cols * _MAX_BYTES_PER_COL)]
+        text = text_shaping.normalize_line(text)
+        end, col = calc_text_pos(text, 0, len(text), cols)
+        return text[:end]
+
+    def _render_wrapped_row(self, index, cols):
+        line, row = self.get_row_line(index)
+        text = text_shaping.normalize_line(self.get_line(line))
+        if line < len(self._line_widths) and self._line_widths[line] <= cols:
+            # fits, no need to find the wrap points
+            return text if not row else b("")
+        segments = default_layout.line_segments(text, cols, self._wrap_mode)
+        if row >= len(segments):
+            # shaped for another width
+            return b("")
+        start, end = segments[row]
+        return text[start:end]
+
+    # "size-allocate" signal handler
+    def do_size_allocate(self, allocation):
+        if self._wrap_mode != WRAP_CLIP:
+            cols = max(1, allocation.width - self.border_width*2)
+            if cols != self._shape_width:
+                self._reshape(cols, allocation.height - self.border_width*2)
+        super(LogView, self).do_size_allocate(allocation)
+
+    # "realize" signal handler
+    def do_realize(self):
+        if self._wrap_mode != WRAP_CLIP and self._shape_width is None:
+            left, top, cols, rows = self._get_viewport()
+            self._reshape(cols, rows)
+        super(LogView, self).do_realize()
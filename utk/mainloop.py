@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.mainloop
+    ~~~~~~~~~~~~
+
+    Main loop backends.
+
+    Utk schedules its idle work (size negotiation at PRIORITY_RESIZE,
+    redraws at PRIORITY_REDRAW, ...) and its timers through the installed
+    backend. GulibLoop, the default, runs them in the gulib main loop.
+    AsyncioLoop runs them in an asyncio event loop, reading the screen
+    input with loop.add_reader(), so utk can live inside an asyncio
+    application::
+
+        mainloop.set_backend(mainloop.AsyncioLoop())
+        ...
+        await utk.main()
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import heapq
+import time
+import logging
+
+import gulib
+
+from utk.constants import PRIORITY_IDLE
+from utk.event import make_events
+
+log = logging.getLogger("utk.mainloop")
+
+
+class GulibLoop(object):
+    """
+    Backend running utk in the gulib main loop.
+    """
+
+    def __init__(self):
+        self._loops = []
+
+    def idle_add(self, callback, priority=PRIORITY_IDLE):
+        return gulib.idle_add(callback, priority=priority)
+
+    def timeout_add_seconds(self, interval, callback):
+        return gulib.timeout_add_seconds(interval, callback)
+
+    def watch_screen(self, screen):
+        pass
+
+    def unwatch_screen(self, screen):
+        pass
+
+    def run(self):
+        """Run a main loop until quit() is called."""
+        loop = gulib.MainLoop()
+        self._loops.append(loop)
+        loop.run()
+
+    def quit(self):
+        """Make the innermost run() return."""
+        self._loops.pop().quit()
+
+    def run_pending(self):
+        """Run the main loop until the idle work queued is done."""
+        loop = gulib.MainLoop()
+
+        def quit():
+            loop.quit()
+            return False
+
+        # lower priority than the resize and redraw idles
+        gulib.idle_add(quit, priority=PRIORITY_IDLE)
+        loop.run()
+
+
+class AsyncioLoop(object):
+    """
+    Backend running utk in an asyncio event loop, by default the current
+    one.
+
+    Idle callbacks are kept in a priority queue and run one per loop
+    iteration, highest priority first, so input and network events are
+    handled between them. Like in gulib, a callback returning True is
+    called again.
+    """
+
+    def __init__(self, loop=None):
+        if loop is None:
+            # asyncio takes long to import, only done when used
+            import asyncio
+            loop = asyncio.get_event_loop()
+        self._loop = loop
+        self._idle = []
+        self._idle_count = 0
+        self._idle_scheduled = False
+        self._idle_done = None
+        self._futures = []
+        self._screens = {}
+
+    loop = property(lambda self: self._loop)
+
+    def idle_add(self, callback, priority=PRIORITY_IDLE):
+        self._idle_count += 1
+        heapq.heappush(self._idle, (priority, self._idle_count, callback))
+        self._schedule_idle()
+        return self._idle_count
+
+    def _schedule_idle(self):
+        if not self._idle_scheduled:
+            self._idle_scheduled = True
+            self._loop.call_soon(self._run_idle)
+
+    def _run_idle(self):
+        self._idle_scheduled = False
+        if self._idle:
+            priority, count, callback = heapq.heappop(self._idle)
+            if callback():
+                self._idle_count += 1
+                heapq.heappush(self._idle,
+                               (priority, self._idle_count, callback))
+        if self._idle:
+            self._schedule_idle()
+        elif self._idle_done is not None and not self._idle_done.done():
+            self._idle_done.set_result(None)
+
+    def timeout_add_seconds(self, interval, callback):
+        def timeout():
+            if callback():
+                self._loop.call_later(interval, timeout)
+
+        self._loop.call_later(interval, timeout)
+
+    def watch_screen(self, screen):
+        """
+        Read and dispatch the screen input when it's available. When the
+        input is closed the screen isn't watched anymore and the utk
+        main loop quits.
+        """
+        if screen in self._screens:
+            return
+        fds = screen.get_input_descriptors()
+        self._screens[screen] = (fds, None)
+        for fd in fds:
+            # only the first descriptor is the terminal input, the others
+            # (the resize pipe, gpm) can be readable with nothing to return
+            self._loop.add_reader(fd, self._input_ready, screen,
+                                  fd == fds[0])
+
+    def unwatch_screen(self, screen):
+        fds, timer = self._screens.pop(screen, ((), None))
+        for fd in fds:
+            self._loop.remove_reader(fd)
+        if timer is not None:
+            timer.cancel()
+
+    def _input_ready(self, screen, readable=False):
+        fds, timer = self._screens[screen]
+        if timer is not None:
+            timer.cancel()
+            timer = None
+        if screen.started:
+            timeout, keys, raw = screen.get_input_nonblocking()
+            if readable and not keys and not raw:
+                # the terminal input is readable but nothing was read, it's
+                # at end of file or hung up and would be readable forever
+                self._input_closed(screen)
+                return
+            if timeout is not None:
+                # an incomplete escape sequence, decode it after timeout
+                # if no more input comes
+                timer = self._loop.call_later(timeout, self._input_ready,
+                                              screen)
+            if keys:
+                screen.dispatch_events(make_events(keys, time.time()))
+        self._screens[screen] = (fds, timer)
+
+    def _input_closed(self, screen):
+        log.warning("input of %r closed", screen)
+        self.unwatch_screen(screen)
+        import utk
+        if self in utk.main_loops:
+            utk.main_quit()
+
+    def run(self):
+        """
+        Run the event loop until quit() is called. If it's already running
+        returns a future done on quit() instead.
+        """
+        future = self._loop.create_future()
+        self._futures.append(future)
+        if self._loop.is_running():
+            return future
+        self._loop.run_until_complete(future)
+
+    def quit(self):
+        future = self._futures.pop()
+        if not future.done():
+            future.set_result(None)
+
+    def run_pending(self):
+        """Run the event loop until the idle work queued is done."""
+        if not self._idle:
+            return
+        self._idle_done = self._loop.create_future()
+        try:
+            self._loop.run_until_complete(self._idle_done)
+        finally:
+            self._idle_done = None
+
+
+_backend = GulibLoop()
+
+def get_backend():
+    return _backend
+
+def set_backend(backend):
+    """Install the main loop backend, do it before creating widgets."""
+    global _backend
+    _backend = backend
+
+def idle_add(callback, priority=PRIORITY_IDLE):
+    """Call callback when there is nothing else to do, again if it
+    returns True."""
+    return _backend.idle_add(callback, priority=priority)
+
+def timeout_add_seconds(interval, callback):
+    """Call callback every interval seconds while it returns True."""
+    return _backend.timeout_add_seconds(interval, callback)
+
+def run_pending():
+    """Run the main loop until the queued resizes and redraws are done."""
+    _backend.run_pending()
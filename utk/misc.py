@@ -26,6 +26,8 @@ class Misc(Widget):
     """
     __type_name__ = "UtkMisc"
 
+    __slots__ = ("_xalign", "_yalign", "_xpad", "_ypad")
+
     def __init__(self):
         super(Misc, self).__init__()
         self._xalign = 0.5
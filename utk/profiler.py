@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.profiler
+    ~~~~~~~~~~~~
+
+    Per frame timing of the drawing pipeline.
+
+    A frame goes through four phases:
+      layout -- size negotiation, Container.check_resize()
+      compose -- canvas composition, calculate_shards() and content()
+      encode -- turning the composed rows into terminal output
+      write -- handing the output to the terminal
+
+    The code of each phase reports to the installed profiler hook with
+    begin(phase) and end(phase), and the screen calls frame_done() once the
+    frame is written. Nothing is measured while no hook is installed::
+
+        profiler = FrameProfiler()
+        set_profiler(profiler)
+        ...
+        profiler.records()[-1].compose
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import time
+from collections import deque, namedtuple
+
+from utk.latency import percentile
+
+PHASES = ("layout", "compose", "encode", "write")
+
+# start is the time.time() the frame started to be drawn, the phases and
+# total are in seconds
+FrameRecord = namedtuple("FrameRecord", ("start",) + PHASES + ("total",))
+
+
+class ProfilerHook(object):
+    """
+    Interface of the profiler hooks, subclasses override the methods they
+    need.
+    """
+
+    def begin(self, phase):
+        """Called when the code of phase starts running."""
+
+    def end(self, phase):
+        """Called when the code of phase is done."""
+
+    def frame_done(self):
+        """Called when a frame has been written."""
+
+
+class FrameProfiler(ProfilerHook):
+    """
+    Keep a record of the time spent in each phase for the last `size`
+    frames. Layout done before a frame is drawn is counted in that frame.
+    Nested begin()/end() calls of a phase are timed once.
+    """
+
+    def __init__(self, size=300):
+        self._records = deque(maxlen=size)
+        self._listeners = []
+        self._times = dict.fromkeys(PHASES, 0.0)
+        self._started = {}
+        self._depth = dict.fromkeys(PHASES, 0)
+        self._frame_start = None
+        self.count = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def begin(self, phase):
+        depth = self._depth[phase]
+        self._depth[phase] = depth + 1
+        if not depth:
+            now = time.time()
+            self._started[phase] = now
+            if self._frame_start is None:
+                self._frame_start = now
+
+    def end(self, phase):
+        depth = self._depth[phase] - 1
+        self._depth[phase] = depth
+        if not depth:
+            self._times[phase] += time.time() - self._started.pop(phase)
+
+    def frame_done(self):
+        times = self._times
+        start = self._frame_start
+        if start is None:
+            start = time.time()
+        record = FrameRecord(start, *([times[p] for p in PHASES] +
+                                      [sum(times.values())]))
+        self._records.append(record)
+        self.count += 1
+        self._times = dict.fromkeys(PHASES, 0.0)
+        self._frame_start = None
+        for listener in self._listeners:
+            listener(record)
+
+    def add_listener(self, listener):
+        """Call listener(record) with the record of every frame."""
+        self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener):
+        listeners = list(self._listeners)
+        if listener in listeners:
+            listeners.remove(listener)
+            self._listeners = listeners
+
+    def clear(self):
+        self._records.clear()
+
+    def records(self):
+        return list(self._records)
+
+    def last(self):
+        """Return the record of the last frame, None if there is none."""
+        if not self._records:
+            return None
+        return self._records[-1]
+
+    def percentiles(self, percents=(50, 95, 99)):
+        """
+        Return a {phase: {percent: seconds}} dict for the recorded frames,
+        eg. profiler.percentiles()['compose'][95].
+        """
+        result = {}
+        for phase in PHASES + ("total",):
+            values = sorted(getattr(r, phase) for r in self._records)
+            result[phase] = dict((p, percentile(values, p)) for p in percents)
+        return result
+
+    def format(self, percent=50):
+        """Return a one line summary in milliseconds."""
+        if not self._records:
+            return "no frames"
+        pct = self.percentiles((percent,))
+        return "%d frames, p%d ms: %s" % (
+            len(self._records), percent, ", ".join(
+                "%s %.1f" % (phase, pct[phase][percent] * 1000)
+                for phase in PHASES + ("total",)))
+
+
+_profiler = None
+
+def get_profiler():
+    """Return the installed profiler hook, None if there is none."""
+    return _profiler
+
+def set_profiler(profiler):
+    """Install a ProfilerHook, None stops profiling."""
+    global _profiler
+    _profiler = profiler
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.profiler_view
+    ~~~~~~~~~~~~~~~~~
+
+    A label showing the frame profiler times.
+
+    Packed in a small Window raised over the application it works as an
+    on-screen overlay::
+
+        profiler = FrameProfiler()
+        set_profiler(profiler)
+        overlay = Window()
+        overlay.add(ProfilerView(profiler))
+        overlay.show_all()
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+from utk import mainloop
+from utk.label import Label
+from utk.profiler import PHASES
+
+
+class ProfilerView(Label):
+    """
+    Label with the percentile times of each phase of the frames recorded
+    by a FrameProfiler, updated every interval seconds while mapped.
+    """
+    __type_name__ = "UtkProfilerView"
+
+    def __init__(self, profiler, interval=1, percent=50):
+        super(ProfilerView, self).__init__()
+        self._profiler = profiler
+        self._percent = percent
+        self._update_id = 0
+        self._interval = None
+        self.set_interval(interval)
+        self.refresh()
+
+    def get_interval(self):
+        return self._interval
+
+    def set_interval(self, interval):
+        """Update the times every interval seconds, never if None."""
+        self._interval = interval
+        self._update_id += 1
+        self.notify("interval")
+        if interval is None:
+            return
+        update_id = self._update_id
+
+        def update():
+            if update_id != self._update_id:
+                return False
+            if self.is_mapped:
+                self.refresh()
+            return True
+
+        mainloop.timeout_add_seconds(interval, update)
+
+    interval = property(get_interval, set_interval)
+
+    def format(self):
+        """Return the text shown for the recorded frames."""
+        profiler = self._profiler
+        percent = self._percent
+        lines = ["frames %d (p%d ms)" % (len(profiler), percent)]
+        pct = profiler.percentiles((percent,))
+        for phase in PHASES + ("total",):
+            value = pct[phase][percent]
+            lines.append("%-8s %6s" % (phase, "-" if value is None else
+                                       "%.1f" % (value * 1000)))
+        return "\n".join(lines)
+
+    def refresh(self):
+        self.set_text(self.format())
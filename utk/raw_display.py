@@ -6,9 +6,12 @@ Direct terminal UI implementation
 
 import os
 import logging
+import select
 import struct
 import sys
 import signal
+import time
+import threading
 
 try:
     import fcntl
@@ -17,11 +20,12 @@ try:
 except ImportError:
     pass # windows
 
-import utk
 from utk.screen import (
     BaseScreen, RealTerminal, AttrSpec, UNPRINTABLE_TRANS_TABLE
 )
 from utk import escape
+from utk.profiler import get_profiler
+from utk.render_thread import RenderThread, RenderFrame
 from utk.utils import calc_width, calc_text_pos
 from gulib.compat import b, PYTHON3
 
@@ -43,6 +47,10 @@ class Screen(BaseScreen, RealTerminal):
         BaseScreen.__init__(self)
         RealTerminal.__init__(self)
         self._screen_buf = None
+        # _clear_screen_buf() calls, the frame that drew _screen_buf saw
+        # _screen_buf_clears of them
+        self._clears = 0
+        self._screen_buf_clears = 0
         self._resized = False
         self._alternate_buffer = True
         self._setup_G1_done = True
@@ -50,10 +58,22 @@ class Screen(BaseScreen, RealTerminal):
         self._cy = 0
         self._next_timeout = None
         self._resize = False
+        self._bracketed_paste = True
+        self._pasting = False
+        self._paste_codes = []
+        self.paste_chunk_size = escape.PASTE_CHUNK_SIZE
+        self.prev_input_resize = 0
+        self.gpm_mev = None
+        self.coalesce_mouse = True
         self._term_output_file = _term_files[0]
         self._term_input_file = _term_files[1]
-        self._resize_pipe_rd, self._resize_pipe_wr = os.pipe()
-        fcntl.fcntl(self._resize_pipe_rd, fcntl.F_SETFL, os.O_NONBLOCK)
+        self._recorder = None
+        # held while writing, so the render thread frames and the main
+        # thread writes don't interleave
+        self._output_lock = threading.RLock()
+        self._render_thread = None
+        self._threaded_render = False
+        self._resize_pipe_rd, self._resize_pipe_wr = self._open_resize_pipe()
 
         self._pal_escape = {}
         self._pal_attrspec = {}
@@ -66,6 +86,15 @@ class Screen(BaseScreen, RealTerminal):
 
         self.set_input_timeouts()
 
+    def _open_resize_pipe(self):
+        """
+        Returns the (read, write) ends of the pipe the SIGWINCH handler
+        writes to, so external event loops wake up on a resize.
+        """
+        rd, wr = os.pipe()
+        fcntl.fcntl(rd, fcntl.F_SETFL, os.O_NONBLOCK)
+        return rd, wr
+
     def write(self, data):
         """
         Write some data to the terminal.
@@ -73,7 +102,10 @@ class Screen(BaseScreen, RealTerminal):
         You may wish to override this if you're using something other than
         regular files for input and output.
         """
-        self._term_output_file.write(data)
+        with self._output_lock:
+            if self._recorder is not None:
+                self._recorder.output(data)
+            self._term_output_file.write(data)
 
     def flush(self):
         """
@@ -82,7 +114,92 @@ class Screen(BaseScreen, RealTerminal):
         You may wish to override this if you're using something other than
         regular files for input and output.
         """
-        self._term_output_file.flush()
+        with self._output_lock:
+            if self._recorder is not None:
+                self._recorder.flush_output()
+            self._term_output_file.flush()
+
+    def start_recording(self, filename):
+        """
+        Record the input read, the resizes and the output written to
+        filename until the screen is stopped, see :mod:`utk.recording`.
+        """
+        # utk.recording builds on this module
+        from utk.recording import Recorder
+        self.stop_recording()
+        recorder = Recorder(filename, *self.get_cols_rows())
+        with self._output_lock:
+            self._recorder = recorder
+
+    def stop_recording(self):
+        with self._output_lock:
+            if self._recorder is not None:
+                self._recorder.close()
+                self._recorder = None
+
+    # the recorder is only set and unset in the main thread, the lock is
+    # taken when there is one to not wait for the frame being written
+    def _record_input(self, data):
+        if self._recorder is not None:
+            with self._output_lock:
+                self._recorder.record_input(data)
+
+    def _record_resize(self, cols, rows):
+        if self._recorder is not None:
+            with self._output_lock:
+                self._recorder.record_resize(cols, rows)
+
+    def _clear_screen_buf(self):
+        """
+        Repaint the whole screen in the next frame. Doesn't take the
+        output lock, it's called from signal handlers: a frame being
+        rendered meanwhile doesn't count as a repaint.
+        """
+        self._clears += 1
+        self._screen_buf = None
+
+    def get_threaded_render(self):
+        return self._threaded_render
+
+    def set_threaded_render(self, threaded):
+        """
+        Encode and write the frames in a background thread, see
+        :mod:`utk.render_thread`. Layout and composition stay in the
+        main loop thread.
+        """
+        threaded = bool(threaded)
+        if threaded == self._threaded_render:
+            return
+        self._threaded_render = threaded
+        if self.started:
+            if threaded:
+                self._start_render_thread()
+            else:
+                self._stop_render_thread()
+        self.notify("threaded-render")
+
+    threaded_render = property(get_threaded_render, set_threaded_render)
+
+    def wait_rendered(self, timeout=None):
+        """
+        Wait until the frames drawn are written, they are as soon as drawn
+        without threaded render. Returns False if timeout seconds passed
+        first.
+        """
+        if self._render_thread is None:
+            return True
+        return self._render_thread.wait_idle(timeout)
+
+    def _start_render_thread(self):
+        if self._threaded_render and self._render_thread is None:
+            self._render_thread = RenderThread(self._render_frame)
+            self._render_thread.start()
+
+    def _stop_render_thread(self):
+        if self._render_thread is not None:
+            # writes the last frame
+            self._render_thread.stop()
+            self._render_thread = None
 
     use_alternate_buffer = property(lambda x: x._alternate_buffer)
 
@@ -96,28 +213,31 @@ class Screen(BaseScreen, RealTerminal):
     def do_start(self):
         assert not self.started
 
-        if utk._running_from_pytest:
-            self._started = True
-            return
-
         if self.use_alternate_buffer:
             self.write(escape.SWITCH_TO_ALTERNATE_BUFFER)
             self._rows_used = None
         else:
             self._rows_used = 0
 
+        if self._bracketed_paste:
+            self.write(escape.BRACKETED_PASTE_ON)
+
         self._old_termios_settings = termios.tcgetattr(0)
         self.signal_init()
         tty.setcbreak(self._term_input_file.fileno())
+        self._pasting = False
+        self._paste_codes = []
         self._input_iter = self._run_input_iter()
         self._next_timeout = self.max_wait
 
         if not self._signal_keys_set:
             self._old_signal_keys = self.tty_signal_keys()
         self._started = True
+        self._start_render_thread()
 
     # "stop" signal handler
     def do_stop(self):
+        self._stop_render_thread()
         self.clear()
         if not self.started:
             return
@@ -126,6 +246,8 @@ class Screen(BaseScreen, RealTerminal):
         move_cursor = ""
         if self.use_alternate_buffer:
             move_cursor = escape.RESTORE_NORMAL_BUFFER
+        if self._bracketed_paste:
+            self.write(escape.BRACKETED_PASTE_OFF)
 
         self.write(self._attrspec_to_escape(
             AttrSpec('', '')) + escape.SI + escape.MOUSE_TRACKING_OFF + \
@@ -136,17 +258,16 @@ class Screen(BaseScreen, RealTerminal):
             self.tty_signal_keys(*self._old_signal_keys)
 
         self._started = False
+        self.stop_recording()
 
     # "clear" signal handler
     def do_clear(self):
-        self._screen_buf = None
+        self._clear_screen_buf()
         self.setup_G1 = True
 
 
     # "get-cols-rows" signal handler
     def do_get_cols_rows(self):
-        if utk._running_from_pytest:
-            return 80, 24
         buf = fcntl.ioctl(self._term_input_file.fileno(), termios.TIOCGWINSZ, ' '*4)
         y, x = struct.unpack('hh', buf)
         return x, y
@@ -342,6 +463,35 @@ class Screen(BaseScreen, RealTerminal):
             # handle resize before trying to draw screen
             return
 
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.begin("compose")
+        try:
+            # content() rows are new lists, the frame owns them
+            rows = list(topcanvas.content())
+        finally:
+            if profiler is not None:
+                profiler.end("compose")
+
+        if self._render_thread is not None:
+            self._render_thread.publish(RenderFrame(
+                rows, topcanvas.cursor, maxcol, maxrow, self._draw_start,
+                self.take_damage_input_times()))
+            return
+        self._render_frame(RenderFrame(rows, topcanvas.cursor, maxcol,
+                                       maxrow, None, None), profiler)
+
+    def _render_frame(self, frame, profiler=None):
+        """
+        Encode the composed rows of frame and write them, from the render
+        thread in threaded render.
+        """
+        with self._output_lock:
+            self._write_frame(frame, profiler)
+
+    def _write_frame(self, frame, profiler):
+        rows, cursor, maxcol, maxrow = frame[:4]
+
         o = [escape.HIDE_CURSOR, self._attrspec_to_escape(AttrSpec('', ''))]
 
         def partial_display():
@@ -352,7 +502,8 @@ class Screen(BaseScreen, RealTerminal):
         if not partial_display():
             o.append(escape.CURSOR_HOME)
 
-        if self._screen_buf:
+        clears = self._clears
+        if self._screen_buf and self._screen_buf_clears == clears:
             osb = self._screen_buf
         else:
             osb = []
@@ -403,10 +554,13 @@ class Screen(BaseScreen, RealTerminal):
             a = self._pal_attrspec.get(a, a)
             return isinstance(a, AttrSpec) and a.standout
 
+        if profiler is not None:
+            profiler.begin("encode")
+
         ins = None
         o.append(set_cursor_home())
         cy = 0
-        for row in topcanvas.content():
+        for row in rows:
             y += 1
             if False and osb and osb[y] == row:
                 # this row of the scree buffer matched what is currently
@@ -480,13 +634,19 @@ class Screen(BaseScreen, RealTerminal):
             if whitespace_at_end:
                 o.append(escape.ERASE_IN_LINE_RIGHT)
 
-        if topcanvas.cursor is not None:
-            x, y = topcanvas.cursor
+        if cursor is not None:
+            x, y = cursor
             o += [set_cursor_position(x, y),
                   escape.SHOW_CURSOR]
             self._cy = y
 
+        if profiler is not None:
+            profiler.end("encode")
+            profiler.begin("write")
         # Write list of commands to terminal
+        if self._recorder is not None:
+            self._recorder.begin_frame()
+        write_start = time.time()
         try:
             for l in o:
                 if isinstance(l, bytes) and PYTHON3:
@@ -497,8 +657,14 @@ class Screen(BaseScreen, RealTerminal):
             # ignore interrupted syscall
             if e.args[0] != 4:
                 raise
+        finally:
+            if profiler is not None:
+                profiler.end("write")
+        self.frame_written(write_start, time.time(), frame.draw_start,
+                           frame.input_times)
 
         self._screen_buf = sb
+        self._screen_buf_clears = clears
 
     def set_input_timeouts(self, max_wait=None, complete_wait=0.125,
                            resize_wait=0.125):
@@ -525,9 +691,9 @@ class Screen(BaseScreen, RealTerminal):
 
     def _sigwinch_handler(self, sugnum, frame):
         if not self._resized:
-            os.write(self._resize_pipe_wr, 'R')
+            os.write(self._resize_pipe_wr, b('R'))
         self._resized = True
-        self._screen_buf = None
+        self._clear_screen_buf()
 
     def signal_init(self):
         """Called in the startup of run wrapper to set the SIGWINCH
@@ -547,15 +713,45 @@ class Screen(BaseScreen, RealTerminal):
         """
         signal.signal(signal.SIGWINCH, signal.SIG_DFL)
 
-    def set_mouse_tracking(self):
+    def set_mouse_tracking(self, any_motion=False):
         """Enable mouse tracking.
 
         After calling this method, get_input() will include mouse
         click events along with keystrokes.
+
+        any_motion -- if True also report pointer motion when no button
+            is pressed, as ('mouse motion', 0, x, y) events.
+
+        Consecutive drag or motion events read in the same batch are
+        collapsed to the latest position unless coalesce_mouse is set
+        to False.
         """
         self.write(escape.MOUSE_TRACKING_ON)
+        if any_motion:
+            self.write(escape.MOUSE_MOTION_TRACKING_ON)
         self._start_gpm_tracking()
 
+    def _start_gpm_tracking(self):
+        """Start reading mouse events from gpm on the linux console."""
+        pass
+
+    def set_bracketed_paste(self, enable=True):
+        """Enable or disable bracketed paste mode.
+
+        While enabled (the default) text pasted into the terminal is not
+        decoded as keystrokes, get_input() returns it as ('paste', bytes)
+        events of at most paste_chunk_size bytes each.
+        """
+        if enable == self._bracketed_paste:
+            return
+        self._bracketed_paste = enable
+        if self.started:
+            if enable:
+                self.write(escape.BRACKETED_PASTE_ON)
+            else:
+                self.write(escape.BRACKETED_PASTE_OFF)
+            self.flush()
+
     def get_input(self, raw_keys=False):
         """Return pending input as a list.
 
@@ -596,6 +792,13 @@ class Screen(BaseScreen, RealTerminal):
                     ('ctrl mouse drag', 1, 18, 13)
         Mouse button release: ('mouse release', 0, 18, 13),
                               ('ctrl mouse release', 0, 17, 23)
+        Mouse motion (any_motion tracking): ('mouse motion', 0, 40, 2)
+
+        Examples of paste events returned
+        ---------------------------------
+        Bracketed paste: ('paste', b'pasted text')
+
+        Large pastes are split in several consecutive paste events.
         """
         assert self.started
 
@@ -656,6 +859,8 @@ class Screen(BaseScreen, RealTerminal):
         def empty_resize_pipe():
             # clean out the pipe used to signal external event loops
             # that a resize has occurred
+            if self._resize_pipe_rd is None:
+                return
             try:
                 while True:
                     os.read(self._resize_pipe_rd, 1)
@@ -664,31 +869,107 @@ class Screen(BaseScreen, RealTerminal):
 
         while True:
             processed = []
-            codes = self._get_gpm_code() + self._get_keyboards_codes()
+            codes = (self._paste_codes + self._get_gpm_codes() +
+                     self._get_keyboard_codes())
+            self._paste_codes = []
             original_codes = codes
+            if codes:
+                self.input_received(time.time())
             try:
                 while codes:
-                    run, codes = escape.process_keyqueue(codes, True)
+                    run, codes = self._process_input(codes, True)
                     processed.extend(run)
             except escape.MoreInputRequired:
                 k = len(original_codes) - len(codes)
+                if self.coalesce_mouse:
+                    processed = escape.coalesce_mouse_events(processed)
                 yield (self.complete_wait, processed, original_codes[:k])
                 empty_resize_pipe()
                 original_codes = codes
                 processed = []
 
-                codes += self._get_keyboard_codes() + self._get_gpm_codes()
+                more_codes = self._get_keyboard_codes() + self._get_gpm_codes()
+                if more_codes:
+                    self.input_received(time.time())
+                codes += more_codes
                 while codes:
-                    run, codes = escape.process_keyqueue(codes, False)
+                    run, codes = self._process_input(codes, False)
                     processed.extend(run)
 
             if self._resized:
+                self._record_resize(*self.get_cols_rows())
                 processed.append('window resize')
                 self._resized = False
 
+            if self.coalesce_mouse:
+                processed = escape.coalesce_mouse_events(processed)
             yield (self.max_wait, processed, original_codes)
             empty_resize_pipe()
 
+    def _process_input(self, codes, more_available):
+        """Decode codes as escape.process_keyqueue() does, but collecting
+        the text between bracketed paste markers as paste events.
+        """
+        if self._pasting:
+            run, codes, done = escape.process_paste(codes,
+                                                    self.paste_chunk_size)
+            if done:
+                self._pasting = False
+            elif codes:
+                # incomplete end marker, wait for next read
+                self._paste_codes = codes
+                codes = []
+            return run, codes
+        run, codes = escape.process_keyqueue(codes, more_available)
+        if run == ['begin paste']:
+            self._pasting = True
+            return [], codes
+        if run == ['end paste']:
+            return [], codes
+        return run, codes
+
+    def _get_keyboard_codes(self):
+        """Return all the key codes available without blocking."""
+        codes = []
+        fd = self._term_input_file.fileno()
+        while self._wait_for_input_ready(0):
+            try:
+                data = os.read(fd, 4096)
+            except OSError as e:
+                # ignore interrupted syscall
+                if e.args[0] != 4:
+                    raise
+                continue
+            if not data:
+                break
+            self._record_input(data)
+            codes.extend(bytearray(data))
+        return codes
+
+    def _get_gpm_codes(self):
+        """Return key codes for pending gpm mouse events."""
+        return []
+
+    def _wait_for_input_ready(self, timeout):
+        """Wait at most timeout seconds (forever if None) for input on the
+        terminal and return the list of ready file descriptors.
+        """
+        fd_list = [self._term_input_file.fileno()]
+        if self.gpm_mev is not None:
+            fd_list.append(self.gpm_mev.stdout.fileno())
+        while True:
+            try:
+                if timeout is None:
+                    ready, w, err = select.select(fd_list, [], fd_list)
+                else:
+                    ready, w, err = select.select(fd_list, [], fd_list, timeout)
+                return ready
+            except select.error as e:
+                if e.args[0] != 4:
+                    raise
+                if self._resized:
+                    return []
+
     def _fake_input_iter(self):
         """This generator is a placeholder for when the screen is stopped
         to always return that no input is available.
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.recording
+    ~~~~~~~~~~~~~
+
+    Session recording and deterministic replay.
+
+    A screen with a Recorder writes the raw input it reads, the terminal
+    resizes and the output of every frame, all timestamped, to a gzip
+    compressed file::
+
+        screen.start_recording("session.utkrec")
+
+    Replaying feeds the recorded input through the raw display input
+    decoding (_run_input_iter) of a headless screen, so the application
+    code draws the same frames again, which are compared with the recorded
+    ones. From the command line, where setup builds the application on the
+    screen it is given::
+
+        python -m utk.recording info session.utkrec
+        python -m utk.recording replay session.utkrec myapp:setup
+
+    File format, after the MAGIC bytes and the "<HH" screen columns and
+    rows, each entry is a "<BdI" kind, timestamp and length header
+    followed by length bytes of data.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import sys
+import gzip
+import time
+import struct
+import logging
+import importlib
+from collections import deque, namedtuple
+
+from gulib.compat import b
+
+from utk.headless_display import Screen as HeadlessScreen
+from utk.mainloop import run_pending
+from utk.raw_display import Screen as RawScreen
+from utk.screen import get_default_screen, set_default_screen
+
+log = logging.getLogger("utk.recording")
+
+MAGIC = b("UTKREC\x01")
+
+# entry kinds
+INPUT = 1 # raw bytes read from the terminal
+OUTPUT = 2 # bytes written outside of a frame
+FRAME = 3 # bytes written by draw_screen()
+RESIZE = 4 # new "<HH" columns and rows
+
+_HEADER = struct.Struct("<HH")
+_ENTRY = struct.Struct("<BdI")
+
+RecordEntry = namedtuple("RecordEntry", "kind timestamp data")
+
+
+class RecordingError(Exception):
+    pass
+
+
+class Recorder(object):
+    """
+    Writes the entries of a session to filename.
+    """
+
+    def __init__(self, filename, cols, rows):
+        self._file = gzip.open(filename, "wb")
+        self._file.write(MAGIC + _HEADER.pack(cols, rows))
+        self._output = []
+        self._in_frame = False
+        self.entries = 0
+
+    def _add(self, kind, data, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        self._file.write(_ENTRY.pack(kind, timestamp, len(data)) + data)
+        self.entries += 1
+
+    def record_input(self, data, timestamp=None):
+        self._add(INPUT, bytes(data), timestamp)
+
+    def record_resize(self, cols, rows, timestamp=None):
+        self._add(RESIZE, _HEADER.pack(cols, rows), timestamp)
+
+    def output(self, data):
+        """Buffer data written to the terminal until flush_output()."""
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        self._output.append(data)
+
+    def begin_frame(self):
+        """The output until the next flush_output() is a frame."""
+        self.flush_output()
+        self._in_frame = True
+
+    def flush_output(self, timestamp=None):
+        if self._output:
+            self._add(FRAME if self._in_frame else OUTPUT,
+                      b("").join(self._output), timestamp)
+            self._output = []
+        self._in_frame = False
+
+    def close(self):
+        self.flush_output()
+        self._file.close()
+
+
+def load_recording(filename):
+    """Returns the (cols, rows, entries) of a recording."""
+    with gzip.open(filename, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise RecordingError("%s is not a utk recording" % filename)
+    pos = len(MAGIC)
+    cols, rows = _HEADER.unpack_from(data, pos)
+    pos += _HEADER.size
+    entries = []
+    while pos < len(data):
+        if pos + _ENTRY.size > len(data):
+            raise RecordingError("truncated entry at %d" % pos)
+        kind, timestamp, length = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        entries.append(RecordEntry(kind, timestamp, data[pos:pos + length]))
+        pos += length
+    return cols, rows, entries
+
+
+class ReplayScreen(HeadlessScreen):
+    """
+    Headless screen whose input is a recording. The frames drawn are kept
+    in :attr:`frames` to be compared with :attr:`recorded_frames`.
+
+    :realtime: wait between inputs as long as it was waited when recorded.
+    """
+    __type_name__ = "UtkReplayScreen"
+
+    def __init__(self, filename, realtime=False):
+        cols, rows, entries = load_recording(filename)
+        super(ReplayScreen, self).__init__(cols, rows)
+        self._entries = deque(e for e in entries if e.kind in (INPUT, RESIZE))
+        self.recorded_frames = [e.data for e in entries if e.kind == FRAME]
+        self.frames = []
+        self._frame = None
+        self._realtime = realtime
+        self._replay_start = None
+        self._record_start = self._entries[0].timestamp \
+            if self._entries else None
+
+    def has_input(self):
+        """Return True while there are recorded input entries left."""
+        return bool(self._entries)
+
+    def write(self, data):
+        super(ReplayScreen, self).write(data)
+        if self._frame is not None:
+            if not isinstance(data, bytes):
+                data = data.encode('utf-8')
+            self._frame.append(data)
+
+    # "start" signal handler
+    def do_start(self):
+        super(ReplayScreen, self).do_start()
+        self._input_iter = self._run_input_iter()
+        self._next_timeout = None
+        self._replay_start = time.time()
+
+    # "draw-screen" signal handler
+    def do_draw_screen(self):
+        self._frame = []
+        try:
+            super(ReplayScreen, self).do_draw_screen()
+        finally:
+            frame, self._frame = self._frame, None
+        if frame:
+            self.frames.append(b("").join(frame))
+
+    def get_input(self, raw_keys=False):
+        """Return the keys decoded from the next recorded input."""
+        assert self.started
+        if not self._entries:
+            return ([], []) if raw_keys else []
+        return RawScreen.get_input(self, raw_keys)
+
+    def _wait_for_input_ready(self, timeout):
+        return bool(self._entries)
+
+    def _get_keyboard_codes(self):
+        if not self._entries:
+            return []
+        entry = self._entries.popleft()
+        if self._realtime:
+            delay = (entry.timestamp - self._record_start) - \
+                    (time.time() - self._replay_start)
+            if delay > 0:
+                time.sleep(delay)
+        if entry.kind == RESIZE:
+            self._cols, self._rows = _HEADER.unpack(entry.data)
+            self._clear_screen_buf()
+            self._resized = True
+            return []
+        return list(bytearray(entry.data))
+
+    def mismatched_frames(self):
+        """
+        Returns the indexes of the frames different from the recorded
+        ones, frames missing in either side included.
+        """
+        count = max(len(self.frames), len(self.recorded_frames))
+        return [i for i in range(count)
+                if i >= len(self.frames) or i >= len(self.recorded_frames) or
+                self.frames[i] != self.recorded_frames[i]]
+
+
+def replay(filename, setup=None, realtime=False):
+    """
+    Replays the recording in filename, setup(screen) builds the
+    application. Returns the ReplayScreen once all the input was handled.
+    """
+    old_screen = get_default_screen()
+    screen = ReplayScreen(filename, realtime)
+    set_default_screen(screen)
+    try:
+        screen.start()
+        if setup is not None:
+            setup(screen)
+        run_pending()
+        while screen.has_input():
+            screen.process_input()
+            run_pending()
+        return screen
+    finally:
+        if screen.started:
+            screen.stop()
+        set_default_screen(old_screen)
+
+
+def _load_setup(name):
+    module, attr = name.split(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) < 2 or argv[0] not in ("info", "replay"):
+        print("usage: python -m utk.recording info FILE\n"
+              "       python -m utk.recording replay FILE [module:setup]")
+        return 2
+    command, filename = argv[:2]
+    if command == "info":
+        cols, rows, entries = load_recording(filename)
+        print("screen %dx%d" % (cols, rows))
+        if entries:
+            print("duration %.1f s" %
+                  (entries[-1].timestamp - entries[0].timestamp))
+        for kind, name in ((INPUT, "input"), (RESIZE, "resize"),
+                           (FRAME, "frame"), (OUTPUT, "output")):
+            kind_entries = [e for e in entries if e.kind == kind]
+            print("%-6s %6d entries %10d bytes" % (
+                name, len(kind_entries), sum(len(e.data) for e in kind_entries)))
+        return 0
+    setup = _load_setup(argv[2]) if len(argv) > 2 else None
+    start = time.time()
+    screen = replay(filename, setup)
+    elapsed = time.time() - start
+    mismatched = screen.mismatched_frames()
+    print("%d frames replayed in %.3f s, %d recorded, %d mismatched" % (
+        len(screen.frames), elapsed, len(screen.recorded_frames),
+        len(mismatched)))
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
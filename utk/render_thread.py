@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.render_thread
+    ~~~~~~~~~~~~~~~~~
+
+    Background rendering of frames.
+
+    With a threaded render screen the main loop thread still does the size
+    negotiation and composes the canvases, then it publishes the composed
+    rows as a RenderFrame and goes back to handle input. A RenderThread
+    turns the frames into terminal output and writes it::
+
+        screen.set_threaded_render(True)
+
+    There are two buffers, the frame published and the frame being
+    rendered. Publishing never waits for the render thread: a frame
+    published before the previous one was taken replaces it, so a busy
+    terminal gets only the newest frame.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import time
+import logging
+import threading
+from collections import namedtuple
+
+from utk import trace
+
+log = logging.getLogger("utk.render_thread")
+
+# rows are the composed canvas content, owned by the frame; draw_start
+# and input_times are used to measure the input latency once written
+RenderFrame = namedtuple("RenderFrame",
+                         "rows cursor maxcol maxrow draw_start input_times")
+
+
+class RenderThread(object):
+    """
+    Thread calling render(frame) with the frames published.
+    """
+
+    def __init__(self, render, name="utk-render"):
+        self._render = render
+        self._name = name
+        self._cond = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._running = False
+        self._thread = None
+        # frames replaced before being rendered
+        self.dropped = 0
+        self.rendered = 0
+
+    @property
+    def is_running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            raise Warning("RenderThread already started")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self._name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Render the frame pending, if any, and stop the thread."""
+        if not self._running:
+            return
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def publish(self, frame):
+        """Hand frame to the render thread, replacing the one pending."""
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+                if trace.enabled:
+                    trace.instant("frame_dropped", "render")
+            self._pending = frame
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """
+        Wait until the frames published are written. Returns False if
+        timeout seconds passed first.
+        """
+        with self._cond:
+            # wait() may return early, wait again in that case
+            end = None if timeout is None else time.time() + timeout
+            while self._pending is not None or self._busy:
+                if end is None:
+                    self._cond.wait()
+                else:
+                    remaining = end - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and self._running:
+                    self._cond.wait()
+                if self._pending is None:
+                    break
+                frame, self._pending = self._pending, None
+                self._busy = True
+            tstart = trace.now() if trace.enabled else None
+            try:
+                self._render(frame)
+            except Exception:
+                log.exception("rendering frame")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self.rendered += 1
+                    self._cond.notify_all()
+            if tstart is not None:
+                trace.complete("render_frame", tstart, "render")
@@ -7,13 +7,18 @@ import time
 import termios
 import logging
 
-import gulib
 from gulib import UObject, usignal, type_name
 from gulib.compat import b, bytes3
 from utk.utils import int_scale, StoppingContext
 from utk.constants import PRIORITY_REDRAW
+from utk.event import make_events
+from utk.latency import LatencyStats
+from utk.profiler import get_profiler
+from utk.canvas import BlankCanvas
+from utk import mainloop, trace, updates
 
 log = logging.getLogger("utk.screen")
+latency_log = logging.getLogger("utk.latency")
 
 # for replacing unprintable bytes with '?'
 UNPRINTABLE_TRANS_TABLE = b("?") * 32 + bytes3(range(32, 256))
@@ -49,17 +54,22 @@ _BASIC_COLOR_VALUES = [
     (0, 255, 255), (255, 255, 255)
 ]
 
-_COLOR_VALUES_256 = (_BASIC_COLOR_VALUES +
-    [(r, g, b) for r in _CUBE_STEPS_256 for g in _CUBE_STEPS_256
-    for b in _CUBE_STEPS_256] +
-    [(gr, gr, gr) for gr in _GRAY_STEPS_256])
-_COLOR_VALUES_88 = (_BASIC_COLOR_VALUES +
-    [(r, g, b) for r in _CUBE_STEPS_88 for g in _CUBE_STEPS_88
-    for b in _CUBE_STEPS_88] +
-    [(gr, gr, gr) for gr in _GRAY_STEPS_88])
-
-assert len(_COLOR_VALUES_256) == 256
-assert len(_COLOR_VALUES_88) == 88
+# color values and lookup tables, built by _build_color_tables() when
+# a color is first parsed or described
+_COLOR_VALUES_256 = None
+_COLOR_VALUES_88 = None
+_CUBE_256_LOOKUP = None
+_GRAY_256_LOOKUP = None
+_CUBE_88_LOOKUP = None
+_GRAY_88_LOOKUP = None
+_CUBE_STEPS_256_16 = None
+_GRAY_STEPS_256_101 = None
+_CUBE_STEPS_88_16 = None
+_GRAY_STEPS_88_101 = None
+_CUBE_256_LOOKUP_16 = None
+_GRAY_256_LOOKUP_101 = None
+_CUBE_88_LOOKUP_16 = None
+_GRAY_88_LOOKUP_101 = None
 
 _FG_COLOR_MASK = 0x000000ff
 _BG_COLOR_MASK = 0x0000ff00
@@ -138,27 +148,50 @@ def _value_lookup_table(values, size):
         lookup_table.extend([i] * count)
     return lookup_table
 
-_CUBE_256_LOOKUP = _value_lookup_table(_CUBE_STEPS_256, 256)
-_GRAY_256_LOOKUP = _value_lookup_table([0] + _GRAY_STEPS_256 + [0xff], 256)
-_CUBE_88_LOOKUP = _value_lookup_table(_CUBE_STEPS_88, 256)
-_GRAY_88_LOOKUP = _value_lookup_table([0] + _GRAY_STEPS_88 + [0xff], 256)
-
-# convert steps to values that will be used by string versions of the colors
-# 1 hex digit for rgb and 0..100 for grayscale
-_CUBE_STEPS_256_16 = [int_scale(n, 0x100, 0x10) for n in _CUBE_STEPS_256]
-_GRAY_STEPS_256_101 = [int_scale(n, 0x100, 101) for n in _GRAY_STEPS_256]
-_CUBE_STEPS_88_16 = [int_scale(n, 0x100, 0x10) for n in _CUBE_STEPS_88]
-_GRAY_STEPS_88_101 = [int_scale(n, 0x100, 101) for n in _GRAY_STEPS_88]
-
-# create lookup tables for 1 hex digit rgb and 0..100 for grayscale values
-_CUBE_256_LOOKUP_16 = [_CUBE_256_LOOKUP[int_scale(n, 16, 0x100)]
-    for n in range(16)]
-_GRAY_256_LOOKUP_101 = [_GRAY_256_LOOKUP[int_scale(n, 101, 0x100)]
-    for n in range(101)]
-_CUBE_88_LOOKUP_16 = [_CUBE_88_LOOKUP[int_scale(n, 16, 0x100)]
-    for n in range(16)]
-_GRAY_88_LOOKUP_101 = [_GRAY_88_LOOKUP[int_scale(n, 101, 0x100)]
-    for n in range(101)]
+def _build_color_tables():
+    """Build the color tables, not done at import to keep it fast."""
+    global _COLOR_VALUES_256, _COLOR_VALUES_88
+    global _CUBE_256_LOOKUP, _GRAY_256_LOOKUP, _CUBE_88_LOOKUP, _GRAY_88_LOOKUP
+    global _CUBE_STEPS_256_16, _GRAY_STEPS_256_101
+    global _CUBE_STEPS_88_16, _GRAY_STEPS_88_101
+    global _CUBE_256_LOOKUP_16, _GRAY_256_LOOKUP_101
+    global _CUBE_88_LOOKUP_16, _GRAY_88_LOOKUP_101
+
+    _CUBE_256_LOOKUP = _value_lookup_table(_CUBE_STEPS_256, 256)
+    _GRAY_256_LOOKUP = _value_lookup_table([0] + _GRAY_STEPS_256 + [0xff], 256)
+    _CUBE_88_LOOKUP = _value_lookup_table(_CUBE_STEPS_88, 256)
+    _GRAY_88_LOOKUP = _value_lookup_table([0] + _GRAY_STEPS_88 + [0xff], 256)
+
+    # convert steps to values that will be used by string versions of the
+    # colors 1 hex digit for rgb and 0..100 for grayscale
+    _CUBE_STEPS_256_16 = [int_scale(n, 0x100, 0x10) for n in _CUBE_STEPS_256]
+    _GRAY_STEPS_256_101 = [int_scale(n, 0x100, 101) for n in _GRAY_STEPS_256]
+    _CUBE_STEPS_88_16 = [int_scale(n, 0x100, 0x10) for n in _CUBE_STEPS_88]
+    _GRAY_STEPS_88_101 = [int_scale(n, 0x100, 101) for n in _GRAY_STEPS_88]
+
+    # create lookup tables for 1 hex digit rgb and 0..100 for grayscale values
+    _CUBE_256_LOOKUP_16 = [_CUBE_256_LOOKUP[int_scale(n, 16, 0x100)]
+        for n in range(16)]
+    _GRAY_256_LOOKUP_101 = [_GRAY_256_LOOKUP[int_scale(n, 101, 0x100)]
+        for n in range(101)]
+    _CUBE_88_LOOKUP_16 = [_CUBE_88_LOOKUP[int_scale(n, 16, 0x100)]
+        for n in range(16)]
+    _GRAY_88_LOOKUP_101 = [_GRAY_88_LOOKUP[int_scale(n, 101, 0x100)]
+        for n in range(101)]
+
+    color_values_256 = (_BASIC_COLOR_VALUES +
+        [(r, g, b) for r in _CUBE_STEPS_256 for g in _CUBE_STEPS_256
+        for b in _CUBE_STEPS_256] +
+        [(gr, gr, gr) for gr in _GRAY_STEPS_256])
+    color_values_88 = (_BASIC_COLOR_VALUES +
+        [(r, g, b) for r in _CUBE_STEPS_88 for g in _CUBE_STEPS_88
+        for b in _CUBE_STEPS_88] +
+        [(gr, gr, gr) for gr in _GRAY_STEPS_88])
+    assert len(color_values_256) == 256
+    assert len(color_values_88) == 88
+    # set last, the other threads check it to know the tables are built
+    _COLOR_VALUES_88 = color_values_88
+    _COLOR_VALUES_256 = color_values_256
 
 def _color_desc_256(num):
     """
@@ -167,6 +200,8 @@ def _color_desc_256(num):
     16..231 -> '#000'..'#fff' color cube colors
     232..255 -> 'g3'..'g93' grays
     """
+    if _COLOR_VALUES_256 is None:
+        _build_color_tables()
     assert num >= 0 and num < 256, num
     if num < _CUBE_START:
         return 'h%d' % num
@@ -186,6 +221,8 @@ def _color_desc_88(num):
     16..79 -> '#000'..'#fff' color cube colors
     80..87 -> 'g18'..'g90' grays
     """
+    if _COLOR_VALUES_256 is None:
+        _build_color_tables()
     assert num > 0 and num < 88
     if num < _CUBE_START:
         return 'h%d' % num
@@ -207,6 +244,8 @@ def _parse_color_256(desc):
 
     Returns None if desc is invalid.
     """
+    if _COLOR_VALUES_256 is None:
+        _build_color_tables()
     if len(desc) > 4:
         # keep the length within reason before parsing
         return None
@@ -266,6 +305,8 @@ def _parse_color_88(desc):
 
     Returns None if desc is invalid.
     """
+    if _COLOR_VALUES_256 is None:
+        _build_color_tables()
     if len(desc) > 4:
         # keep the length within reason before parsing
         return None
@@ -514,6 +555,8 @@ class AttrSpec(object):
         >>> AttrSpec('default', 'g92').get_rgb_values()
         (None, None, None, 238, 238, 238)
         """
+        if _COLOR_VALUES_256 is None:
+            _build_color_tables()
         if not (self.foreground_basic or self.foreground_high):
             vals = (None, None, None)
         elif self.colors == 88:
@@ -605,7 +648,14 @@ class BaseScreen(UObject):
         self._started = False
         self._update_idle = None
         self._toplevels = []
+        self._root_canvas = None
         self._palette = {}
+        self._event_handlers = {}
+        self.latency = LatencyStats()
+        self._input_time = None
+        self._damage_input_times = []
+        self._draw_start = None
+        self._latency_dump_id = 0
 
     started = property(lambda self: self._started)
 
@@ -754,29 +804,173 @@ class BaseScreen(UObject):
     def get_cols_rows(self):
         """Return the terminal dimensions (num columns, num rows)"""
         cols_rows = self.emit("get-cols-rows")
-        log.debug("%s::get_cols_rows() = %r", type_name(self), cols_rows)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::get_cols_rows() = %r", type_name(self), cols_rows)
         return cols_rows
 
     def draw_screen(self):
         """Paint screen with rendered canvas."""
         stime = time.time()
+        self._draw_start = stime
         # TODO: build bg_canvas and toplevel widgets
         self.emit("draw-screen")
-        log.debug("%s::draw_screen() took %s sec", type_name(self), (time.time()-stime))
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.frame_done()
+        if trace.enabled:
+            trace.complete("draw_screen", stime, "screen")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::draw_screen() took %s sec", type_name(self),
+                      time.time() - stime)
 
     def draw_screen_idle(self):
         """Call draw_screen() in idle update"""
-        log.debug("%s::draw_screen_idle() running", type_name(self))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::draw_screen_idle() running", type_name(self))
+        if not self.started:
+            # stopped after the draw was queued
+            self._update_idle = None
+            return False
+        if updates.is_frozen():
+            self._update_idle = None
+            updates.defer_screen_draw(self)
+            return False
         self.draw_screen()
         self._update_idle = None
         return False
 
     def queue_draw(self):
         """Signal this Screen to redraw in the next idle update"""
-        log.debug("%s::queue_draw()", type_name(self))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::queue_draw()", type_name(self))
+        if self._input_time is not None:
+            # this damage was caused by the last input read
+            self._damage_input_times.append(self._input_time)
+            self._input_time = None
         if not self._update_idle:
-            self._update_idle = gulib.idle_add(self.draw_screen_idle, priority=PRIORITY_REDRAW)
+            self._update_idle = mainloop.idle_add(self.draw_screen_idle, priority=PRIORITY_REDRAW)
+
+
+    def get_input(self, raw_keys=False):
+        """
+        Return the input read since the last call as a list of keys and
+        events, as described by the raw display get_input(). With raw_keys
+        a (keys, raw keycodes) tuple is returned instead, the raw keycodes
+        being the bytes read as a list of ints.
+
+        Screens reading input override this, the default has no input.
+        """
+        if raw_keys:
+            return [], []
+        return []
+
+    def input_received(self, timestamp):
+        """
+        Called by subclasses with the time a batch of input was read.
+        If handling that input queues a redraw, the time until the frame
+        is written is recorded in :attr:`latency`. The batch is handled
+        when :meth:`dispatch_events` returns, or when input_handled() is
+        called by applications handling get_input() keys themselves.
+        """
+        self._input_time = timestamp
+
+    def input_handled(self):
+        """
+        The input batch read last is handled, a redraw queued after this
+        isn't caused by it.
+        """
+        self._input_time = None
+
+    def take_damage_input_times(self):
+        """
+        Return the input times of the redraws the frame being drawn
+        handles, they aren't reported by frame_written() anymore.
+        """
+        input_times = self._damage_input_times
+        self._damage_input_times = []
+        return input_times
+
+    def frame_written(self, write_start, write_end, draw_start=None,
+                      input_times=None):
+        """
+        Called by subclasses when the frame being drawn has been handed
+        to the terminal. write_start is the time the output of the frame
+        started to be written. A frame written from another thread gives
+        the draw_start and the input_times taken when it was drawn.
+        """
+        if input_times is None:
+            draw_start = self._draw_start
+            input_times = self.take_damage_input_times()
+        if draw_start is None:
+            draw_start = write_start
+        for input_time in input_times:
+            self.latency.add(input_time, draw_start, write_start, write_end)
+
+    def set_latency_dump(self, interval):
+        """
+        Log the latency percentiles to the "utk.latency" logger every
+        interval seconds, or stop doing it if interval is None.
+        """
+        self._latency_dump_id += 1
+        if interval is None:
+            return
+        dump_id = self._latency_dump_id
+
+        def dump_latency():
+            if dump_id != self._latency_dump_id:
+                return False
+            latency_log.info("%s: %s", type_name(self), self.latency.format())
+            return True
+
+        mainloop.timeout_add_seconds(interval, dump_latency)
 
+    def get_events(self):
+        """
+        Return pending input as a list of :class:`utk.event.InputEvent`,
+        all of them stamped with the time the input was read.
+        """
+        keys = self.get_input()
+        return make_events(keys, time.time())
+
+    def add_event_handler(self, kind, handler):
+        """
+        Call handler(event) from :meth:`dispatch_events` for every event
+        of the given kind (one of the EVENT_* constants). Handlers are
+        called in the order they were added until one returns True.
+        """
+        # handler lists are replaced, not modified, so handlers may be
+        # added or removed while dispatching
+        handlers = self._event_handlers.get(kind, [])
+        self._event_handlers[kind] = handlers + [handler]
+
+    def remove_event_handler(self, kind, handler):
+        handlers = self._event_handlers.get(kind, [])
+        if handler in handlers:
+            handlers = list(handlers)
+            handlers.remove(handler)
+            self._event_handlers[kind] = handlers
+
+    def dispatch_events(self, events):
+        """
+        Deliver a batch of events to the registered handlers. Returns the
+        list of events that no handler consumed.
+        """
+        unhandled = []
+        handlers = self._event_handlers
+        try:
+            for event in events:
+                for handler in handlers.get(event.kind, ()):
+                    if handler(event):
+                        break
+                else:
+                    unhandled.append(event)
+        finally:
+            self.input_handled()
+        return unhandled
+
+    def process_input(self):
+        """Read pending input and dispatch it in one pass."""
+        return self.dispatch_events(self.get_events())
 
     def add_toplevel(self, widget):
         if widget not in self._toplevels:
@@ -796,8 +990,29 @@ class BaseScreen(UObject):
             self.queue_draw()
 
     def get_topcanvas(self):
-        # TODO: Build canvas tree
-        return self._toplevels[0].canvas
+        """
+        Return the canvas with the mapped toplevels composed in stacking
+        order, the last raised on top. Toplevels covered by the ones above
+        them are left out of the composition.
+        """
+        canvases = [w.canvas for w in self._toplevels
+                    if w.is_mapped and w.canvas is not None]
+        if not canvases:
+            return self._toplevels[0].canvas if self._toplevels else None
+
+        cols, rows = self.get_cols_rows()
+        root = self._root_canvas
+        if root is None:
+            root = self._root_canvas = BlankCanvas(0, 0, cols, rows)
+        else:
+            root.resize(cols, rows)
+        if root._childs != canvases:
+            for canvas in list(root._childs):
+                root.remove_child(canvas)
+            for canvas in canvases:
+                canvas.unparent()
+                root.add_child(canvas)
+        return root
 
 
 _default_screen = None
@@ -808,3 +1023,11 @@ def get_default_screen():
         from utk.raw_display import Screen
         _default_screen = Screen()
     return _default_screen
+
+def set_default_screen(screen):
+    """
+    Make screen the one used by new toplevels, for example an
+    utk.headless_display.Screen to draw without a terminal.
+    """
+    global _default_screen
+    _default_screen = screen
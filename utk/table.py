@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.table
+    ~~~~~~~~~
+
+    A scrolling grid of text cells with fixed header rows.
+
+    UtkTable lays the cells of each row out in columns. The column widths
+    are cached: they are estimated from the header and a sample of rows
+    when the content is set, and then only grow when a rendered cell
+    doesn't fit, so cells are never all measured. Like UtkListView, only
+    the visible rows (and only the columns that fit) are rendered.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import logging
+
+from gulib.compat import b
+
+from utk.listview import ListView
+from utk.utils import Requisition, calc_text_pos, calc_width
+from utk.canvas import TextCanvas
+
+log = logging.getLogger("utk.table")
+
+
+def _fit_text(text, width):
+    """Returns text clipped or padded to width columns."""
+    end, col = calc_text_pos(text, 0, len(text), width)
+    return text[:end] + b(" ") * (width - col)
+
+
+class Table(ListView):
+    """
+    Container that shows rows of cells in columns.
+
+    :columns: number of columns, taken from the header or the first model
+              row when None.
+    :row_count: number of rows, ignored when a model is given.
+    :cell_renderer: callable returning the text of the cell at (row,
+                    column), called only for visible cells.
+    :model: a sequence of rows, each one a sequence of cells texts.
+    :header: rows of cells texts kept at the top while the table scrolls.
+    :spacing: columns between cells.
+    :sample_size: rows measured to estimate the column widths.
+    :max_column_width: limit for the automatic column widths.
+    """
+    __type_name__ = "UtkTable"
+
+    def __init__(self, columns=None, row_count=0, cell_renderer=None,
+                 model=None, header=None, spacing=1, overscan=2,
+                 sample_size=100, max_column_width=40):
+        self._header = [list(cells) for cells in header or []]
+        if columns is None:
+            if self._header:
+                columns = len(self._header[0])
+            elif model:
+                columns = len(model[0])
+            else:
+                columns = 0
+        self._columns = columns
+        self._cell_renderer = cell_renderer
+        self._spacing = spacing
+        self._sample_size = sample_size
+        self._max_column_width = max_column_width
+        self._column_widths = [0] * columns
+        self._fixed_widths = {}
+        self._widths_changed = False
+        self._header_canvases = []
+        super(Table, self).__init__(row_count, overscan=overscan)
+        if model is not None:
+            self.set_model(model)
+        else:
+            self._sample_widths()
+
+    def get_columns(self):
+        return self._columns
+
+    columns = property(get_columns)
+
+    def set_model(self, model):
+        self._cell_renderer = None
+        super(Table, self).set_model(model)
+        self._sample_widths()
+
+    def set_cell_renderer(self, cell_renderer):
+        self._cell_renderer = cell_renderer
+        self._model = None
+        self._sample_widths()
+        self.refresh()
+
+    def set_row_count(self, row_count):
+        if self._row_count != row_count:
+            super(Table, self).set_row_count(row_count)
+            self._sample_widths()
+
+    def get_header(self):
+        return self._header
+
+    def set_header(self, header):
+        self._header = [list(cells) for cells in header]
+        self.notify("header")
+        for cells in self._header:
+            self._measure_cells(cells)
+        self._columns_changed()
+
+    header = property(get_header, set_header)
+
+    def get_spacing(self):
+        return self._spacing
+
+    def set_spacing(self, spacing):
+        if self._spacing != spacing:
+            self._spacing = spacing
+            self.notify("spacing")
+            self._columns_changed()
+
+    spacing = property(get_spacing, set_spacing,
+                       doc="The amount of space between columns")
+
+    def get_column_widths(self):
+        return [self._fixed_widths.get(i, w)
+                for i, w in enumerate(self._column_widths)]
+
+    def set_column_width(self, column, width):
+        """
+        Fixes the width of @column, or goes back to the automatic width
+        if @width is None.
+        """
+        if width is None:
+            self._fixed_widths.pop(column, None)
+        else:
+            self._fixed_widths[column] = width
+        self._columns_changed()
+
+    def _columns_changed(self):
+        self.queue_resize()
+        self.refresh()
+
+    def _get_cell(self, row, column):
+        if self._cell_renderer is not None:
+            return self._cell_renderer(row, column)
+        if self._model is not None:
+            cells = self._model[row]
+            if column < len(cells):
+                return cells[column]
+        return ""
+
+    def _measure_cells(self, cells):
+        for column, text in enumerate(cells[:self._columns]):
+            self._measure_cell(column, b(text))
+
+    def _measure_cell(self, column, text):
+        width = min(calc_width(text, 0, len(text)), self._max_column_width)
+        if width > self._column_widths[column]:
+            self._column_widths[column] = width
+            if column not in self._fixed_widths:
+                self._widths_changed = True
+
+    def _sample_widths(self):
+        """
+        Estimates the column widths from the header and up to sample_size
+        rows spread over the table.
+        """
+        self._column_widths = [0] * self._columns
+        for cells in self._header:
+            self._measure_cells(cells)
+        if self._row_count:
+            step = max(1, self._row_count // max(1, self._sample_size))
+            for row in range(0, self._row_count, step)[:self._sample_size]:
+                for column in range(self._columns):
+                    self._measure_cell(column, b(self._get_cell(row, column)))
+        self._widths_changed = False
+        self.queue_resize()
+
+    def _format_cells(self, get_cell, cols):
+        """
+        Returns the line for a row, get_cell is only called for the columns
+        that start inside cols.
+        """
+        line = []
+        x = 0
+        for column, width in enumerate(self.get_column_widths()):
+            if x >= cols:
+                break
+            text = b(get_cell(column))
+            self._measure_cell(column, text)
+            if column:
+                line.append(b(" ") * self._spacing)
+            line.append(_fit_text(text, width))
+            x += width + self._spacing
+        line = b("").join(line)
+        end, col = calc_text_pos(line, 0, len(line), cols)
+        return line[:end]
+
+    def _render_row(self, index, cols):
+        return self._format_cells(lambda column: self._get_cell(index, column),
+                                  cols)
+
+    def _get_viewport(self):
+        left, top, cols, rows = super(Table, self)._get_viewport()
+        header_rows = min(len(self._header), rows)
+        return left, top + header_rows, cols, rows - header_rows
+
+    def _update_header(self):
+        left = self._allocation.x + self.border_width
+        top = self._allocation.y + self.border_width
+        cols = max(1, self._allocation.width - self.border_width*2)
+        rows = max(0, self._allocation.height - self.border_width*2)
+        header = self._header[:rows]
+
+        while len(self._header_canvases) > len(header):
+            self.canvas.remove_child(self._header_canvases.pop())
+
+        for i, cells in enumerate(header):
+            text = self._format_cells(
+                lambda column: cells[column] if column < len(cells) else "",
+                cols)
+            if i < len(self._header_canvases):
+                canvas = self._header_canvases[i]
+                canvas.move_to(left, top + i)
+                canvas.resize(cols, 1)
+                if canvas._text != [text]:
+                    canvas.set_text([text])
+            else:
+                canvas = TextCanvas(text=[text], left=left, top=top + i,
+                                    cols=cols, rows=1)
+                self.canvas.add_child(canvas)
+                canvas.show()
+                self._header_canvases.append(canvas)
+
+    def _update_rows(self):
+        if not self.is_realized:
+            return
+        self._update_header()
+        super(Table, self)._update_rows()
+        if self._widths_changed:
+            # a rendered cell didn't fit, lay the rows out again
+            self._widths_changed = False
+            self._columns_changed()
+
+    # "size-request" signal handler
+    def do_size_request(self):
+        widths = self.get_column_widths()
+        width = sum(widths) + self._spacing * max(0, len(widths) - 1)
+        height = len(self._header) + min(self._row_count, 1)
+        return Requisition(width + self.border_width*2,
+                           height + self.border_width*2)
+
+    # "unrealize" signal handler
+    def do_unrealize(self):
+        del self._header_canvases[:]
+        super(Table, self).do_unrealize()
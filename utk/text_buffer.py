@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.text_buffer
+    ~~~~~~~~~~~~~~~
+
+    A rope of bytes for editable text.
+
+    The text is kept in leaves of at most LEAF_SIZE bytes, joined by a
+    height balanced binary tree whose nodes cache the length and the number
+    of newlines below them. Inserting, deleting and mapping between offsets
+    and (line, column) positions walk a single path of the tree, so they
+    take O(log n) whatever the size of the text.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+from gulib.compat import b
+
+LEAF_SIZE = 4096
+
+_NEWLINE = b("\n")
+
+
+class _Leaf(object):
+    __slots__ = ("text", "length", "newlines")
+
+    height = 0
+    left = right = None
+
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        self.newlines = text.count(_NEWLINE)
+
+
+class _Node(object):
+    __slots__ = ("left", "right", "length", "newlines", "height")
+
+    text = None
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.length = left.length + right.length
+        self.newlines = left.newlines + right.newlines
+        self.height = max(left.height, right.height) + 1
+
+
+def _rotate_left(node):
+    return _Node(_Node(node.left, node.right.left), node.right.right)
+
+
+def _rotate_right(node):
+    return _Node(node.left.left, _Node(node.left.right, node.right))
+
+
+def _balance(left, right):
+    diff = left.height - right.height
+    if diff > 1:
+        if left.left.height < left.right.height:
+            left = _rotate_left(left)
+        return _rotate_right(_Node(left, right))
+    if diff < -1:
+        if right.right.height < right.left.height:
+            right = _rotate_right(right)
+        return _rotate_left(_Node(left, right))
+    return _Node(left, right)
+
+
+def _join(left, right):
+    """Returns the balanced concatenation of two trees."""
+    if left is None or not left.length:
+        return right
+    if right is None or not right.length:
+        return left
+    if left.height > right.height + 1:
+        return _balance(left.left, _join(left.right, right))
+    if right.height > left.height + 1:
+        return _balance(_join(left, right.left), right.right)
+    if left.text is not None and right.text is not None and\
+       left.length + right.length <= LEAF_SIZE:
+        return _Leaf(left.text + right.text)
+    return _balance(left, right)
+
+
+def _split(node, offset):
+    """Returns the trees with the text before and after offset."""
+    if node is None:
+        return None, None
+    if offset <= 0:
+        return None, node
+    if offset >= node.length:
+        return node, None
+    if node.text is not None:
+        return _Leaf(node.text[:offset]), _Leaf(node.text[offset:])
+    left_length = node.left.length
+    if offset < left_length:
+        left, right = _split(node.left, offset)
+        return left, _join(right, node.right)
+    if offset == left_length:
+        return node.left, node.right
+    left, right = _split(node.right, offset - left_length)
+    return _join(node.left, left), right
+
+
+def _build(text, start=0, end=None):
+    """Returns a balanced tree for text[start:end]."""
+    if end is None:
+        end = len(text)
+    if end - start <= LEAF_SIZE:
+        if start == end:
+            return None
+        return _Leaf(text[start:end])
+    leaves = (end - start + LEAF_SIZE - 1) // LEAF_SIZE
+    middle = start + (leaves // 2) * LEAF_SIZE
+    return _Node(_build(text, start, middle), _build(text, middle, end))
+
+
+class TextBuffer(object):
+    """
+    Editable text as bytes, addressed by byte offsets or by (line, column)
+    positions where column is a byte offset into the line.
+    """
+
+    def __init__(self, text=b("")):
+        self._root = _build(b(text))
+
+    def __len__(self):
+        if self._root is None:
+            return 0
+        return self._root.length
+
+    @property
+    def line_count(self):
+        if self._root is None:
+            return 1
+        return self._root.newlines + 1
+
+    def get_text(self, start=0, end=None):
+        """Returns the bytes between start and end offsets."""
+        length = len(self)
+        if end is None or end > length:
+            end = length
+        if start >= end:
+            return b("")
+        chunks = []
+        stack = [(self._root, 0)]
+        while stack:
+            node, offset = stack.pop()
+            if offset >= end or offset + node.length <= start:
+                continue
+            if node.text is not None:
+                chunks.append(node.text[max(0, start - offset):end - offset])
+            else:
+                stack.append((node.right, offset + node.left.length))
+                stack.append((node.left, offset))
+        return b("").join(chunks)
+
+    def insert(self, offset, text):
+        """Inserts text at offset."""
+        text = b(text)
+        if not text:
+            return
+        assert 0 <= offset <= len(self), "offset out of range"
+        left, right = _split(self._root, offset)
+        self._root = _join(_join(left, _build(text)), right)
+
+    def delete(self, start, end):
+        """Deletes the bytes between start and end offsets."""
+        if start >= end:
+            return
+        assert 0 <= start and end <= len(self), "offset out of range"
+        left, rest = _split(self._root, start)
+        middle, right = _split(rest, end - start)
+        self._root = _join(left, right)
+
+    def line_start(self, line):
+        """Returns the offset where line begins."""
+        if line <= 0:
+            return 0
+        node = self._root
+        assert node is not None and line <= node.newlines, \
+            "line out of range"
+        offset = 0
+        while node.text is None:
+            if line <= node.left.newlines:
+                node = node.left
+            else:
+                line -= node.left.newlines
+                offset += node.left.length
+                node = node.right
+        pos = -1
+        for i in range(line):
+            pos = node.text.index(_NEWLINE, pos + 1)
+        return offset + pos + 1
+
+    def line_end(self, line):
+        """Returns the offset of the end of line, before its newline."""
+        if line + 1 < self.line_count:
+            return self.line_start(line + 1) - 1
+        return len(self)
+
+    def get_line(self, line):
+        """Returns the text of line without its newline."""
+        return self.get_text(self.line_start(line), self.line_end(line))
+
+    def offset_to_line_col(self, offset):
+        """Returns the (line, column) position of offset."""
+        node = self._root
+        line = 0
+        remaining = offset
+        while node is not None and node.text is None:
+            if remaining < node.left.length:
+                node = node.left
+            else:
+                line += node.left.newlines
+                remaining -= node.left.length
+                node = node.right
+        if node is not None:
+            line += node.text.count(_NEWLINE, 0, remaining)
+        return line, offset - self.line_start(line)
+
+    def line_col_to_offset(self, line, col):
+        """
+        Returns the offset of the (line, column) position, clamped to the
+        text and to the line length.
+        """
+        line = max(0, min(line, self.line_count - 1))
+        start = self.line_start(line)
+        return start + max(0, min(col, self.line_end(line) - start))
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.text_edit
+    ~~~~~~~~~~~~~
+
+    An editable multi-line text widget.
+
+    UtkTextEdit shows a :class:`utk.text_buffer.TextBuffer` one line per
+    row, using the row virtualization of UtkListView: an edit renders
+    again only the lines it changed that are on screen, or the lines below
+    it when it added or removed newlines.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import logging
+
+from gulib import usignal
+from gulib.compat import b
+
+from utk.listview import ListView
+from utk.str_util import (
+    move_next_char, move_prev_char, calc_width, calc_text_pos,
+)
+from utk.text_buffer import TextBuffer
+from utk.utils import get_target_encoding
+
+log = logging.getLogger("utk.text_edit")
+
+_NEWLINE = b("\n")
+
+
+class TextEdit(ListView):
+    """
+    Multi-line text editor.
+
+    :text: initial text, ignored when a buffer is given.
+    :buffer: the TextBuffer to edit.
+    """
+    __type_name__ = "UtkTextEdit"
+
+    usignal("changed")
+
+    def __init__(self, text="", buffer=None):
+        super(TextEdit, self).__init__()
+        if buffer is None:
+            buffer = TextBuffer(text)
+        self._buffer = buffer
+        self._row_count = buffer.line_count
+        self._row_renderer = self._render_line
+        self._cursor = 0
+        # screen column kept when moving up and down
+        self._goal_col = None
+
+    def get_buffer(self):
+        return self._buffer
+
+    buffer = property(get_buffer)
+
+    def get_text(self):
+        return self._buffer.get_text()
+
+    def set_text(self, text):
+        self._buffer = TextBuffer(text)
+        self._cursor = 0
+        self._row_count = self._buffer.line_count
+        self._top = 0
+        self.notify("text")
+        self.refresh()
+        self.emit("changed")
+
+    text = property(get_text, set_text)
+
+    def get_cursor(self):
+        """Returns the cursor offset into the buffer."""
+        return self._cursor
+
+    def set_cursor(self, offset):
+        self._cursor = max(0, min(offset, len(self._buffer)))
+        self._goal_col = None
+        self.notify("cursor")
+        self.scroll_to_cursor()
+
+    cursor = property(get_cursor, set_cursor)
+
+    def get_cursor_position(self):
+        """Returns the cursor (line, column) position."""
+        return self._buffer.offset_to_line_col(self._cursor)
+
+    def scroll_to_cursor(self):
+        line, col = self.get_cursor_position()
+        page_rows = self.get_page_rows()
+        if line < self._top:
+            self.set_top(line)
+        elif page_rows and line >= self._top + page_rows:
+            self.set_top(line - page_rows + 1)
+
+    def _render_line(self, line):
+        return self._buffer.get_line(line).replace(b("\t"), b(" "))
+
+    def _lines_changed(self, first_line, added_lines):
+        """
+        Renders again the damaged lines: first_line alone when the line
+        count didn't change, else every line from it on.
+        """
+        if added_lines:
+            self._row_count = self._buffer.line_count
+            self.notify("row-count")
+            self._set_top(self._top)
+            self.refresh(first_line)
+        else:
+            self.refresh(first_line, first_line + 1)
+        self.emit("changed")
+
+    def insert_text(self, text, offset=None):
+        """
+        Inserts text at offset, by default at the cursor. Unicode text is
+        encoded in the terminal encoding.
+        """
+        if not isinstance(text, bytes):
+            text = text.encode(get_target_encoding(), 'replace')
+        if offset is None:
+            offset = self._cursor
+        line, col = self._buffer.offset_to_line_col(offset)
+        self._buffer.insert(offset, text)
+        if offset <= self._cursor:
+            self._cursor += len(text)
+        self._lines_changed(line, text.count(_NEWLINE))
+        self.scroll_to_cursor()
+
+    def delete_text(self, start, end):
+        """Deletes the text between the start and end offsets."""
+        start = max(0, start)
+        end = min(end, len(self._buffer))
+        if start >= end:
+            return
+        line, col = self._buffer.offset_to_line_col(start)
+        removed = self._buffer.get_text(start, end).count(_NEWLINE)
+        self._buffer.delete(start, end)
+        if self._cursor >= end:
+            self._cursor -= end - start
+        elif self._cursor > start:
+            self._cursor = start
+        self._lines_changed(line, removed)
+        self.scroll_to_cursor()
+
+    def _next_char_offset(self, offset):
+        text = self._buffer.get_text(offset, offset + 4)
+        if not text:
+            return offset
+        return offset + move_next_char(text, 0, len(text))
+
+    def _prev_char_offset(self, offset):
+        start = max(0, offset - 4)
+        text = self._buffer.get_text(start, offset)
+        if not text:
+            return offset
+        return start + move_prev_char(text, 0, len(text))
+
+    def move_cursor(self, lines=0, chars=0):
+        """Moves the cursor by lines and by chars."""
+        if chars:
+            offset = self._cursor
+            for i in range(abs(chars)):
+                if chars > 0:
+                    offset = self._next_char_offset(offset)
+                else:
+                    offset = self._prev_char_offset(offset)
+            self.set_cursor(offset)
+        if lines:
+            line, col = self.get_cursor_position()
+            if self._goal_col is None:
+                text = self._render_line(line)
+                self._goal_col = calc_width(text, 0, col)
+            goal_col = self._goal_col
+            line = max(0, min(line + lines, self._buffer.line_count - 1))
+            # the offset of a character boundary, not inside a multibyte
+            # character
+            text = self._render_line(line)
+            col, width = calc_text_pos(text, 0, len(text), goal_col)
+            self.set_cursor(self._buffer.line_col_to_offset(line, col))
+            self._goal_col = goal_col
+
+    def keypress(self, key):
+        """
+        Handles an editing key as returned by Screen.get_input(), returns
+        True if it was used.
+        """
+        line, col = self.get_cursor_position()
+        if key == 'left':
+            self.move_cursor(chars=-1)
+        elif key == 'right':
+            self.move_cursor(chars=1)
+        elif key == 'up':
+            self.move_cursor(lines=-1)
+        elif key == 'down':
+            self.move_cursor(lines=1)
+        elif key == 'page up':
+            self.move_cursor(lines=-max(1, self.get_page_rows()))
+        elif key == 'page down':
+            self.move_cursor(lines=max(1, self.get_page_rows()))
+        elif key == 'home':
+            self.set_cursor(self._buffer.line_start(line))
+        elif key == 'end':
+            self.set_cursor(self._buffer.line_end(line))
+        elif key == 'enter':
+            self.insert_text(_NEWLINE)
+        elif key == 'backspace':
+            self.delete_text(self._prev_char_offset(self._cursor), self._cursor)
+        elif key == 'delete':
+            self.delete_text(self._cursor, self._next_char_offset(self._cursor))
+        elif isinstance(key, tuple) and key[0] == 'paste':
+            self.insert_text(key[1])
+        elif isinstance(key, str) and len(key) == 1 and key >= ' ':
+            self.insert_text(key)
+        else:
+            return False
+        return True
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.text_layout
+    ~~~~~~~~~~~~~~~
+
+    Line breaking for text widgets.
+
+    A layout splits a text in the screen lines shown for a given width and
+    wrap mode, as (start, end) byte offsets. Each hard line (paragraph) is
+    laid out on its own and cached on (line, width, mode), so an edit only
+    lays out the lines it changed and a reallocation to a previous width
+    reuses every line.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+from collections import OrderedDict
+
+from gulib.compat import b
+
+from utk.str_util import calc_text_pos, calc_width, move_next_char
+from utk.constants import WRAP_CHAR, WRAP_WORD, WRAP_CLIP
+
+_SPACE = b(" ")[0]
+_NEWLINE = b("\n")
+
+
+def calc_line_segments(line, width, mode):
+    """
+    Returns the (start, end) offsets of the screen lines needed to show a
+    single hard line in width columns. A width of None means unlimited.
+    """
+    if width is None or mode == WRAP_CLIP:
+        if width is None:
+            return [(0, len(line))]
+        end, col = calc_text_pos(line, 0, len(line), width)
+        return [(0, end)]
+    if not line:
+        return [(0, 0)]
+    width = max(width, 1)
+    segments = []
+    start = 0
+    length = len(line)
+    while start < length:
+        end, col = calc_text_pos(line, start, length, width)
+        if end == start:
+            # a wide char in a one column width
+            end = move_next_char(line, start, length)
+        next_start = end
+        if end < length and mode == WRAP_WORD:
+            space = line.rfind(b(" "), start, end + 1)
+            if space > start:
+                end = next_start = space
+                while end > start and line[end - 1] == _SPACE:
+                    end -= 1
+        segments.append((start, end))
+        start = next_start
+        if mode == WRAP_WORD:
+            while start < length and line[start] == _SPACE:
+                start += 1
+    return segments
+
+
+class TextLayout(object):
+    """
+    Lays out texts keeping the most recently used line segments.
+    """
+
+    def __init__(self, cache_size=4096):
+        self._cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self._cache.clear()
+
+    def layout(self, text, width, mode=WRAP_WORD):
+        """
+        Returns the (start, end) offsets into text of each screen line
+        when shown in width columns.
+        """
+        lines = []
+        offset = 0
+        for line in text.split(_NEWLINE):
+            for start, end in self.line_segments(line, width, mode):
+                lines.append((offset + start, offset + end))
+            offset += len(line) + 1
+        return lines
+
+    def line_segments(self, line, width, mode=WRAP_WORD):
+        """Cached calc_line_segments()."""
+        key = (line, width, mode)
+        segments = self._cache.pop(key, None)
+        if segments is None:
+            self.misses += 1
+            segments = calc_line_segments(line, width, mode)
+            if len(self._cache) >= self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+        self._cache[key] = segments
+        return segments
+
+    def text_width(self, text):
+        """Returns the width of the widest hard line of text."""
+        return max(calc_width(line, 0, len(line))
+                   for line in text.split(_NEWLINE))
+
+
+default_layout = TextLayout()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.text_shaping
+    ~~~~~~~~~~~~~~~~
+
+    Measuring and wrapping the lines of large texts.
+
+    shape_lines() returns the width and the number of wrapped screen rows
+    of each line in a range of a text. Both only depend on the bytes and
+    the byte encoding, so with an executor installed the ranges are shaped
+    in other processes while the main loop goes on::
+
+        text_shaping.set_executor(ProcessPoolExecutor())
+
+    The text isn't pickled to the workers: a FileSource is mapped by each
+    worker from its file, and a SharedTextSource is copied once to a shared
+    memory block the workers attach to. Without an executor the ranges are
+    shaped in the calling process.
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import mmap
+import logging
+from array import array
+
+from gulib.compat import b
+
+from utk import str_util
+from utk.constants import WRAP_CLIP
+from utk.text_layout import calc_line_segments
+
+log = logging.getLogger("utk.text_shaping")
+
+_NEWLINE = b("\n")
+
+
+def normalize_line(line):
+    """Returns line as it's shown, without "\\r" ending and tabs."""
+    return line.rstrip(b("\r")).replace(b("\t"), b(" "))
+
+
+def shape_lines(text, start, end, width, mode):
+    """
+    Returns the (widths, rows) arrays of the lines of text[start:end], a
+    range starting at a line start and ending after a newline or at the
+    end of the text. rows is the number of screen rows of each line when
+    wrapped in width columns.
+    """
+    widths = array('L')
+    rows = array('L')
+    chunk = text[start:end]
+    lines = chunk.split(_NEWLINE)
+    if not chunk or chunk.endswith(_NEWLINE):
+        lines.pop()
+    for line in lines:
+        line = normalize_line(line)
+        line_width = str_util.calc_width(line, 0, len(line))
+        widths.append(line_width)
+        if line_width <= width or mode == WRAP_CLIP:
+            rows.append(1)
+        else:
+            rows.append(len(calc_line_segments(line, width, mode)))
+    return widths, rows
+
+
+class FileSource(object):
+    """
+    The text of filename. data, the file already mapped, is used in this
+    process but not pickled to the workers.
+    """
+
+    def __init__(self, filename, data=None):
+        self.filename = filename
+        self.data = data
+
+    def __getstate__(self):
+        return {"filename": self.filename, "data": None}
+
+    def shape(self, start, end, width, mode):
+        if self.data is not None:
+            return shape_lines(self.data, start, end, width, mode)
+        with open(self.filename, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return shape_lines(data, start, end, width, mode)
+            finally:
+                data.close()
+
+
+def _shared_memory():
+    # imported when used, multiprocessing is slow to import
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        return None # python < 3.8
+    return shared_memory
+
+
+class SharedTextSource(object):
+    """
+    A text kept in shared memory, close() it when done. Without
+    multiprocessing.shared_memory the text is pickled instead.
+    """
+
+    def __init__(self, text):
+        self.size = len(text)
+        self._shm = None
+        self._text = None
+        shared_memory = _shared_memory()
+        if shared_memory is None:
+            self._text = text
+            self.name = None
+            return
+        self._shm = shared_memory.SharedMemory(create=True,
+                                               size=max(1, self.size))
+        self._shm.buf[:self.size] = text
+        self.name = self._shm.name
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        return state
+
+    def shape(self, start, end, width, mode):
+        if self._text is not None:
+            return shape_lines(self._text, start, end, width, mode)
+        shm = self._shm
+        if shm is None:
+            shm = _shared_memory().SharedMemory(name=self.name)
+        try:
+            # shape_lines() splits the range, give it bytes
+            text = bytes(shm.buf[start:end])
+        finally:
+            if shm is not self._shm:
+                shm.close()
+        return shape_lines(text, 0, len(text), width, mode)
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+class _Done(object):
+    # the future of a range shaped without executor
+
+    def __init__(self, result):
+        self._result = result
+
+    def done(self):
+        return True
+
+    def cancel(self):
+        return False
+
+    def result(self, timeout=None):
+        return self._result
+
+
+def _shape_source(source, start, end, width, mode, encoding):
+    # runs in the executor workers
+    if encoding is not None:
+        str_util.set_byte_encoding(encoding)
+    return source.shape(start, end, width, mode)
+
+
+_executor = None
+
+def get_executor():
+    return _executor
+
+def set_executor(executor):
+    """
+    Shape in a concurrent.futures executor, usually a ProcessPoolExecutor.
+    None shapes in the calling process.
+    """
+    global _executor
+    _executor = executor
+
+def submit(source, start, end, width, mode):
+    """
+    Returns a future of source.shape(start, end, width, mode), run in the
+    installed executor.
+    """
+    if _executor is None:
+        return _Done(source.shape(start, end, width, mode))
+    return _executor.submit(_shape_source, source, start, end, width, mode,
+                            str_util.get_byte_encoding())
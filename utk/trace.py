@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.trace
+    ~~~~~~~~~
+
+    A structured event trace.
+
+    The drawing hot paths check a module flag before doing any tracing
+    work, so with the trace off it costs a single attribute lookup. Their
+    debug logging is guarded by the logger level, which the logging module
+    caches::
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::queue_resize()", self.name)
+
+        tstart = trace.now() if trace.enabled else None
+        ...
+        if tstart is not None:
+            trace.complete("calculate_shards", tstart, "canvas")
+
+    The event trace is kept in a ring buffer while started and can be
+    saved in the Chrome trace event format, to be opened with
+    chrome://tracing or Perfetto::
+
+        trace.start()
+        ...
+        trace.stop().save("frames.json")
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque, namedtuple
+
+# event trace enabled
+enabled = False
+
+_tracer = None
+
+now = time.time
+
+# ph is the Chrome trace event type: "X" complete, "i" instant
+TraceEvent = namedtuple("TraceEvent", "name cat ph ts dur tid args")
+
+
+class Tracer(object):
+    """
+    Ring buffer of the last `size` trace events.
+    """
+
+    def __init__(self, size=100000):
+        self._events = deque(maxlen=size)
+        self.count = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, name, cat, ph, ts, dur=0, args=None):
+        self._events.append(TraceEvent(name, cat, ph, ts, dur,
+                                       threading.current_thread().ident,
+                                       args))
+        self.count += 1
+
+    def clear(self):
+        self._events.clear()
+
+    def events(self):
+        return list(self._events)
+
+    def to_chrome_trace(self):
+        """Return the events as a Chrome trace event format dict."""
+        pid = os.getpid()
+        trace_events = []
+        for e in self._events:
+            event = {"name": e.name, "cat": e.cat, "ph": e.ph,
+                     "ts": int(e.ts * 1e6), "pid": pid, "tid": e.tid}
+            if e.ph == "X":
+                event["dur"] = int(e.dur * 1e6)
+            elif e.ph == "i":
+                event["s"] = "t"
+            if e.args:
+                event["args"] = e.args
+            trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def save(self, filename):
+        """Write the events to filename as Chrome trace JSON."""
+        with open(filename, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+def start(size=100000):
+    """Start recording events in a new Tracer, and return it."""
+    global _tracer, enabled
+    _tracer = Tracer(size)
+    enabled = True
+    return _tracer
+
+def stop():
+    """Stop recording events, returns the Tracer with them."""
+    global enabled
+    enabled = False
+    return _tracer
+
+def get_tracer():
+    return _tracer
+
+def complete(name, start_time, cat="utk", **args):
+    """Record a span named name from start_time until now."""
+    if enabled:
+        _tracer.add(name, cat, "X", start_time, now() - start_time, args)
+
+def instant(name, cat="utk", **args):
+    """Record an event that happens at a point in time."""
+    if enabled:
+        _tracer.add(name, cat, "i", now(), 0, args)
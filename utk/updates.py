@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+    utk.updates
+    ~~~~~~~~~~~
+
+    Batched widget tree updates.
+
+    Between freeze_updates() and thaw_updates() the widgets don't realize,
+    map, renegotiate their size or invalidate their canvas. Those updates
+    are recorded and done once when the outermost freeze is thawed: one
+    size negotiation per toplevel and one frame per screen.
+
+        with utk.freeze_updates():
+            for row in rows:
+                vbox.pack_start(Label(row))
+                ...
+
+    :copyright: 2011-2012 by Utk Authors
+    :license: LGPL2 or later (see README/COPYING/LICENSE)
+"""
+
+import logging
+
+log = logging.getLogger("utk.updates")
+
+_freeze_count = 0
+_flushing = False
+
+# widgets whose realize/map was deferred, toplevels to renegotiate and
+# redraw, and screens whose idle redraw was deferred
+_deferred_maps = []
+_deferred_toplevels = []
+_deferred_screens = []
+
+
+class _FrozenUpdates(object):
+    """Context manager returned by freeze_updates()."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        thaw_updates()
+        return False
+
+
+def freeze_updates():
+    """
+    Defer widget updates until the matching thaw_updates(). Calls can be
+    nested, and the returned object can be used as a context manager that
+    thaws on exit.
+    """
+    global _freeze_count
+    _freeze_count += 1
+    return _FrozenUpdates()
+
+
+def thaw_updates():
+    """
+    Revert the effect of a previous freeze_updates(). When the last freeze
+    is thawed the deferred updates are done.
+    """
+    global _freeze_count
+    assert _freeze_count > 0, "thaw_updates() called without freeze_updates()"
+    _freeze_count -= 1
+    if _freeze_count == 0:
+        _flush()
+
+
+def is_frozen():
+    return _freeze_count > 0
+
+
+def draws_deferred():
+    """True while canvas invalidation is deferred (frozen or flushing)."""
+    return _freeze_count > 0 or _flushing
+
+
+def _append_once(queue, obj):
+    for queued in queue:
+        if queued is obj:
+            return
+    queue.append(obj)
+
+
+def defer_map(widget):
+    """Realize and map widget (if still needed) when thawed."""
+    if not widget._map_deferred:
+        widget._map_deferred = True
+        _deferred_maps.append(widget)
+    defer_resize(widget.get_toplevel())
+
+
+def defer_resize(toplevel):
+    """Renegotiate the size of toplevel and redraw it when thawed."""
+    _append_once(_deferred_toplevels, toplevel)
+
+
+def defer_screen_draw(screen):
+    """Redraw screen when thawed."""
+    _append_once(_deferred_screens, screen)
+
+
+def _flush():
+    global _flushing
+    from utk.container import _container_resize_queue
+
+    maps = _deferred_maps[:]
+    toplevels = _deferred_toplevels[:]
+    screens = _deferred_screens[:]
+    del _deferred_maps[:], _deferred_toplevels[:], _deferred_screens[:]
+    log.debug("flush %d maps, %d toplevels, %d screens",
+              len(maps), len(toplevels), len(screens))
+
+    # widgets are mapped after the size negotiation so they don't trigger
+    # one each, and they are drawn at once with their toplevel
+    _flushing = True
+    try:
+        _container_resize_queue.run()
+        for toplevel in toplevels:
+            if toplevel.is_toplevel and toplevel.is_visible and\
+               toplevel.is_realized:
+                toplevel.check_resize()
+        for widget in maps:
+            widget._map_deferred = False
+            parent = widget.parent
+            if parent is None:
+                continue
+            if parent.is_realized and not widget.is_realized:
+                widget.realize()
+            if parent.is_mapped and widget.is_visible and\
+               widget._child_visible and not widget.is_mapped:
+                widget.map()
+    finally:
+        _flushing = False
+        # the draws queued while flushing are done below, don't keep their
+        # toplevels for the next thaw
+        for toplevel in _deferred_toplevels:
+            _append_once(toplevels, toplevel)
+        del _deferred_toplevels[:]
+
+    for toplevel in toplevels:
+        if toplevel.is_toplevel:
+            toplevel.queue_draw()
+    for screen in screens:
+        screen.queue_draw()
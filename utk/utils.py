@@ -76,6 +76,12 @@ class Rectangle(_Rectangle):
         height = max(self.y+self.height, other.y+other.height) - y
         return Rectangle(x, y, width, height)
 
+    def contains(self, other):
+        """Return True if other is completely inside this rectangle"""
+        return (self.x <= other.x and self.y <= other.y and
+                other.x + other.width <= self.x + self.width and
+                other.y + other.height <= self.y + self.height)
+
 
 class StoppingContext(object):
     """
@@ -162,6 +168,14 @@ def get_encoding_mode():
     return str_util.get_byte_encoding()
 
 
+def get_target_encoding():
+    """
+    Get the encoding unicode strings are converted to, the terminal one
+    when it's supported, 'ascii' otherwise or before set_encoding().
+    """
+    return _target_encoding or 'ascii'
+
+
 def apply_target_encoding(s):
     """
     Return (encoded byte string, character set rle).
@@ -13,6 +13,7 @@
 import logging
 
 import utk
+from utk import trace, updates
 from gulib import UObject, usignal, type_name, SIGNAL_RUN_FIRST
 from utk.constants import STATE_NORMAL
 from utk.utils import Rectangle, Requisition
@@ -21,6 +22,9 @@ from utk.canvas import SolidCanvas
 
 log = logging.getLogger("utk.widget")
 
+# shared by the widgets not allocated yet
+_NO_ALLOCATION = Rectangle()
+
 
 class Widget(UObject):
     """
@@ -48,13 +52,20 @@ class Widget(UObject):
 
     _toplevel = False
 
+    # slots keep widgets small, subclasses list the attributes they add
+    __slots__ = ("_state", "_saved_state", "_name", "_requisition",
+                 "_requisition_gen", "_allocation", "_parent", "canvas",
+                 "_visible", "_mapped", "_realized", "_child_visible",
+                 "_redraw_on_alloc", "_request_needed",
+                 "_child_request_needed", "_alloc_needed", "_map_deferred")
+
     def __init__(self):
         self._state = STATE_NORMAL
         self._saved_state = STATE_NORMAL
         self._name = None
         self._requisition = None
-        self._allocation = Rectangle()
-        #self._allocation = None
+        self._requisition_gen = 0
+        self._allocation = _NO_ALLOCATION
         self._parent = None
         self.canvas = None
 
@@ -67,8 +78,9 @@ class Widget(UObject):
         self._child_visible = True
         self._redraw_on_alloc = True
         self._request_needed = True
+        self._child_request_needed = False
         self._alloc_needed = True
-
+        self._map_deferred = False
 
         super(Widget, self).__init__()
 
@@ -96,7 +108,8 @@ class Widget(UObject):
         on the container.
         """
         if not self.is_visible:
-            log.debug("%s::show()" % self.name)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s::show()", self.name)
             if self.is_toplevel:
                 self.queue_resize()
             self.emit("show")
@@ -106,11 +119,15 @@ class Widget(UObject):
         """Default 'show' handler implementation."""
         if not self.is_visible:
             self._visible = True
+            self._queue_ancesors_request()
             if (self.parent and
                 self.parent.is_mapped and
                 self._child_visible and
                 not self.is_mapped):
-                    self.map()
+                    if updates.is_frozen():
+                        updates.defer_map(self)
+                    else:
+                        self.map()
 
     def hide(self):
         """
@@ -118,7 +135,8 @@ class Widget(UObject):
         the widget to be hidden (removed from display) by unmapping it.
         """
         if self.is_visible:
-            log.debug("%s::hide()" % self.name)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s::hide()", self.name)
             self.emit("hide")
             self.notify("visible")
 
@@ -126,6 +144,7 @@ class Widget(UObject):
         """Default 'hide' signal handler."""
         if self.is_visible:
             self._visible = False
+            self._queue_ancesors_request()
             if self.is_mapped:
                 self.unmap()
 
@@ -152,13 +171,16 @@ class Widget(UObject):
             return
         if not self.is_mapped:
             if self._alloc_needed and self.parent:
-                log.debug("%s needs allocation", self)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("%s needs allocation", self)
                 self.parent._alloc_needed = True
                 self.parent.check_resize()
-                log.debug("%s allocation %r", self, self._allocation)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("%s allocation %r", self, self._allocation)
             if not self.is_realized:
                 self.realize()
-            log.debug("%s::map()" % self.name)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s::map()", self.name)
             self.emit("map")
 
     def do_map(self):
@@ -174,7 +196,8 @@ class Widget(UObject):
         method is not usually used by applications.
         """
         if self.is_mapped:
-            log.debug("%s::unmap()" % self.name)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s::unmap()", self.name)
             self.emit("unmap")
 
     def do_unmap(self):
@@ -206,7 +229,8 @@ class Widget(UObject):
                               "widget before realizing them.")
             if self.parent and not self.parent.is_realized:
                 self.parent.realize()
-            log.debug("%s::realize()", self.name)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s::realize()", self.name)
             self.emit("realize")
             if self.parent:
                 self.parent.canvas.add_child(self.canvas)
@@ -228,7 +252,8 @@ class Widget(UObject):
         if self.is_mapped:
             self.unmap()
         if self.is_realized:
-            log.debug("%s::unrealize()", self.name)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s::unrealize()", self.name)
             self.emit("unrealize")
 
     def do_unrealize(self):
@@ -244,10 +269,18 @@ class Widget(UObject):
         child wigdet and decide what size allocations to give them.
         Remember that the size request is not necessarily the size a wiget will
         actually be allocated.
+        The requisition is cached until :meth:queue_resize() is called.
         """
+        if not self._request_needed and self._requisition is not None:
+            return self._requisition
+        old_requisition = self._requisition
         requisition = self.emit("size-request")
-        log.debug("%s(%x)::size_request(%r)", self.name, id(self), requisition)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s(%x)::size_request(%r)", self.name, id(self), requisition)
         self._requisition = requisition
+        self._request_needed = False
+        if requisition != old_requisition:
+            self._requisition_gen += 1
         return requisition
 
     def do_size_request(self):
@@ -262,7 +295,7 @@ class Widget(UObject):
         classes, to assing a size and position to their child widgets.
         """
         alloc_needed = self._alloc_needed
-        if self._request_needed: # Preserve request/allocate ordering
+        if not self._request_needed: # Preserve request/allocate ordering
             self._alloc_needed = False
 
         old_alloc = self._allocation
@@ -279,7 +312,8 @@ class Widget(UObject):
         if not alloc_needed and not size_changed and not position_changed:
             return
 
-        log.debug("%s::size_allocate%r", self.name, tuple(allocation))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::size_allocate%r", self.name, tuple(allocation))
         self.emit("size-allocate", allocation)
 
         if self.is_mapped and self._redraw_on_alloc:
@@ -310,10 +344,14 @@ class Widget(UObject):
         if self.is_toplevel:
             raise Warning("Can't set a parent on a toplevel widget")
         self._parent = parent
+        self._queue_ancesors_request()
         self.emit("parent-set", None)
         self.notify("parent")
 
         # Enforce realized/mapped invariants
+        if parent.is_realized and updates.is_frozen():
+            updates.defer_map(self)
+            return
         if parent.is_realized:
             self.realize()
         if parent.is_visible and self.is_visible:
@@ -334,6 +372,7 @@ class Widget(UObject):
             self.unrealize()
         self._child_visible = True
 
+        self._queue_ancesors_request()
         old_parent = self.parent
         self._parent = None
         self.emit("parent-set", old_parent)
@@ -455,12 +494,20 @@ class Widget(UObject):
         if not self.is_realized:
             return
 
+        if updates.draws_deferred():
+            updates.defer_resize(self.get_toplevel())
+            return
+
         for ancesor in self.ancesor_iter():
             if not ancesor.is_realized:
                 return
 
-        log.debug("%s::queue_draw_area(x=%d, y=%d, width=%d, height=%d)",
-                  self.name, x, y, width, height)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::queue_draw_area(x=%d, y=%d, width=%d, height=%d)",
+                      self.name, x, y, width, height)
+        if trace.enabled:
+            trace.instant("queue_draw_area", "draw", widget=self.name,
+                          area=[x, y, width, height])
 
         if self.parent:
             self.parent.canvas.invalidate_area(Rectangle(x, y, width, height))
@@ -481,13 +528,31 @@ class Widget(UObject):
         For example, when you change the text in :class:utk.Label(),
         a resize is queued to ensure there's enough space for the new text.
         """
-        if self.is_realized:
-            log.debug("%s::queue_resize()" % self.name)
-            self._alloc_needed = True
-            self._request_needed = True
+        self._alloc_needed = True
+        self._request_needed = True
+        if self.is_realized and updates.is_frozen():
+            self._queue_ancesors_request()
+            updates.defer_resize(self.get_toplevel())
+        elif self.is_realized:
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s::queue_resize()", self.name)
+            if trace.enabled:
+                trace.instant("queue_resize", "layout", widget=self.name)
             if self.parent:
                 self.parent._container_queue_resize()
             elif self.is_toplevel:
                 self._container_queue_resize()
             else:
                 assert False, "Not reach this line"
+        else:
+            self._queue_ancesors_request()
+
+    def _queue_ancesors_request(self):
+        """
+        Flag the ancesors to query their children again in the next size
+        request. Ancesors whose requisition does not change keep the cached
+        one and don't need to be queried again by their own parents.
+        """
+        for ancesor in self.ancesor_iter():
+            ancesor._child_request_needed = True
+            ancesor._alloc_needed = True
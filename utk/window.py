@@ -33,6 +33,8 @@ class Window(Bin):
 
     _toplevel = True
 
+    __slots__ = ("_screen",)
+
     def __init__(self):
         super(Window, self).__init__()
         self._resize_mode = RESIZE_QUEUE
@@ -97,11 +99,13 @@ class Window(Bin):
     # "check-resize" signal handler
     def do_check_resize(self):
         if self.is_visible:
-            if self._request_needed:
-                log.debug("Need size request")
+            if self._request_needed or self._child_request_needed:
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Need size request")
                 self.size_request()
             if self._alloc_needed:
-                log.debug("Need size allocate")
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Need size allocate")
                 self.size_allocate(self._allocation)
             self.queue_screen_draw()
 
@@ -109,7 +113,8 @@ class Window(Bin):
         pass
 
     def compute_configure_request(self):
-        log.debug("%s::compute_configure_request()", self.name)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s::compute_configure_request()", self.name)
         if not self._screen.started:
             self._screen.start()
         return Requisition(*self._screen.get_cols_rows())